@@ -0,0 +1,6 @@
+"""Benchmarks for the user profiles processor.
+
+Run a benchmark module from the repository root, for example:
+
+    python -m benchmarks.memory_layout --count 100000
+"""
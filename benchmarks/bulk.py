@@ -0,0 +1,76 @@
+"""Compare adding profiles one at a time with add_profile against add_profiles.
+
+    python -m benchmarks.bulk --count 200000 --invalid-fraction 0.3 --duplicate-fraction 0.3
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.location import Location
+from src.user_manager import UserProfileManager
+from src.user_profile import UserProfile
+from benchmarks.synthetic import generate_profiles
+
+
+def _profile(record: dict) -> UserProfile | None:
+    try:
+        return UserProfile(record["name"], record["email"], record["password"], record["dob"],
+                           Location(**record["location"]))
+    except (KeyError, TypeError):
+        return None
+
+
+def _one_by_one(profiles: list[UserProfile], storage: str) -> float:
+    manager = UserProfileManager(storage=storage)
+    start = time.perf_counter()
+    # add_profile prints why a profile is invalid.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for profile in profiles:
+            try:
+                manager.add_profile(profile)
+            except ValueError:
+                pass
+    return time.perf_counter() - start
+
+
+def _bulk(profiles: list[UserProfile], storage: str) -> float:
+    manager = UserProfileManager(storage=storage)
+    start = time.perf_counter()
+    manager.add_profiles(profiles)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--invalid-fraction", type=float, default=0.3,
+                        help="Share of invalid records (default: 0.3)")
+    parser.add_argument("--duplicate-fraction", type=float, default=0.3,
+                        help="Share of profiles repeating an earlier email (default: 0.3)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    unique = int(args.count * (1 - args.duplicate_fraction))
+    records = list(generate_profiles(unique, args.seed, args.invalid_fraction))
+    records += [rng.choice(records) for _ in range(args.count - unique)]
+    rng.shuffle(records)
+    profiles = [profile for profile in map(_profile, records) if profile is not None]
+
+    print(f"{'case':<36}{'seconds':>10}")
+    for storage in ("dict", "sqlite"):
+        print(f"{f'add_profile, {storage}':<36}{_one_by_one(profiles, storage):>10.2f}")
+        print(f"{f'add_profiles, {storage}':<36}{_bulk(profiles, storage):>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
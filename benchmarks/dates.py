@@ -0,0 +1,68 @@
+"""Compare the strptime date path with the cached parser and parsed dates of birth.
+
+    python -m benchmarks.dates --count 200000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile
+from src.dates import DOB_FORMATS, parse_dob
+from src.user_profile import age_on
+from benchmarks.synthetic import generate_profiles
+
+
+def _strptime(dob: str) -> datetime:
+    """The date parser before parse_dob: up to two strptime calls."""
+    for dob_format in DOB_FORMATS:
+        try:
+            return datetime.strptime(dob, dob_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date format: {dob}")
+
+
+def _timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of dates of birth (default: 200000)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    records = list(generate_profiles(args.count, args.seed))
+    dobs = [record["dob"] for record in records]
+    location = Location("Seattle", "WA", "US")
+    profiles = [UserProfile(record["name"], record["email"], record["password"], record["dob"], location)
+                for record in records]
+    reference_date = date.today()
+
+    parse_dob.cache_clear()
+    cases = [
+        ("parse: strptime", lambda: [_strptime(dob) for dob in dobs]),
+        ("parse: parse_dob, cold cache", lambda: [parse_dob(dob) for dob in dobs]),
+        ("parse: parse_dob, warm cache", lambda: [parse_dob(dob) for dob in dobs]),
+        ("age: strptime per call", lambda: [age_on(_strptime(profile.dob), datetime.today()) for profile in profiles]),
+        ("age: get_age(reference_date)", lambda: [profile.get_age(reference_date) for profile in profiles]),
+        ("sort key: strptime", lambda: [_strptime(profile.dob).toordinal() for profile in profiles]),
+        ("sort key: dob_ordinal", lambda: [profile.dob_ordinal for profile in profiles]),
+    ]
+    print(f"{'case':<32}{'seconds':>10}{'per second':>14}")
+    for label, function in cases:
+        elapsed = _timed(function)
+        print(f"{label:<32}{elapsed:>10.3f}{args.count / elapsed:>14.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
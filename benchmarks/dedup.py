@@ -0,0 +1,63 @@
+"""Compare duplicate detection with an in-memory set and with the on-disk store.
+
+    python -m benchmarks.dedup --count 1000000 --duplicate-fraction 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.dedup import DuplicateDetector
+
+
+def _run(emails: list[str], path: str | None, expected: int) -> tuple[float, int, DuplicateDetector]:
+    gc.collect()
+    start = time.perf_counter()
+    with DuplicateDetector(path, expected=expected) as dedup:
+        for email in emails:
+            dedup.add(email)
+    return time.perf_counter() - start, dedup.duplicates, dedup
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of emails (default: 1000000)")
+    parser.add_argument("--duplicate-fraction", type=float, default=0.05,
+                        help="Share of emails repeating an earlier one (default: 0.05)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    emails = []
+    for number in range(args.count):
+        if emails and rng.random() < args.duplicate_fraction:
+            emails.append(rng.choice(emails))
+        else:
+            emails.append(f"user{number}@example.com")
+
+    print(f"{'store':<12}{'seconds':>10}{'emails/s':>12}{'peak MiB':>10}{'duplicates':>12}{'false pos.':>12}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for label, path in (("memory", None), ("disk", os.path.join(work_dir, "emails.db"))):
+            elapsed, duplicates, dedup = _run(emails, path, args.count)
+            if path is not None:
+                os.remove(path)
+            tracemalloc.start()
+            _run(emails, path, args.count)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{label:<12}{elapsed:>10.2f}{args.count / elapsed:>12.0f}{peak / 2**20:>10.1f}"
+                  f"{duplicates:>12}{dedup.false_positives:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""Time diffing two synthetic datasets and measure the memory it needs per partition count.
+
+    python -m benchmarks.diff --count 200000 --changed-fraction 0.05 --partitions 1 8 32
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import ProfileDiffer
+from src.streaming import iter_profiles
+from benchmarks.synthetic import generate_profiles, write_profiles
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles per dataset (default: 200000)")
+    parser.add_argument("--changed-fraction", type=float, default=0.05,
+                        help="Share of profiles changed, and of profiles added and removed (default: 0.05)")
+    parser.add_argument("--partitions", type=int, nargs="+", default=[1, 8, 32],
+                        help="Partition counts to try (default: 1 8 32)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    churn = int(args.count * args.changed_fraction)
+    with tempfile.TemporaryDirectory() as work_dir:
+        old_path = os.path.join(work_dir, "old.ndjson")
+        new_path = os.path.join(work_dir, "new.ndjson")
+        write_profiles(old_path, args.count, args.seed, ndjson=True)
+        with open(new_path, mode='w') as new_file:
+            for index, record in enumerate(generate_profiles(args.count + churn, args.seed)):
+                if index < churn:
+                    continue
+                if rng.random() < args.changed_fraction:
+                    record["name"] = "Changed Name"
+                new_file.write(json.dumps(record))
+                new_file.write("\n")
+
+        print(f"{'partitions':>10}{'seconds':>10}{'peak MiB':>10}{'changes':>10}")
+        for partitions in args.partitions:
+            def run():
+                differ = ProfileDiffer(partitions, spill_dir=work_dir)
+                for _ in differ.diff(iter_profiles(old_path, "ndjson"), iter_profiles(new_path, "ndjson")):
+                    pass
+                return differ.counts
+            gc.collect()
+            start = time.perf_counter()
+            counts = run()
+            elapsed = time.perf_counter() - start
+            gc.collect()
+            tracemalloc.start()
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            changes = counts["added"] + counts["removed"] + counts["changed"]
+            print(f"{partitions:>10}{elapsed:>10.2f}{peak / 2**20:>10.1f}{changes:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+"""Measure loading a directory of input shards with 1, 2, 4, ... worker processes.
+
+    python -m benchmarks.ingest --shards 16 --count 20000 --max-workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from src.ingest import expand_inputs
+from benchmarks.parallel_scaling import _worker_counts
+from benchmarks.synthetic import write_profiles
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, default=16, help="Number of input files (default: 16)")
+    parser.add_argument("--count", type=int, default=20_000, help="Profiles per shard (default: 20000)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                        help="Largest worker count to try (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed of the first shard (default: 0)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for shard in range(args.shards):
+            write_profiles(os.path.join(temp_dir, f"shard-{shard:04d}.ndjson"), args.count,
+                           args.seed + shard, ndjson=True)
+        json_files = expand_inputs([temp_dir])
+
+        print(f"{'workers':>8}{'seconds':>10}{'profiles/s':>14}{'speedup':>10}{'slowest file':>14}")
+        baseline = None
+        for workers in _worker_counts(args.max_workers):
+            manager = UserProfileManager()
+            start = time.perf_counter()
+            reports = manager.load_profiles_from_files(json_files, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            slowest = max(report.seconds for report in reports)
+            print(f"{workers:>8}{elapsed:>10.2f}{len(manager.user_profiles) / elapsed:>14.0f}"
+                  f"{baseline / elapsed:>10.2f}{slowest:>14.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
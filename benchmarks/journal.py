@@ -0,0 +1,73 @@
+"""Compare persisting changes by rewriting JSON with appending to the journal.
+
+    python -m benchmarks.journal --count 100000 --changes 1000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from benchmarks.synthetic import generate_profiles
+
+
+def _profiles(count: int, seed: int) -> list[UserProfile]:
+    profiles = []
+    for profile_data in generate_profiles(count, seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        profiles.append(UserProfile(**profile_data))
+    return profiles
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Number of profiles (default: 100000)")
+    parser.add_argument("--changes", type=int, default=1000, help="Adds and removes to persist (default: 1000)")
+    parser.add_argument("--save-every", type=int, default=100,
+                        help="Changes between two JSON saves (default: 100)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    profiles = _profiles(args.count + args.changes, args.seed)
+    with tempfile.TemporaryDirectory() as work_dir:
+        json_manager = UserProfileManager()
+        journal_manager = UserProfileManager()
+        journal_manager.open_journal(os.path.join(work_dir, "profiles.journal"),
+                                     os.path.join(work_dir, "profiles.snap"), compact_every=None)
+        for manager in (json_manager, journal_manager):
+            for profile in profiles[:args.count]:
+                manager._insert_profile(profile)
+
+        start = time.perf_counter()
+        for number, profile in enumerate(profiles[args.count:], start=1):
+            json_manager._insert_profile(profile)
+            if number % args.save_every == 0:
+                json_manager.save_profiles_to_json(os.path.join(work_dir, "profiles.json"))
+        rewrite = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for profile in profiles[args.count:]:
+            journal_manager._insert_profile(profile)
+        journal_manager._journal.sync()
+        journal = time.perf_counter() - start
+
+        start = time.perf_counter()
+        journal_manager.compact_journal()
+        compaction = time.perf_counter() - start
+        journal_manager.close_journal()
+
+    print(f"{'persistence':<32}{'seconds':>10}")
+    print(f"{f'JSON rewrite every {args.save_every} changes':<32}{rewrite:>10.3f}")
+    print(f"{'journal':<32}{journal:>10.3f}")
+    print(f"{'one compaction':<32}{compaction:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
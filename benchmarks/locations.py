@@ -0,0 +1,107 @@
+"""Compare interned Location objects with one new Location per profile on skewed data.
+
+    python -m benchmarks.locations --count 200000 --distinct 5000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.user_profile
+from src import UserProfileManager
+from src.location import Location
+from src.validation import valid_location_fields
+from benchmarks.synthetic import generate_profiles
+
+
+class PlainLocation:
+    """Location as it was before interning: a new object per profile, validated on every call."""
+    def __init__(self, city: str, state: str, country: str):
+        self.city = city
+        self.state = state
+        self.country = country
+
+    def valid_location(self) -> bool:
+        return valid_location_fields(self.city, self.state, self.country)
+
+
+def _skewed_locations(count: int, distinct: int, rng: random.Random) -> list[dict]:
+    """Draw count locations from distinct ones with Zipf-like weights."""
+    places = []
+    for _ in range(distinct):
+        city = "".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(4, 12))).capitalize()
+        places.append({"city": city, "state": "".join(rng.choices(string.ascii_uppercase, k=2)),
+                       "country": rng.choice(["US", "CA", "GB", "AU", "DE"])})
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    return [dict(place) for place in rng.choices(places, weights, k=count)]
+
+
+def _measure(function) -> tuple[float, int]:
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, current
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--distinct", type=int, default=5000, help="Number of distinct locations (default: 5000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    locations = _skewed_locations(args.count, args.distinct, rng)
+    print(f"{'case':<38}{'seconds':>10}{'retained MiB':>14}")
+    for label, location_class in (("plain locations", PlainLocation), ("interned locations", Location)):
+        def build(location_class=location_class):
+            built = [location_class(**fields) for fields in locations]
+            for location in built:
+                location.valid_location()
+            return built
+        elapsed, retained = _measure(build)
+        print(f"{f'{label}: build + validate':<38}{elapsed:>10.3f}{retained / 2**20:>14.1f}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "profiles.json")
+        records = list(generate_profiles(args.count, args.seed))
+        for record, fields in zip(records, locations):
+            record["location"] = fields
+        with open(input_path, mode='w') as input_file:
+            json.dump(records, input_file)
+        del records
+
+        def load():
+            manager = UserProfileManager()
+            manager.load_profiles_from_json(input_path)
+            return manager
+        for label, location_class in (("plain locations", PlainLocation), ("interned locations", Location)):
+            src.user_profile.Location = location_class
+            try:
+                elapsed, retained = _measure(load)
+            finally:
+                src.user_profile.Location = Location
+            print(f"{f'{label}: ingest':<38}{elapsed:>10.3f}{retained / 2**20:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
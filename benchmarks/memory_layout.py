@@ -0,0 +1,80 @@
+"""Compare the memory footprint of the dict and compact storage engines.
+
+    python -m benchmarks.memory_layout --count 100000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.user_manager import STORAGE_ENGINES
+from benchmarks.synthetic import generate_profiles
+
+
+def measure(storage: str, count: int, seed: int) -> dict:
+    """Fill a manager and report the memory it retains.
+
+    Args:
+        storage: Storage engine name
+        count: Number of profiles to add
+        seed: Generator seed
+
+    Returns:
+        Dictionary with retained bytes, bytes per profile and fill time
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    manager = UserProfileManager(storage=storage)
+    for profile_data in generate_profiles(count, seed):
+        profile = UserProfile(
+            name=profile_data["name"],
+            email=profile_data["email"],
+            password=profile_data["password"],
+            dob=profile_data["dob"],
+            location=Location(**profile_data["location"]),
+        )
+        manager._insert_profile(profile)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del manager
+    return {
+        "storage": storage,
+        "profiles": count,
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "bytes_per_profile": retained / count if count else 0.0,
+        "fill_seconds": elapsed,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Number of profiles (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    print(f"{'storage':<10}{'retained MiB':>14}{'peak MiB':>12}{'B/profile':>12}{'fill s':>10}")
+    for storage in STORAGE_ENGINES:
+        result = measure(storage, args.count, args.seed)
+        print(
+            f"{result['storage']:<10}"
+            f"{result['retained_bytes'] / 2**20:>14.1f}"
+            f"{result['peak_bytes'] / 2**20:>12.1f}"
+            f"{result['bytes_per_profile']:>12.0f}"
+            f"{result['fill_seconds']:>10.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+"""Compare building the output list and json.dump with the streaming writer.
+
+    python -m benchmarks.output --count 200000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.main import _write_output
+from benchmarks.synthetic import generate_profiles
+
+
+def _list_and_dump(profiles, output_path: str) -> None:
+    """The export path before the streaming writer."""
+    output_list = []
+    for profile in profiles:
+        output_list.append(profile.to_dict())
+    with open(output_path, mode="w") as file_handle:
+        json.dump(output_list, file_handle, indent=4)
+
+
+def _measure(function) -> tuple[float, int]:
+    """Return the seconds of one call and the peak traced bytes of a second one.
+
+    Tracing slows allocation down a lot, so time and memory are measured
+    in separate runs.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    manager = UserProfileManager()
+    for profile_data in generate_profiles(args.count, args.seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        manager._insert_profile(UserProfile(**profile_data))
+    profiles = manager.sort_profiles("age")
+
+    cases = {
+        "list + json.dump": lambda path: _list_and_dump(profiles, path),
+        "stream json": lambda path: _write_output((p.to_dict() for p in profiles), path),
+        "stream --compact": lambda path: _write_output((p.to_dict() for p in profiles), path, compact=True),
+        "stream ndjson": lambda path: _write_output((p.to_dict() for p in profiles), path, "ndjson"),
+    }
+    print(f"{'writer':<20}{'seconds':>10}{'peak MiB':>10}{'file MiB':>10}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, "output.json")
+        for label, write in cases.items():
+            elapsed, peak = _measure(lambda: write(output_path))
+            size = os.path.getsize(output_path)
+            print(f"{label:<20}{elapsed:>10.3f}{peak / 2**20:>10.1f}{size / 2**20:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,55 @@
+"""Measure how ingest throughput scales with the number of worker processes.
+
+    python -m benchmarks.parallel_scaling --count 500000 --max-workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from benchmarks.synthetic import write_profiles
+
+
+def _worker_counts(max_workers: int):
+    workers = 1
+    while workers < max_workers:
+        yield workers
+        workers *= 2
+    yield max_workers
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                        help="Largest worker count to try (default: CPU count)")
+    parser.add_argument("--input-format", choices=["json", "ndjson"], default="ndjson",
+                        help="Format of the generated input (default: ndjson)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, f"profiles.{args.input_format}")
+        write_profiles(input_path, args.count, args.seed, ndjson=args.input_format == "ndjson")
+
+        print(f"{'workers':>8}{'seconds':>10}{'profiles/s':>14}{'speedup':>10}")
+        baseline = None
+        for workers in _worker_counts(args.max_workers):
+            manager = UserProfileManager()
+            start = time.perf_counter()
+            manager.load_profiles_from_json(input_path, input_format=args.input_format, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8}{elapsed:>10.2f}{len(manager.user_profiles) / elapsed:>14.0f}{baseline / elapsed:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
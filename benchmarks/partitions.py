@@ -0,0 +1,59 @@
+"""Compare one run per country with a single --partition-by run.
+
+    python -m benchmarks.partitions --count 200000 --writers 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.main import main as cli_main
+from benchmarks.synthetic import generate_profiles, write_profiles
+
+
+def _run(argv) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()):
+        cli_main(argv)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4],
+                        help="Writer thread counts to try (default: 1 4)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "profiles.ndjson")
+        write_profiles(input_path, args.count, args.seed, ndjson=True)
+        countries = sorted({record["location"]["country"] for record in generate_profiles(args.count, args.seed)})
+
+        print(f"{'case':<42}{'seconds':>10}")
+        elapsed = sum(
+            _run(["-i", input_path, "-o", os.path.join(work_dir, f"{country}.json"), "--sort", "name",
+                  "--where", f"country={country}"])
+            for country in countries
+        )
+        print(f"{f'{len(countries)} runs with --where country=':<42}{elapsed:>10.2f}")
+        for writers in args.writers:
+            for fields in ("country", "country,state"):
+                out_dir = os.path.join(work_dir, f"out-{writers}-{fields}")
+                elapsed = _run(["-i", input_path, "-o", out_dir, "--sort", "name", "--partition-by", fields,
+                                "--writers", str(writers)])
+                print(f"{f'--partition-by {fields}, {writers} writers':<42}{elapsed:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+"""Measure how password hashing throughput scales with the number of worker processes.
+
+    python -m benchmarks.passwords --count 2000 --algorithm scrypt --max-workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import PasswordHasher, UserProfileManager
+from src.passwords import DEFAULT_COSTS, HASH_ALGORITHMS
+from benchmarks.parallel_scaling import _worker_counts
+from benchmarks.synthetic import write_profiles
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="Number of profiles (default: 2000)")
+    parser.add_argument("--algorithm", choices=HASH_ALGORITHMS, default="scrypt",
+                        help="Hash algorithm (default: scrypt)")
+    parser.add_argument("--cost", type=int, help="scrypt N or PBKDF2 iterations (default: the hasher's default)")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                        help="Largest worker count to try (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, "profiles.ndjson")
+        write_profiles(input_path, args.count, args.seed, ndjson=True)
+
+        start = time.perf_counter()
+        UserProfileManager().load_profiles_from_json(input_path, input_format="ndjson")
+        plain = time.perf_counter() - start
+        cost = args.cost or DEFAULT_COSTS[args.algorithm]
+        print(f"ingest without hashing: {plain:.2f}s; {args.algorithm} cost {cost}")
+
+        print(f"{'workers':>8}{'seconds':>10}{'hashes/s':>12}{'speedup':>10}")
+        baseline = None
+        for workers in _worker_counts(args.max_workers):
+            manager = UserProfileManager()
+            hasher = PasswordHasher(args.algorithm, args.cost, workers=workers)
+            start = time.perf_counter()
+            manager.load_profiles_from_json(input_path, input_format="ndjson", hasher=hasher)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8}{elapsed:>10.2f}{len(manager.user_profiles) / elapsed:>12.0f}{baseline / elapsed:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+"""Compare uncached runs with result cache misses and hits.
+
+    python -m benchmarks.result_cache --count 200000 --sort country,-age,name
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.main import main as cli_main
+from benchmarks.synthetic import write_profiles
+
+
+def _run(argv) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()):
+        cli_main(argv)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--sort", default="age", help="Sort spec of every run (default: age)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "profiles.ndjson")
+        write_profiles(input_path, args.count, args.seed, ndjson=True)
+        output_path = os.path.join(work_dir, "output.json")
+        base = ["-i", input_path, "-o", output_path, f"--sort={args.sort}"]
+
+        print(f"{'case':<32}{'seconds':>10}")
+        print(f"{'no cache':<32}{_run(base):>10.2f}")
+        for mode in ("mtime", "content"):
+            cache = ["--cache-dir", os.path.join(work_dir, f"cache-{mode}"), "--cache-key", mode]
+            print(f"{f'miss (--cache-key {mode})':<32}{_run([*base, *cache]):>10.2f}")
+            print(f"{f'hit (--cache-key {mode})':<32}{_run([*base, *cache]):>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
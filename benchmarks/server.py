@@ -0,0 +1,77 @@
+"""Compare the latency of cold command-line runs with requests to a warm server.
+
+    python -m benchmarks.server --count 100000 --requests 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.server import send_request
+from benchmarks.synthetic import write_profiles
+
+ROOT = str(Path(__file__).parent.parent)
+
+
+def _command(*arguments: str) -> list[str]:
+    return [sys.executable, "-c", "import sys; from src.main import main; raise SystemExit(main(sys.argv[1:]))",
+            *arguments]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Number of profiles (default: 100000)")
+    parser.add_argument("--cold-runs", type=int, default=3, help="Command-line runs to time (default: 3)")
+    parser.add_argument("--requests", type=int, default=200, help="Server requests to time (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "profiles.json")
+        socket_path = os.path.join(work_dir, "server.sock")
+        write_profiles(input_path, args.count, args.seed)
+
+        cold = []
+        for _ in range(args.cold_runs):
+            start = time.perf_counter()
+            subprocess.run(_command("-i", input_path, "--sort", "name", "--limit", "10", "-o", os.devnull),
+                           cwd=ROOT, check=True)
+            cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        server = subprocess.Popen(_command("serve", "-i", input_path, "--socket", socket_path), cwd=ROOT,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(socket_path):
+                if server.poll() is not None:
+                    raise SystemExit("The server exited before it was ready")
+                time.sleep(0.01)
+            startup = time.perf_counter() - start
+            warm = []
+            for number in range(args.requests):
+                request = {"op": "sort", "sort": "name", "limit": 10, "offset": number % 100}
+                start = time.perf_counter()
+                response = send_request(request, socket_path)
+                warm.append(time.perf_counter() - start)
+                assert response["ok"], response
+            send_request({"op": "shutdown"}, socket_path)
+        finally:
+            server.wait(timeout=60)
+
+    print(f"{'mode':<28}{'median ms':>12}{'max ms':>10}")
+    print(f"{'cold command-line run':<28}{statistics.median(cold) * 1000:>12.1f}{max(cold) * 1000:>10.1f}")
+    print(f"{'server request':<28}{statistics.median(warm) * 1000:>12.2f}{max(warm) * 1000:>10.2f}")
+    print(f"server startup: {startup:.2f}s, paid once")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
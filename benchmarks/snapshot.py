@@ -0,0 +1,62 @@
+"""Compare reloading profiles from JSON with opening a binary snapshot.
+
+    python -m benchmarks.snapshot --count 200000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from benchmarks.synthetic import write_profiles
+
+
+def _time(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        json_path = os.path.join(work_dir, "profiles.json")
+        snapshot_path = os.path.join(work_dir, "profiles.snap")
+        write_profiles(json_path, args.count, args.seed)
+        source = UserProfileManager()
+        source.load_profiles_from_json(json_path)
+        save = _time(lambda: source.save_snapshot(snapshot_path))
+        email = next(iter(source.user_profiles))
+
+        from_json = UserProfileManager()
+        from_snapshot = UserProfileManager()
+        print(f"{'step':<28}{'json s':>10}{'snapshot s':>12}")
+        print(f"{'save':<28}{'':>10}{save:>12.3f}")
+        rows = [
+            ("load", lambda: from_json.load_profiles_from_json(json_path),
+             lambda: from_snapshot.load_snapshot(snapshot_path)),
+            ("get_profile", lambda: from_json.get_profile(email), lambda: from_snapshot.get_profile(email)),
+            ("100 oldest", lambda: from_json.sort_profiles("age", limit=100),
+             lambda: from_snapshot.sort_profiles("age", limit=100)),
+            ("sort by name", lambda: from_json.sort_profiles("name"), lambda: from_snapshot.sort_profiles("name")),
+        ]
+        for label, json_step, snapshot_step in rows:
+            print(f"{label:<28}{_time(json_step):>10.3f}{_time(snapshot_step):>12.3f}")
+        print(f"{'file MiB':<28}{os.path.getsize(json_path) / 2**20:>10.1f}"
+              f"{os.path.getsize(snapshot_path) / 2**20:>12.1f}")
+        from_snapshot.user_profiles.snapshot.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+"""Compare a mixed read/write workload with and without sorted views.
+
+    python -m benchmarks.sorted_views --count 100000 --rounds 200
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from benchmarks.synthetic import generate_profiles
+
+SPECS = ("name", "age", "location")
+
+
+def _profiles(count: int, seed: int) -> list[UserProfile]:
+    profiles = []
+    for profile_data in generate_profiles(count, seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        profiles.append(UserProfile(**profile_data))
+    return profiles
+
+
+def _workload(manager: UserProfileManager, extra: list[UserProfile], rounds: int,
+              writes: int, page: int | None, seed: int) -> float:
+    """Alternate a few removes and adds with one read per spec; return seconds."""
+    rng = random.Random(seed)
+    emails = list(manager.user_profiles)
+    pending = list(extra)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _ in range(writes):
+            position = rng.randrange(len(emails))
+            emails[position], emails[-1] = emails[-1], emails[position]
+            manager.remove_profile(emails.pop())
+            profile = pending.pop()
+            manager._insert_profile(profile)
+            emails.append(profile.email)
+        for spec in SPECS:
+            manager.sort_profiles(spec, limit=page)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Number of profiles (default: 100000)")
+    parser.add_argument("--rounds", type=int, default=200, help="Read/write rounds (default: 200)")
+    parser.add_argument("--writes", type=int, default=5, help="Removes and adds per round (default: 5)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    profiles = _profiles(args.count + args.rounds * args.writes, args.seed)
+    print(f"{'read':<12}{'re-sort s':>12}{'views s':>10}{'speedup':>10}")
+    for label, page in (("full", None), ("first 100", 100)):
+        timings = []
+        for with_views in (False, True):
+            manager = UserProfileManager()
+            for profile in profiles[:args.count]:
+                manager._insert_profile(profile)
+            if with_views:
+                for spec in SPECS:
+                    manager.enable_sorted_view(spec)
+            timings.append(_workload(manager, profiles[args.count:], args.rounds, args.writes,
+                                     page, args.seed))
+        resort, views = timings
+        print(f"{label:<12}{resort:>12.3f}{views:>10.3f}{resort / views:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
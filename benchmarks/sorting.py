@@ -0,0 +1,55 @@
+"""Compare cached-key sorting with sorting by recomputed keys.
+
+    python -m benchmarks.sorting --count 200000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from benchmarks.synthetic import generate_profiles
+
+# Key functions used before sort keys were cached at insertion time.
+RECOMPUTED_KEYS = {
+    "age": (lambda p: p.get_age(), True),
+    "name": (lambda p: p.name, False),
+    "email": (lambda p: p.email, False),
+    "location": (lambda p: (p.location.country, p.location.state, p.location.city), False),
+}
+
+
+def _time(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000, help="Number of profiles (default: 200000)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    manager = UserProfileManager()
+    for profile_data in generate_profiles(args.count, args.seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        manager._insert_profile(UserProfile(**profile_data))
+
+    print(f"{'key':<22}{'recomputed s':>14}{'cached s':>10}{'speedup':>10}")
+    for key, (key_function, reverse) in RECOMPUTED_KEYS.items():
+        profiles = manager.user_profiles.values()
+        recomputed = _time(lambda: sorted(profiles, key=key_function, reverse=reverse))
+        cached = _time(lambda: manager.sort_profiles(key))
+        print(f"{key:<22}{recomputed:>14.3f}{cached:>10.3f}{recomputed / cached:>10.1f}")
+    composite = _time(lambda: manager.sort_profiles("country,-age,name"))
+    print(f"{'country,-age,name':<22}{'':>14}{composite:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,230 @@
+"""Time the main code paths and compare the results with a saved JSON baseline.
+
+    python -m benchmarks.suite run --sizes 1000 100000 --save baseline.json
+    python -m benchmarks.suite run --sizes 1000 100000 --save current.json
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.1
+
+Each case is run on a synthetic input of every --sizes count (with
+--invalid-fraction invalid records) and records its best wall time of
+--repeat runs and the peak traced memory of one more run. compare exits
+with status 1 when a case got slower or needed more memory than the
+threshold allows.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.main import main as cli_main
+from benchmarks.synthetic import generate_profiles, write_profiles
+
+BASELINE_VERSION = 1
+DEFAULT_THRESHOLD = 0.10
+# Increases below these are timer and allocator noise, never regressions.
+NOISE_SECONDS = 0.001
+NOISE_BYTES = 64 * 1024
+
+
+def _profiles(records: List[dict]) -> List[UserProfile]:
+    """Build UserProfile objects from the records that have every field."""
+    profiles = []
+    for record in records:
+        if len(record) == 5:
+            profiles.append(UserProfile(**dict(record, location=Location(**record["location"]))))
+    return profiles
+
+
+def _measure(function: Callable[[], object], repeat: int) -> tuple[float, int]:
+    """Return the best seconds of repeat calls and the peak traced bytes of one more.
+
+    Tracing slows allocation down a lot, so time and memory are measured
+    in separate runs.
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def _validate_all(profiles: List[UserProfile]) -> None:
+    # validate() prints a line per invalid profile.
+    with open(os.devnull, mode='w') as devnull, contextlib.redirect_stdout(devnull):
+        for profile in profiles:
+            profile.validate()
+
+
+def _cases(input_path: str, output_path: str, records: List[dict]) -> Dict[str, Callable[[], object]]:
+    """Return the benchmark cases for one input size, keyed by case name."""
+    profiles = _profiles(records)
+    manager = UserProfileManager()
+    manager.load_profiles_from_json(input_path)
+
+    def load():
+        UserProfileManager().load_profiles_from_json(input_path)
+
+    def end_to_end():
+        with open(os.devnull, mode='w') as devnull, contextlib.redirect_stdout(devnull):
+            cli_main(["--input", input_path, "--output", output_path, "--sort", "age"])
+
+    return {
+        "load_profiles_from_json": load,
+        "UserProfile.validate": lambda: _validate_all(profiles),
+        "sort_profiles_by_age": manager.sort_profiles_by_age,
+        "sort_profiles_by_name": manager.sort_profiles_by_name,
+        "sort_profiles_by_email": manager.sort_profiles_by_email,
+        "sort_profiles_by_location": manager.sort_profiles_by_location,
+        "to_dict": lambda: [profile.to_dict() for profile in manager.user_profiles.values()],
+        "main.main": end_to_end,
+    }
+
+
+def run_suite(sizes: List[int], seed: int = 0, invalid_fraction: float = 0.05, repeat: int = 3,
+              case_names: List[str] | None = None) -> dict:
+    """Run the benchmark cases and return the results as a baseline document.
+
+    Args:
+        sizes: Record counts to generate inputs for
+        seed: Generator seed
+        invalid_fraction: Share of invalid records in each input
+        repeat: Timed runs per case; the fastest is kept
+        case_names: Only run these cases (default: all)
+
+    Returns:
+        Dictionary with "version", "environment" and a "results" list of
+        {"case", "count", "seconds", "peak_bytes"} entries
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "profiles.json")
+        output_path = os.path.join(work_dir, "output.json")
+        for count in sizes:
+            write_profiles(input_path, count, seed, invalid_fraction=invalid_fraction)
+            records = list(generate_profiles(count, seed, invalid_fraction))
+            for name, function in _cases(input_path, output_path, records).items():
+                if case_names and name not in case_names:
+                    continue
+                seconds, peak = _measure(function, repeat)
+                results.append({"case": name, "count": count, "seconds": seconds, "peak_bytes": peak})
+    return {
+        "version": BASELINE_VERSION,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "seed": seed,
+            "invalid_fraction": invalid_fraction,
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """Compare two baseline documents case by case.
+
+    Args:
+        baseline: Earlier results (see run_suite)
+        current: New results
+        threshold: Allowed relative increase, e.g. 0.1 for 10%
+
+    Returns:
+        One entry per case present in both, with the time and memory
+        ratios (current / baseline) and "regressed" set when either ratio
+        exceeds 1 + threshold by more than the noise floor
+    """
+    earlier = {(result["case"], result["count"]): result for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        previous = earlier.get((result["case"], result["count"]))
+        if previous is None:
+            continue
+        time_ratio = result["seconds"] / previous["seconds"] if previous["seconds"] else 1.0
+        memory_ratio = result["peak_bytes"] / previous["peak_bytes"] if previous["peak_bytes"] else 1.0
+        comparisons.append({
+            "case": result["case"],
+            "count": result["count"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regressed": (
+                (time_ratio > 1 + threshold and result["seconds"] - previous["seconds"] > NOISE_SECONDS)
+                or (memory_ratio > 1 + threshold and result["peak_bytes"] - previous["peak_bytes"] > NOISE_BYTES)
+            ),
+        })
+    return comparisons
+
+
+def _print_results(results: List[dict]) -> None:
+    print(f"{'case':<28}{'count':>10}{'seconds':>10}{'peak MiB':>10}")
+    for result in results:
+        print(f"{result['case']:<28}{result['count']:>10}{result['seconds']:>10.3f}"
+              f"{result['peak_bytes'] / 2**20:>10.1f}")
+
+
+def _print_comparisons(comparisons: List[dict]) -> None:
+    print(f"{'case':<28}{'count':>10}{'time':>8}{'memory':>8}")
+    for comparison in comparisons:
+        flag = "  REGRESSION" if comparison["regressed"] else ""
+        print(f"{comparison['case']:<28}{comparison['count']:>10}{comparison['time_ratio']:>8.2f}"
+              f"{comparison['memory_ratio']:>8.2f}{flag}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000],
+                            help="Record counts to benchmark, 10^3 to 10^7 (default: 1000 10000 100000)")
+    run_parser.add_argument("--seed", type=int, default=0, help="Generator seed (default: 0)")
+    run_parser.add_argument("--invalid-fraction", type=float, default=0.05,
+                            help="Share of invalid records in the input (default: 0.05)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (default: 3)")
+    run_parser.add_argument("--case", action="append", dest="cases", help="Only run this case (may be repeated)")
+    run_parser.add_argument("--save", help="Write the results to this JSON baseline file")
+    compare_parser = commands.add_parser("compare", help="Compare results with a baseline")
+    compare_parser.add_argument("baseline", help="Baseline JSON file")
+    compare_parser.add_argument("current", help="JSON file with the new results")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help=f"Allowed relative increase in time or memory (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+        document = run_suite(args.sizes, args.seed, args.invalid_fraction, args.repeat, args.cases)
+        _print_results(document["results"])
+        if args.save:
+            with open(args.save, mode='w') as baseline_file:
+                json.dump(document, baseline_file, indent=4)
+        return 0
+
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        comparisons = compare_results(json.load(baseline_file), json.load(current_file), args.threshold)
+    _print_comparisons(comparisons)
+    return 1 if any(comparison["regressed"] for comparison in comparisons) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import random
+from typing import Iterator
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry", "Irene", "Jack",
+    "Karen", "Liam", "Maria", "Noah", "Olivia", "Peter", "Quinn", "Rosa", "Sam", "Tara",
+]
+LAST_NAMES = [
+    "Johnson", "Williams", "Davis", "Brown", "Wilson", "Smith", "Garcia", "Miller", "Lee", "Clark",
+    "Lopez", "Young", "Hall", "Allen", "King", "Wright", "Scott", "Green", "Baker", "Adams",
+]
+DOMAINS = ["email.com", "test.org", "example.net", "company.com", "domain.co.uk"]
+LOCATIONS = [
+    ("Seattle", "WA", "US"), ("NewYork", "NY", "US"), ("Austin", "TX", "US"),
+    ("Chicago", "IL", "US"), ("Boston", "MA", "US"), ("LosAngeles", "CA", "US"),
+    ("Portland", "OR", "US"), ("Denver", "CO", "US"), ("London", "EN", "GB"),
+    ("Toronto", "ON", "CA"), ("Vancouver", "BC", "CA"), ("Sydney", "NS", "AU"),
+]
+
+
+# Ways a generated record is made invalid, each failing one validation rule.
+INVALID_KINDS = ("email", "password", "dob", "name", "location", "missing")
+
+
+def _make_invalid(profile_data: dict, rng: random.Random) -> dict:
+    kind = rng.choice(INVALID_KINDS)
+    if kind == "email":
+        profile_data["email"] = profile_data["email"].replace("@", "")
+    elif kind == "password":
+        profile_data["password"] = profile_data["password"].lower().rstrip("!")
+    elif kind == "dob":
+        profile_data["dob"] = rng.choice(["1990-13-45", "31.12.1990", "not a date"])
+    elif kind == "name":
+        profile_data["name"] = profile_data["name"].split()[0]
+    elif kind == "location":
+        profile_data["location"] = dict(profile_data["location"], state="Washington")
+    else:
+        del profile_data[rng.choice(["name", "email", "password", "dob", "location"])]
+    return profile_data
+
+
+def generate_profiles(count: int, seed: int = 0, invalid_fraction: float = 0.0) -> Iterator[dict]:
+    """Yield profile dictionaries with unique emails.
+
+    Args:
+        count: Number of profiles to generate
+        seed: Random seed; the same seed always yields the same profiles
+        invalid_fraction: Share of records broken in one of the INVALID_KINDS ways
+            (0 yields only valid profiles, exactly as before it existed)
+
+    Yields:
+        Profile dictionaries in the JSON input format
+    """
+    rng = random.Random(seed)
+    invalid_rng = random.Random(seed + 1)
+    for index in range(count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        year = rng.randint(1940, 2010)
+        month = rng.randint(1, 12)
+        day = rng.randint(1, 28)
+        if rng.random() < 0.5:
+            dob = f"{year:04d}-{month:02d}-{day:02d}"
+        else:
+            dob = f"{month:02d}/{day:02d}/{year:04d}"
+        city, state, country = rng.choice(LOCATIONS)
+        profile_data = {
+            "name": f"{first_name} {last_name}",
+            "email": f"{first_name.lower()}.{last_name.lower()}{index}@{rng.choice(DOMAINS)}",
+            "password": f"{first_name}Pass{rng.randint(10, 99)}!",
+            "dob": dob,
+            "location": {"city": city, "state": state, "country": country},
+        }
+        if invalid_fraction and invalid_rng.random() < invalid_fraction:
+            profile_data = _make_invalid(profile_data, invalid_rng)
+        yield profile_data
+
+
+def write_profiles(path: str, count: int, seed: int = 0, ndjson: bool = False,
+                   invalid_fraction: float = 0.0) -> None:
+    """Write generated profiles to a JSON array or NDJSON file.
+
+    Args:
+        path: Output file path
+        count: Number of profiles to generate
+        seed: Random seed
+        ndjson: Write one profile per line instead of a JSON array
+        invalid_fraction: Share of invalid records (see generate_profiles)
+    """
+    profiles = generate_profiles(count, seed, invalid_fraction)
+    with open(path, mode='w') as output_file:
+        if ndjson:
+            for profile_data in profiles:
+                output_file.write(json.dumps(profile_data))
+                output_file.write("\n")
+        else:
+            json.dump(list(profiles), output_file)
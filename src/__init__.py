@@ -1,6 +1,20 @@
+__version__ = "0.1.0"
+
 from .user_profile import UserProfile
-from .user_manager import UserProfileManager
+from .user_manager import BulkResult, UserProfileManager
 from .location import Location
+from .diff import ProfileDiffer
+from .ingest import FileReport
+from .passwords import PasswordHasher
+from .result_cache import ResultCache
+from .profile_store import CompactProfileStore, IndexedProfileStore, ProfileView
+from .sqlite_store import SQLiteProfileStore
+from .stats import PipelineStats
+from .validation import FieldError, ProfileValidator, RecordReport, RejectWriter
 
-__all__ = ['UserProfile', 'UserProfileManager', 'Location']
+__all__ = [
+    'UserProfile', 'UserProfileManager', 'BulkResult', 'Location', 'CompactProfileStore', 'IndexedProfileStore',
+    'ProfileView', 'SQLiteProfileStore', 'FileReport', 'PasswordHasher', 'ProfileDiffer', 'PipelineStats',
+    'ResultCache', 'FieldError', 'ProfileValidator', 'RecordReport', 'RejectWriter',
+]
 
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple
+
+DOB_FORMATS = ("%Y-%m-%d", "%m/%d/%Y")
+# Distinct date strings remembered by parse_dob; birth dates repeat a lot.
+DATE_CACHE_SIZE = 1 << 16
+
+# The fields accept exactly what datetime.strptime accepts for %Y, %m and %d,
+# so both parsers agree on every string (see tests/dates_test.py).
+_YEAR = r"(\d\d\d\d)"
+_MONTH = r"(1[0-2]|0[1-9]|[1-9])"
+_DAY = r"(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])"
+_ISO_PATTERN = re.compile(rf"{_YEAR}-{_MONTH}-{_DAY}")
+_US_PATTERN = re.compile(rf"{_MONTH}/{_DAY}/{_YEAR}")
+
+
+class ParsedDate(NamedTuple):
+    """A parsed date of birth.
+
+    Has year, month and day like a date, so age_on accepts it directly.
+
+    Attributes:
+        ordinal: Proleptic Gregorian ordinal of the date
+        year: Year
+        month: Month (1-12)
+        day: Day of the month
+        format_index: Index of the matching format in DOB_FORMATS
+    """
+    ordinal: int
+    year: int
+    month: int
+    day: int
+    format_index: int
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_dob(dob: str) -> ParsedDate:
+    """Parse a date in YYYY-MM-DD or MM/DD/YYYY format without strptime.
+
+    Args:
+        dob: Date string to parse
+
+    Returns:
+        ParsedDate of the string
+
+    Raises:
+        ValueError: If the string is not a real date in a supported format
+    """
+    match = _ISO_PATTERN.fullmatch(dob)
+    if match is not None:
+        year, month, day = match.groups()
+        format_index = 0
+    else:
+        match = _US_PATTERN.fullmatch(dob)
+        if match is None:
+            raise ValueError(f"Invalid date format: {dob}")
+        month, day, year = match.groups()
+        format_index = 1
+    try:
+        parsed = date(int(year), int(month), int(day))
+    except ValueError:
+        raise ValueError(f"Invalid date format: {dob}") from None
+    return ParsedDate(parsed.toordinal(), parsed.year, parsed.month, parsed.day, format_index)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import sqlite3
+from typing import IO, Iterable, Iterator, List, Optional
+
+from .user_profile import UserProfile
+
+DEFAULT_EXPECTED_EMAILS = 10_000_000
+DEFAULT_ERROR_RATE = 0.01
+# New emails buffered before they are written to the on-disk set in one transaction.
+DEFAULT_FLUSH_SIZE = 10_000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte strings.
+
+    A negative answer is always right; a positive one is wrong with about
+    error_rate probability while at most capacity keys have been added.
+    Adding more keeps answers correct in that sense, only less selective.
+    """
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE, bits: bytearray | None = None):
+        """Create an empty filter sized for capacity keys.
+
+        Args:
+            capacity: Number of keys the filter is sized for
+            error_rate: False positive rate at capacity, between 0 and 1
+            bits: Bit array of a filter with the same sizing, to restore it
+
+        Raises:
+            ValueError: If capacity or error_rate is out of range, or bits has the wrong size
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        byte_count = (self.size + 7) // 8
+        if bits is not None and len(bits) != byte_count:
+            raise ValueError("bits do not match the filter size")
+        self.bits = bytearray(byte_count) if bits is None else bits
+
+    def _positions(self, key: bytes) -> List[int]:
+        # Double hashing: k positions from the two halves of one 128-bit digest.
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(first + number * second) % size for number in range(self.hash_count)]
+
+    def add(self, key: bytes) -> bool:
+        """Add key and return whether it may have been present already."""
+        bits = self.bits
+        present = True
+        for position in self._positions(key):
+            index = position >> 3
+            mask = 1 << (position & 7)
+            if not bits[index] & mask:
+                present = False
+                bits[index] |= mask
+        return present
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class DuplicateDetector:
+    """Remembers emails to recognize duplicates across files, processes and runs.
+
+    Without a path the emails are kept in an in-memory set. With a path
+    they are kept in an SQLite file behind a Bloom filter, which answers
+    "never seen" (the common case) without touching the disk; only
+    possible repeats are looked up in the file. New emails are written in
+    batches. The file and the filter are kept when the detector is closed,
+    so a later run (for example over the next shard) sees the emails of
+    earlier ones. A filter left behind by a crash is rebuilt from the file.
+
+    Attributes:
+        checked: Emails passed to add
+        duplicates: Emails that had been seen before
+        false_positives: Bloom filter hits that the file did not confirm
+    """
+    def __init__(self, path: str | None = None, casefold: bool = False,
+                 expected: int = DEFAULT_EXPECTED_EMAILS, error_rate: float = DEFAULT_ERROR_RATE,
+                 report: str | IO[str] | None = None, flush_size: int = DEFAULT_FLUSH_SIZE):
+        """Open a detector.
+
+        Args:
+            path: SQLite file holding the seen emails (None keeps them in memory)
+            casefold: Treat emails that differ only in letter case as the same
+            expected: Number of distinct emails the Bloom filter is sized for
+            error_rate: Bloom filter false positive rate at expected emails
+            report: Optional NDJSON file path or handle receiving each dropped duplicate profile
+            flush_size: New emails buffered before they are written to the file
+        """
+        self.casefold = casefold
+        self.checked = 0
+        self.duplicates = 0
+        self.false_positives = 0
+        self._flush_size = flush_size
+        self._pending: set = set()
+        self._memory: Optional[set] = set() if path is None else None
+        self._database = None
+        self._bloom = None
+        if path is not None:
+            self._database = sqlite3.connect(path, isolation_level=None)
+            self._database.executescript("""
+                CREATE TABLE IF NOT EXISTS emails (email TEXT PRIMARY KEY) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS bloom (
+                    id INTEGER PRIMARY KEY CHECK (id = 1), capacity INTEGER, error_rate REAL,
+                    dirty INTEGER, bits BLOB
+                );
+            """)
+            self._bloom = self._open_bloom(expected, error_rate)
+        if isinstance(report, str):
+            self._report = open(report, mode='w')
+            self._owns_report = True
+        else:
+            self._report = report
+            self._owns_report = False
+
+    def _open_bloom(self, expected: int, error_rate: float) -> BloomFilter:
+        """Restore the saved filter, or build one from the stored emails, and mark it in use."""
+        row = self._database.execute("SELECT capacity, error_rate, dirty, bits FROM bloom").fetchone()
+        if row is not None and not row[2]:
+            bloom = BloomFilter(row[0], row[1], bytearray(row[3]))
+        else:
+            bloom = BloomFilter(max(expected, self._stored_count()), error_rate)
+            for (email,) in self._database.execute("SELECT email FROM emails"):
+                bloom.add(email.encode("utf-8"))
+        # Until close saves it again, the stored filter misses the emails added meanwhile.
+        self._database.execute(
+            "INSERT OR REPLACE INTO bloom (id, capacity, error_rate, dirty, bits) VALUES (1, ?, ?, 1, NULL)",
+            (bloom.capacity, bloom.error_rate))
+        return bloom
+
+    def _stored_count(self) -> int:
+        return self._database.execute("SELECT count(*) FROM emails").fetchone()[0]
+
+    def key(self, email: str) -> str:
+        """Return the form of email that duplicates are detected on."""
+        return email.casefold() if self.casefold else email
+
+    def add(self, email: str) -> bool:
+        """Record email and return True if it had not been seen before."""
+        self.checked += 1
+        key = self.key(email)
+        if self._memory is not None:
+            if key in self._memory:
+                self.duplicates += 1
+                return False
+            self._memory.add(key)
+            return True
+        if self._bloom.add(key.encode("utf-8")):
+            if key in self._pending or self._database.execute(
+                    "SELECT 1 FROM emails WHERE email = ?", (key,)).fetchone():
+                self.duplicates += 1
+                return False
+            self.false_positives += 1
+        self._pending.add(key)
+        if len(self._pending) >= self._flush_size:
+            self._flush()
+        return True
+
+    def unique(self, profiles: Iterable[UserProfile]) -> Iterator[UserProfile]:
+        """Yield the profiles whose email was not seen before, reporting the others."""
+        for profile in profiles:
+            if self.add(profile.email):
+                yield profile
+            elif self._report is not None:
+                self._report.write(json.dumps(profile.to_dict()))
+                self._report.write("\n")
+
+    @property
+    def count(self) -> int:
+        """Number of distinct emails recorded, including those of earlier runs."""
+        if self._memory is not None:
+            return len(self._memory)
+        self._flush()
+        return self._stored_count()
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._database.execute("BEGIN")
+            self._database.executemany("INSERT OR IGNORE INTO emails (email) VALUES (?)",
+                                       ((key,) for key in self._pending))
+            self._database.execute("COMMIT")
+            self._pending = set()
+
+    def close(self) -> None:
+        """Write pending emails and the filter, and close the files."""
+        if self._database is not None:
+            self._flush()
+            self._database.execute("UPDATE bloom SET dirty = 0, bits = ?", (bytes(self._bloom.bits),))
+            self._database.close()
+            self._database = None
+        if self._report is not None:
+            if self._owns_report:
+                self._report.close()
+            else:
+                self._report.flush()
+            self._report = None
+
+    def __enter__(self) -> DuplicateDetector:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import Counter
+from contextlib import ExitStack
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from .user_profile import UserProfile
+
+CONFLICT_POLICIES = ("new", "old", "skip", "error")
+# Input bytes per partition the command line aims for; a partition's index
+# then takes a small fraction of that in memory.
+DEFAULT_PARTITION_BYTES = 256 * 2**20
+
+# (status, email, old profile JSON, new profile JSON)
+_Comparison = Tuple[str, str, Optional[str], Optional[str]]
+
+
+class MergeConflictError(ValueError):
+    """Raised by ProfileDiffer.merge with the "error" policy when a profile differs.
+
+    Attributes:
+        email: Email of the conflicting profile
+    """
+    def __init__(self, email: str):
+        super().__init__(f"Conflicting versions of the profile with email {email}")
+        self.email = email
+
+
+def canonical_json(profile: UserProfile) -> str:
+    """Return the JSON of profile.to_dict() without whitespace; its field order is fixed."""
+    return json.dumps(profile.to_dict(), separators=(",", ":"))
+
+
+def fingerprint(profile: UserProfile) -> str:
+    """Return a stable content hash of a profile.
+
+    Profiles with equal fields have equal fingerprints, and profiles that
+    differ in any field practically never do. The hash does not depend on
+    the process or platform, so fingerprints can be stored and compared
+    across runs.
+    """
+    return _digest(canonical_json(profile)).hex()
+
+
+def _digest(profile_json: str) -> bytes:
+    return hashlib.blake2b(profile_json.encode("utf-8"), digest_size=16).digest()
+
+
+def _partition(email: str, partitions: int) -> int:
+    digest = hashlib.blake2b(email.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % partitions
+
+
+def field_changes(old: dict, new: dict) -> List[dict]:
+    """List the fields that differ between two profile dictionaries.
+
+    Location parts are compared separately, as "location.city",
+    "location.state" and "location.country".
+
+    Returns:
+        {"field", "old", "new"} dictionaries in field order
+    """
+    changes = []
+    for field in ("name", "email", "password", "dob", "location"):
+        if field == "location":
+            old_location, new_location = old.get(field) or {}, new.get(field) or {}
+            for part in ("city", "state", "country"):
+                if old_location.get(part) != new_location.get(part):
+                    changes.append({"field": f"location.{part}", "old": old_location.get(part),
+                                    "new": new_location.get(part)})
+        elif old.get(field) != new.get(field):
+            changes.append({"field": field, "old": old.get(field), "new": new.get(field)})
+    return changes
+
+
+class ProfileDiffer:
+    """Compares two profile datasets by email in linear time and bounded memory.
+
+    Both inputs are streamed once into partition files, split by a hash of
+    the email. Each partition of the old input is then indexed by email
+    with only the fingerprint and file offset of each profile, and the
+    matching partition of the new input is streamed against it; full old
+    records are read back only for changed and removed profiles. Memory
+    therefore grows with the largest partition's emails, not with the
+    inputs. With one partition the new input is not spilled at all.
+
+    Within a partition, results follow the new input, then the removed
+    profiles follow in old input order. As with the loaders, the first
+    occurrence of a duplicate email in either input wins.
+
+    Attributes:
+        counts: Number of "added", "removed", "changed" and "unchanged"
+            profiles, and of merge "conflicts", of the last run
+    """
+    def __init__(self, partitions: int = 1, spill_dir: str | None = None):
+        """Initialize the differ.
+
+        Args:
+            partitions: Number of partitions each input is split into
+            spill_dir: Directory for partition files (defaults to the system temp dir)
+
+        Raises:
+            ValueError: If partitions is not positive
+        """
+        if partitions < 1:
+            raise ValueError("partitions must be positive")
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.counts: Counter = Counter()
+
+    def diff(self, old_profiles: Iterable[UserProfile], new_profiles: Iterable[UserProfile]) -> Iterator[dict]:
+        """Yield the differences between two datasets.
+
+        Args:
+            old_profiles: Profiles of the earlier dataset
+            new_profiles: Profiles of the later dataset
+
+        Yields:
+            {"status": "added", "email", "profile"},
+            {"status": "removed", "email", "profile"} and
+            {"status": "changed", "email", "changes"} records, where changes
+            is the list of field_changes
+        """
+        for status, email, old_json, new_json in self._compare(old_profiles, new_profiles):
+            if status == "added":
+                yield {"status": status, "email": email, "profile": json.loads(new_json)}
+            elif status == "removed":
+                yield {"status": status, "email": email, "profile": json.loads(old_json)}
+            elif status == "changed":
+                yield {"status": status, "email": email,
+                       "changes": field_changes(json.loads(old_json), json.loads(new_json))}
+
+    def merge(self, old_profiles: Iterable[UserProfile], new_profiles: Iterable[UserProfile],
+              on_conflict: str = "new", conflicts: IO[str] | None = None) -> Iterator[dict]:
+        """Yield the union of two datasets, resolving profiles that differ.
+
+        Args:
+            old_profiles: Profiles of the earlier dataset
+            new_profiles: Profiles of the later dataset
+            on_conflict: For an email whose profiles differ, keep the "new"
+                or the "old" one, "skip" both, or raise on the first ("error")
+            conflicts: Optional text file receiving each conflict as an
+                NDJSON "changed" record (see diff)
+
+        Yields:
+            Profile dictionaries, as produced by UserProfile.to_dict
+
+        Raises:
+            ValueError: If on_conflict is unknown
+            MergeConflictError: On a conflict with the "error" policy
+        """
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Unknown conflict policy: {on_conflict} (expected one of {', '.join(CONFLICT_POLICIES)})")
+        for status, email, old_json, new_json in self._compare(old_profiles, new_profiles):
+            if status == "changed":
+                self.counts["conflicts"] += 1
+                if conflicts is not None:
+                    record = {"status": status, "email": email,
+                              "changes": field_changes(json.loads(old_json), json.loads(new_json))}
+                    conflicts.write(json.dumps(record))
+                    conflicts.write("\n")
+                if on_conflict == "error":
+                    raise MergeConflictError(email)
+                if on_conflict == "skip":
+                    continue
+                yield json.loads(new_json if on_conflict == "new" else old_json)
+            else:
+                yield json.loads(old_json if status == "removed" else new_json)
+
+    def _compare(self, old_profiles: Iterable[UserProfile],
+                 new_profiles: Iterable[UserProfile]) -> Iterator[_Comparison]:
+        """Yield (status, email, old JSON, new JSON) for every email in either input."""
+        self.counts = Counter()
+        with tempfile.TemporaryDirectory(prefix="user-profiles-diff-", dir=self.spill_dir) as work_dir:
+            old_paths = self._spill(old_profiles, work_dir, "old")
+            if self.partitions == 1:
+                new_parts = [((profile.email, canonical_json(profile)) for profile in new_profiles)]
+            else:
+                new_parts = (_read_partition(path) for path in self._spill(new_profiles, work_dir, "new"))
+            for old_path, new_entries in zip(old_paths, new_parts):
+                yield from self._compare_partition(old_path, new_entries)
+
+    def _spill(self, profiles: Iterable[UserProfile], work_dir: str, side: str) -> List[str]:
+        """Write profiles to one partition file each and return the file paths."""
+        paths = [os.path.join(work_dir, f"{side}-{number:04d}.txt") for number in range(self.partitions)]
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(path, mode='w', encoding="utf-8")) for path in paths]
+            for profile in profiles:
+                partition = 0 if self.partitions == 1 else _partition(profile.email, self.partitions)
+                # Compact JSON never contains a raw tab or newline.
+                files[partition].write(f"{json.dumps(profile.email)}\t{canonical_json(profile)}\n")
+        return paths
+
+    def _compare_partition(self, old_path: str, new_entries: Iterable[Tuple[str, str]]) -> Iterator[_Comparison]:
+        """Stream one partition of the new input against the index of the old one."""
+        counts = self.counts
+        with open(old_path, mode='rb') as old_file:
+            # email -> (fingerprint, offset) of old profiles; None once the email was seen in the new input.
+            index = {}
+            offset = 0
+            for line in old_file:
+                email_json, _, profile_json = line.rstrip(b"\n").partition(b"\t")
+                email = json.loads(email_json)
+                if email not in index:
+                    index[email] = (_digest(profile_json.decode("utf-8")), offset)
+                offset += len(line)
+
+            def old_record(offset: int) -> str:
+                old_file.seek(offset)
+                return old_file.readline().rstrip(b"\n").partition(b"\t")[2].decode("utf-8")
+
+            for email, profile_json in new_entries:
+                if email not in index:
+                    index[email] = None
+                    counts["added"] += 1
+                    yield "added", email, None, profile_json
+                    continue
+                entry = index[email]
+                if entry is None:
+                    # A later occurrence of an email already compared.
+                    continue
+                index[email] = None
+                if entry[0] == _digest(profile_json):
+                    counts["unchanged"] += 1
+                    yield "unchanged", email, profile_json, profile_json
+                else:
+                    counts["changed"] += 1
+                    yield "changed", email, old_record(entry[1]), profile_json
+            for email, entry in index.items():
+                if entry is not None:
+                    counts["removed"] += 1
+                    yield "removed", email, old_record(entry[1]), None
+
+
+def _read_partition(path: str) -> Iterator[Tuple[str, str]]:
+    """Read the (email, profile JSON) entries of a partition file back in order."""
+    with open(path, mode='r', encoding="utf-8") as partition_file:
+        for line in partition_file:
+            email_json, _, profile_json = line.rstrip("\n").partition("\t")
+            yield json.loads(email_json), profile_json
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import tempfile
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from .dedup import DuplicateDetector
+from .sorting import SortKeys, composite_key, parse_sort_spec, sort_by_rows, sort_keys_for
+from .user_profile import UserProfile
+
+DEFAULT_MEMORY_BUDGET = 256 * 2**20
+DEFAULT_MERGE_FAN_IN = 64
+# Rough in-memory cost of one buffered record beyond its serialized text.
+_RECORD_OVERHEAD = 400
+
+_RunEntry = Tuple[SortKeys, int, str]
+
+
+def _write_run(entries: Iterable[_RunEntry], run_path: str) -> str:
+    """Write sorted entries to a run file.
+
+    Each line holds the JSON-encoded sort keys and sequence number, a tab,
+    and the profile's compact JSON (which cannot contain a raw tab).
+    """
+    with open(run_path, mode='w') as run_file:
+        for sort_keys, sequence, profile_json in entries:
+            run_file.write(json.dumps([*sort_keys, sequence]))
+            run_file.write("\t")
+            run_file.write(profile_json)
+            run_file.write("\n")
+    return run_path
+
+
+def _read_run(run_path: str) -> Iterator[_RunEntry]:
+    """Read the entries of a run file back in order."""
+    with open(run_path, mode='r') as run_file:
+        for line in run_file:
+            keys_json, _, profile_json = line.rstrip("\n").partition("\t")
+            *sort_keys, sequence = json.loads(keys_json)
+            yield SortKeys(*sort_keys), sequence, profile_json
+
+
+def _merge(runs: Sequence[Iterable[_RunEntry]], spec) -> Iterator[_RunEntry]:
+    """K-way merge sorted runs; ties are broken by input sequence number."""
+    key_function = composite_key(spec)
+    return heapq.merge(*runs, key=lambda entry: (key_function(entry[0]), entry[1]))
+
+
+class ExternalSorter:
+    """Sorts a stream of profiles that may not fit in memory.
+
+    Profiles are buffered until their estimated size reaches the memory
+    budget, then sorted and spilled to a run file in a temporary directory.
+    The runs are k-way merged (in several passes if there are more than
+    fan_in of them). Output order is exactly that of
+    UserProfileManager.sort_profiles for the same spec, including ties.
+    The emails seen, used to drop duplicates, are held in a set until the
+    first run is spilled and then in a DuplicateDetector file next to the
+    runs, so memory stays bounded by the budget on any input.
+    """
+    def __init__(self, spec: str | Sequence[str], memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 spill_dir: str | None = None, fan_in: int = DEFAULT_MERGE_FAN_IN):
+        """Initialize the sorter.
+
+        Args:
+            spec: Sort spec (see UserProfileManager.sort_profiles)
+            memory_budget: Approximate number of bytes of profiles to buffer per run
+            spill_dir: Directory for run files (defaults to the system temp dir)
+            fan_in: Maximum number of runs merged at once
+
+        Raises:
+            ValueError: If the spec is invalid or fan_in is below 2
+        """
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.spec = parse_sort_spec(spec)
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.fan_in = fan_in
+        self.run_count = 0
+
+    def _sorted_entries(self, entries: List[_RunEntry]) -> List[_RunEntry]:
+        return sort_by_rows(entries, [entry[0] for entry in entries], self.spec)
+
+    def sort(self, profiles: Iterable[UserProfile], dedup: DuplicateDetector | None = None) -> Iterator[str]:
+        """Sort profiles, dropping later duplicates of an email.
+
+        Args:
+            profiles: Validated profiles in input order
+            dedup: Optional DuplicateDetector keeping track of the seen
+                emails instead, e.g. to share them with other runs
+
+        Yields:
+            Compact JSON of each profile's to_dict(), in sorted order
+        """
+        with tempfile.TemporaryDirectory(prefix="user-profiles-sort-", dir=self.spill_dir) as run_dir:
+            run_paths = []
+            buffer: List[_RunEntry] = []
+            buffered_bytes = 0
+            seen_emails = set()
+            spilled_emails = None
+            if dedup is not None:
+                profiles = dedup.unique(profiles)
+            try:
+                for sequence, profile in enumerate(profiles):
+                    if spilled_emails is not None:
+                        if not spilled_emails.add(profile.email):
+                            continue
+                    elif dedup is None:
+                        if profile.email in seen_emails:
+                            continue
+                        seen_emails.add(profile.email)
+                    profile_json = json.dumps(profile.to_dict())
+                    buffer.append((sort_keys_for(profile), sequence, profile_json))
+                    buffered_bytes += len(profile_json) + _RECORD_OVERHEAD
+                    if buffered_bytes >= self.memory_budget:
+                        run_paths.append(self._spill(self._sorted_entries(buffer), run_dir))
+                        buffer = []
+                        buffered_bytes = 0
+                        if dedup is None and spilled_emails is None:
+                            # The input does not fit in memory, so its emails may not either.
+                            spilled_emails = DuplicateDetector(os.path.join(run_dir, "emails.db"))
+                            for email in seen_emails:
+                                spilled_emails.add(email)
+                            seen_emails = set()
+            finally:
+                if spilled_emails is not None:
+                    spilled_emails.close()
+
+            if not run_paths:
+                for _, _, profile_json in self._sorted_entries(buffer):
+                    yield profile_json
+                return
+            if buffer:
+                run_paths.append(self._spill(self._sorted_entries(buffer), run_dir))
+                buffer = []
+            while len(run_paths) > self.fan_in:
+                run_paths = [
+                    self._spill(_merge([_read_run(path) for path in group], self.spec), run_dir, consumed=group)
+                    for group in (run_paths[start:start + self.fan_in]
+                                  for start in range(0, len(run_paths), self.fan_in))
+                ]
+            for _, _, profile_json in _merge([_read_run(path) for path in run_paths], self.spec):
+                yield profile_json
+
+    def _spill(self, entries: Iterable[_RunEntry], run_dir: str, consumed: Sequence[str] = ()) -> str:
+        """Write entries to a new run file, deleting the runs they were merged from."""
+        run_path = _write_run(entries, os.path.join(run_dir, f"run-{self.run_count:06d}.txt"))
+        self.run_count += 1
+        for path in consumed:
+            os.remove(path)
+        return run_path
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .sorting import SortKeys
+from .user_profile import age_on
+
+_EmailSet = Dict[str, None]
+
+
+class ProfileIndexes:
+    """Secondary indexes over the sort keys of a set of profiles.
+
+    Maintains a country -> state -> city tree of email sets, and two sorted
+    lists of (key, email) pairs: one by date-of-birth ordinal and one by
+    casefolded name. All indexes are updated incrementally by add/remove.
+    Each profile also gets an insertion number, so that matches can be
+    returned in insertion order whichever index they were read from.
+    """
+    def __init__(self, rows: Iterable[SortKeys] = ()):
+        """Build the indexes.
+
+        Args:
+            rows: SortKeys of the profiles to index
+        """
+        self._by_location: Dict[str, Dict[str, Dict[str, _EmailSet]]] = {}
+        self._by_dob: List[Tuple[int, str]] = []
+        self._by_name: List[Tuple[str, str]] = []
+        self._sequence: Dict[str, int] = {}
+        for row in rows:
+            self._sequence[row.email] = len(self._sequence)
+            self._add_location(row)
+            self._by_dob.append((row.dob, row.email))
+            self._by_name.append((row.name, row.email))
+        self._by_dob.sort()
+        self._by_name.sort()
+        self._next_sequence = len(self._sequence)
+
+    def __len__(self) -> int:
+        return len(self._by_dob)
+
+    def _add_location(self, row: SortKeys) -> None:
+        states = self._by_location.setdefault(row.country, {})
+        cities = states.setdefault(row.state, {})
+        cities.setdefault(row.city, {})[row.email] = None
+
+    def add(self, row: SortKeys) -> None:
+        """Index one profile, after every profile already indexed."""
+        self._sequence[row.email] = self._next_sequence
+        self._next_sequence += 1
+        self._add_location(row)
+        insort(self._by_dob, (row.dob, row.email))
+        insort(self._by_name, (row.name, row.email))
+
+    def remove(self, row: SortKeys) -> None:
+        """Remove one indexed profile, pruning empty location buckets."""
+        del self._sequence[row.email]
+        states = self._by_location[row.country]
+        cities = states[row.state]
+        emails = cities[row.city]
+        del emails[row.email]
+        if not emails:
+            del cities[row.city]
+            if not cities:
+                del states[row.state]
+                if not states:
+                    del self._by_location[row.country]
+        for sorted_pairs, key in ((self._by_dob, row.dob), (self._by_name, row.name)):
+            del sorted_pairs[bisect_left(sorted_pairs, (key, row.email))]
+
+    def location_buckets(self, country: str | None = None, state: str | None = None,
+                         city: str | None = None) -> List[_EmailSet]:
+        """Return the email sets of every city matching the given location parts."""
+        buckets = []
+        countries = self._by_location if country is None else {country: self._by_location.get(country, {})}
+        for states in countries.values():
+            state_items = states if state is None else {state: states.get(state, {})}
+            for cities in state_items.values():
+                if city is None:
+                    buckets.extend(cities.values())
+                elif city in cities:
+                    buckets.append(cities[city])
+        return buckets
+
+    def dob_range(self, first: int | None = None, last: int | None = None) -> Tuple[int, int]:
+        """Return the slice bounds of the DOB index for ordinals in [first, last]."""
+        lo = 0 if first is None else bisect_left(self._by_dob, (first, ""))
+        hi = len(self._by_dob) if last is None else bisect_left(self._by_dob, (last + 1, ""))
+        return lo, max(lo, hi)
+
+    def age_range(self, min_age: int | None, max_age: int | None, reference_date: date) -> Tuple[int, int]:
+        """Return the slice bounds of the DOB index for ages in [min_age, max_age].
+
+        Age never increases with the date of birth, so the matching
+        profiles form one contiguous run of the DOB index.
+        """
+        def negative_age(pair: Tuple[int, str]) -> int:
+            return -age_on(date.fromordinal(pair[0]), reference_date)
+        lo = 0 if max_age is None else bisect_left(self._by_dob, -max_age, key=negative_age)
+        hi = len(self._by_dob) if min_age is None else bisect_right(self._by_dob, -min_age, key=negative_age)
+        return lo, max(lo, hi)
+
+    def name_range(self, prefix: str) -> Tuple[int, int]:
+        """Return the slice bounds of the name index for names starting with prefix."""
+        prefix = prefix.casefold()
+        lo = bisect_left(self._by_name, (prefix, ""))
+        hi = bisect_left(self._by_name, (prefix + "\U0010ffff", ""))
+        return lo, hi
+
+    def select(self, rows: Dict[str, SortKeys], country: str | None = None, state: str | None = None,
+               city: str | None = None, dob_range: Tuple[int | None, int | None] | None = None,
+               age_range: Tuple[int | None, int | None, date] | None = None,
+               name_prefix: str | None = None) -> List[str]:
+        """Return the emails of profiles matching every given criterion.
+
+        The criterion with the fewest candidates is read from its index and
+        the other criteria are checked against each candidate's sort keys,
+        so the cost is proportional to that smallest candidate set.
+
+        Args:
+            rows: SortKeys of every indexed profile, by email
+            country, state, city: Exact location parts
+            dob_range: Inclusive (first, last) DOB ordinals, either may be None
+            age_range: Inclusive (min_age, max_age, reference_date)
+            name_prefix: Case-insensitive name prefix
+
+        Returns:
+            Matching emails, in insertion order
+        """
+        candidates: List[Tuple[int, Callable[[], Iterable[str]]]] = []
+        predicates: List[Callable[[SortKeys], bool]] = []
+
+        if country is not None or state is not None or city is not None:
+            buckets = self.location_buckets(country, state, city)
+            candidates.append((sum(map(len, buckets)), lambda: (email for bucket in buckets for email in bucket)))
+            predicates.append(lambda row: ((country is None or row.country == country)
+                                           and (state is None or row.state == state)
+                                           and (city is None or row.city == city)))
+        for bounds in (self.dob_range(*dob_range) if dob_range else None,
+                       self.age_range(*age_range) if age_range else None):
+            if bounds is None:
+                continue
+            lo, hi = bounds
+            first_dob = self._by_dob[lo][0] if lo < hi else 0
+            last_dob = self._by_dob[hi - 1][0] if lo < hi else -1
+            candidates.append((hi - lo, lambda lo=lo, hi=hi: (email for _, email in self._by_dob[lo:hi])))
+            predicates.append(lambda row, first=first_dob, last=last_dob: first <= row.dob <= last)
+        if name_prefix is not None:
+            lo, hi = self.name_range(name_prefix)
+            folded_prefix = name_prefix.casefold()
+            candidates.append((hi - lo, lambda: (email for _, email in self._by_name[lo:hi])))
+            predicates.append(lambda row: row.name.startswith(folded_prefix))
+
+        if not candidates:
+            return list(rows)
+        driver = min(range(len(candidates)), key=lambda position: candidates[position][0])
+        checks = predicates[:driver] + predicates[driver + 1:]
+        matches = [email for email in candidates[driver][1]()
+                   if all(check(rows[email]) for check in checks)]
+        # Sorting by insertion number makes ties break as in sort_profiles.
+        matches.sort(key=self._sequence.__getitem__)
+        return matches
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .location import Location
+from .parallel import ProfileRow, validate_chunk
+from .snapshot import Snapshot, SnapshotStore, is_snapshot
+from .streaming import DEFAULT_BATCH_SIZE, iter_batches, iter_profile_items
+from .user_profile import UserProfile
+from .validation import RecordReport, RejectWriter
+
+# File name suffixes picked up when a directory is given as input.
+INPUT_SUFFIXES = (".json", ".ndjson", ".jsonl", ".snap")
+_GLOB_CHARACTERS = "*?["
+
+
+@dataclass
+class FileReport:
+    """Outcome of reading one input file.
+
+    Attributes:
+        path: Input file path
+        records: Number of records read
+        accepted: Number of records that passed validation
+        rejected: Number of records that failed validation
+        seconds: Time spent reading and validating the file
+        error: Why the file could not be read to the end (None if it was
+            read); the records counted before the error are still loaded
+    """
+    path: str
+    records: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def partial(self) -> bool:
+        """True if the file failed after some of its records were read."""
+        return self.error is not None and self.records > 0
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "records": self.records,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "seconds": self.seconds,
+            "error": self.error,
+            "partial": self.partial,
+        }
+
+    def __str__(self) -> str:
+        if self.partial:
+            return (f"{self.path}: PARTIAL: {self.records} records, {self.accepted} accepted, "
+                    f"{self.rejected} rejected before ERROR: {self.error}")
+        if self.error is not None:
+            return f"{self.path}: ERROR: {self.error}"
+        return (f"{self.path}: {self.records} records, {self.accepted} accepted, "
+                f"{self.rejected} rejected in {self.seconds:.3f}s")
+
+
+def expand_inputs(paths: Iterable[str]) -> List[str]:
+    """Expand input paths, glob patterns and directories into a list of files.
+
+    Paths keep the order they are given in. Glob matches (with ** for any
+    depth) and the files found below a directory (those ending in one of
+    INPUT_SUFFIXES) are sorted by path. A file that appears more than once
+    is only read the first time. The order is therefore deterministic,
+    and it decides which record wins when an email occurs twice.
+
+    Args:
+        paths: Paths, patterns and directories
+
+    Returns:
+        File paths in reading order
+
+    Raises:
+        ValueError: If a pattern or directory yields no files, or a path does not exist
+    """
+    files = []
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            matches = sorted(
+                os.path.join(directory, name)
+                for directory, _, names in os.walk(path)
+                for name in names if name.endswith(INPUT_SUFFIXES)
+            )
+        elif any(character in path for character in _GLOB_CHARACTERS):
+            matches = sorted(match for match in glob.glob(path, recursive=True) if os.path.isfile(match))
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            raise ValueError(f"Input file not found: {path}")
+        if not matches:
+            raise ValueError(f"No input files match: {path}")
+        for match in matches:
+            key = os.path.realpath(match)
+            if key not in seen:
+                seen.add(key)
+                files.append(match)
+    return files
+
+
+def _read_batches(path: str, input_format: str, batch_size: int, hashed_input: bool,
+                  report: FileReport) -> Iterator[Tuple[List[ProfileRow], List[RecordReport]]]:
+    """Yield (accepted, rejected) for each batch of one input file, counting into report.
+
+    Snapshots are accepted too; their profiles were validated when they
+    were written. If the file cannot be read to the end, report.error is
+    set and the batches yielded before the error stand (see
+    FileReport.partial). report.seconds leaves out the time spent by the
+    consumer between batches.
+    """
+    start = time.perf_counter()
+    try:
+        if is_snapshot(path):
+            with Snapshot(path) as snapshot:
+                rows = ((profile.name, profile.email, profile.password, profile.dob,
+                         profile.location.city, profile.location.state, profile.location.country)
+                        for profile in SnapshotStore(snapshot).values())
+                for accepted in iter_batches(rows, batch_size):
+                    report.records += len(accepted)
+                    report.accepted += len(accepted)
+                    report.seconds += time.perf_counter() - start
+                    yield accepted, []
+                    start = time.perf_counter()
+        else:
+            for batch in iter_batches(iter_profile_items(path, input_format), batch_size):
+                record_count, accepted, rejected = validate_chunk(batch, hashed_input)
+                for record_report in rejected:
+                    record_report.index += report.records
+                    record_report.source = path
+                report.records += record_count
+                report.accepted += len(accepted)
+                report.rejected += len(rejected)
+                report.seconds += time.perf_counter() - start
+                yield accepted, rejected
+                start = time.perf_counter()
+    except (ValueError, OSError) as e:
+        # InputFormatError, malformed JSON or an unreadable snapshot.
+        report.error = str(e)
+    report.seconds += time.perf_counter() - start
+
+
+def read_file(path: str, input_format: str = "auto", batch_size: int = DEFAULT_BATCH_SIZE,
+              hashed_input: bool = False) -> Tuple[FileReport, List[ProfileRow], List[RecordReport]]:
+    """Read and validate one whole input file (runs in a worker process).
+
+    The file is parsed incrementally, but the field tuples of its valid
+    records are collected to be sent back at once, so the worker holds one
+    file's valid records. Records before a parse error are kept, and the
+    report marks the file as partial.
+
+    Args:
+        path: Input file path (JSON, NDJSON or snapshot)
+        input_format: One of INPUT_FORMATS
+        batch_size: Number of records validated together
+        hashed_input: Accept passwords that are already hashed
+
+    Returns:
+        (report, accepted, rejected): the FileReport, the field tuples of valid
+        records in file order, and the reports of invalid ones
+    """
+    report = FileReport(path)
+    accepted: List[ProfileRow] = []
+    rejected: List[RecordReport] = []
+    for batch_accepted, batch_rejected in _read_batches(path, input_format, batch_size, hashed_input, report):
+        accepted.extend(batch_accepted)
+        rejected.extend(batch_rejected)
+    return report, accepted, rejected
+
+
+def iter_files_profiles(json_files: List[str], input_format: str = "auto", batch_size: int = DEFAULT_BATCH_SIZE,
+                        workers: int = 1, rejects: RejectWriter | None = None,
+                        file_reports: List[FileReport] | None = None,
+                        hashed_input: bool = False) -> Iterator[UserProfile]:
+    """Stream validated profiles from several files, reading them concurrently.
+
+    With workers == 1 the files are streamed one batch at a time, so
+    memory stays bounded by batch_size. With workers > 1, whole files are
+    read and validated in a pool of worker processes, at most 2 * workers
+    at a time, and each file's valid records come back together. Results
+    are consumed in file order whatever order the workers finish in, so
+    the profiles come out exactly as if the files had been concatenated.
+    A file that fails part way is reported as partial; the profiles read
+    before the error are still yielded.
+
+    Args:
+        json_files: Input files in reading order (see expand_inputs)
+        input_format: One of INPUT_FORMATS, applied to every file
+        batch_size: Number of records validated together
+        workers: Number of worker processes (1 reads the files in this process)
+        rejects: Optional sink for rejected records
+        file_reports: Optional list that receives one FileReport per file, in file order
+        hashed_input: Accept passwords that are already hashed
+
+    Yields:
+        Validated UserProfile objects
+    """
+    if workers < 1:
+        raise ValueError("workers must be positive")
+    if workers == 1:
+        for path in json_files:
+            report = FileReport(path)
+            for accepted, rejected in _read_batches(path, input_format, batch_size, hashed_input, report):
+                yield from _emit(accepted, rejected, rejects)
+            if file_reports is not None:
+                file_reports.append(report)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def results():
+            for path in json_files:
+                pending.append(executor.submit(read_file, path, input_format, batch_size, hashed_input))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+        for report, accepted, rejected in results():
+            if file_reports is not None:
+                file_reports.append(report)
+            yield from _emit(accepted, rejected, rejects)
+
+
+def _emit(accepted: List[ProfileRow], rejected: List[RecordReport],
+          rejects: RejectWriter | None) -> Iterator[UserProfile]:
+    if rejects is not None:
+        for record_report in rejected:
+            rejects.write(record_report)
+    for name, email, password, dob, city, state, country in accepted:
+        yield UserProfile(name=name, email=email, password=password, dob=dob,
+                          location=Location(city, state, country))
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Iterator, Tuple
+
+from .location import Location
+from .user_profile import UserProfile
+
+# Records written between two fsync calls.
+DEFAULT_SYNC_EVERY = 64
+# Journal records after which UserProfileManager compacts automatically.
+DEFAULT_COMPACT_EVERY = 100_000
+
+ADD = "+"
+REMOVE = "-"
+
+
+class JournalError(ValueError):
+    """Raised when a journal contains a record that cannot be replayed."""
+
+
+def encode_add(profile: UserProfile) -> str:
+    """Return the journal line recording that profile was added."""
+    location = profile.location
+    return json.dumps([ADD, profile.name, profile.email, profile.password, profile.dob,
+                       location.city, location.state, location.country], separators=(",", ":")) + "\n"
+
+
+def encode_remove(email: str) -> str:
+    """Return the journal line recording that email was removed."""
+    return json.dumps([REMOVE, email], separators=(",", ":")) + "\n"
+
+
+def replay(path: str) -> Iterator[Tuple[str, UserProfile | str]]:
+    """Read the records of a journal file.
+
+    A last line without its newline is what a crash in the middle of an
+    append leaves behind; it is ignored and cut off the file so that new
+    records start on a fresh line. A missing file has no records.
+
+    Args:
+        path: Journal file path
+
+    Yields:
+        (ADD, UserProfile) and (REMOVE, email) tuples in the order they were written
+
+    Raises:
+        JournalError: If a complete line is not a valid record
+    """
+    try:
+        journal_file = open(path, mode='rb')
+    except FileNotFoundError:
+        return
+    with journal_file:
+        good_length = 0
+        for line_number, line in enumerate(journal_file, start=1):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+                if record[0] == ADD and len(record) == 8:
+                    name, email, password, dob, city, state, country = record[1:]
+                    yield ADD, UserProfile(name=name, email=email, password=password, dob=dob,
+                                           location=Location(city, state, country))
+                elif record[0] == REMOVE and len(record) == 2:
+                    yield REMOVE, record[1]
+                else:
+                    raise ValueError("unknown record")
+            except (ValueError, TypeError, IndexError) as e:
+                raise JournalError(f"{path}:{line_number}: invalid journal record ({e})")
+            good_length += len(line)
+    if os.path.getsize(path) != good_length:
+        with open(path, mode='r+b') as journal_file:
+            journal_file.truncate(good_length)
+
+
+class ProfileJournal:
+    """Append-only log of profile additions and removals.
+
+    Each change is one compact JSON line. Lines are flushed and fsynced in
+    groups of sync_every records (and by sync and close), so a crash loses
+    at most the last group, never earlier records.
+    """
+    def __init__(self, path: str, sync_every: int = DEFAULT_SYNC_EVERY):
+        """Open a journal for appending, creating it if needed.
+
+        Args:
+            path: Journal file path
+            sync_every: Number of records per fsync
+
+        Raises:
+            ValueError: If sync_every is below 1
+        """
+        if sync_every < 1:
+            raise ValueError("sync_every must be at least 1")
+        self.path = path
+        self.sync_every = sync_every
+        self.count = 0
+        self._unsynced = 0
+        self._file = open(path, mode='a', encoding='utf-8')
+
+    def _append(self, line: str) -> None:
+        self._file.write(line)
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def append_add(self, profile: UserProfile) -> None:
+        """Record that profile was added."""
+        self._append(encode_add(profile))
+
+    def append_remove(self, email: str) -> None:
+        """Record that the profile with email was removed."""
+        self._append(encode_remove(email))
+
+    def sync(self) -> None:
+        """Flush buffered records and fsync them to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def rotate(self, rotated_path: str) -> None:
+        """Move the records written so far to rotated_path and continue in an empty journal."""
+        self.sync()
+        self._file.close()
+        os.replace(self.path, rotated_path)
+        self._file = open(self.path, mode='a', encoding='utf-8')
+        self.count = 0
+
+    def close(self) -> None:
+        """Sync and close the journal."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
@@ -1,34 +1,89 @@
-import re
+import sys
+
+from .validation import valid_location_fields
+
+# Most distinct locations kept in the intern pool; later ones are still
+# created, just not shared, so hostile inputs cannot grow it without bound.
+MAX_POOL_SIZE = 1 << 17
 
 
 class Location:
     """Represents a geographic location with city, state, and country.
-    
+
     Validates location format: "City, ST, CC" where:
     - City: alphabetic characters
     - ST: 2-letter uppercase state code
     - CC: 2-letter uppercase country code
+
+    Locations are immutable, hashable values compared by their fields.
+    Instances are interned: creating a location that already exists
+    returns the shared instance, so millions of profiles from a few
+    thousand places hold a few thousand Location objects, and
+    valid_location runs once per distinct location.
     """
-    def __init__(self, city: str, state: str, country: str):
-        """Initialize a Location instance.
-        
+    __slots__ = ("city", "state", "country", "_valid")
+
+    _pool: dict = {}
+
+    def __new__(cls, city: str, state: str, country: str) -> "Location":
+        """Return the Location with these fields, creating it if needed.
+
         Args:
             city: City name (alphabetic)
             state: 2-letter uppercase state code
             country: 2-letter uppercase country code
         """
-        self.city = city
-        self.state = state
-        self.country = country
-        
+        key = (city, state, country)
+        try:
+            location = cls._pool.get(key)
+        except TypeError:
+            # Unhashable field values (from malformed input) are never shared.
+            location = key = None
+        if location is None:
+            location = object.__new__(cls)
+            if key is not None:
+                city, state, country = (sys.intern(value) if type(value) is str else value for value in key)
+            object.__setattr__(location, "city", city)
+            object.__setattr__(location, "state", state)
+            object.__setattr__(location, "country", country)
+            object.__setattr__(location, "_valid", None)
+            if key is not None and len(cls._pool) < MAX_POOL_SIZE:
+                cls._pool[key] = location
+        return location
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f"Location is immutable; cannot set {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Location is immutable; cannot delete {name}")
+
+    def __reduce__(self):
+        return Location, (self.city, self.state, self.country)
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Location):
+            return NotImplemented
+        return (self.city, self.state, self.country) == (other.city, other.state, other.country)
+
+    def __hash__(self) -> int:
+        return hash((self.city, self.state, self.country))
+
+    def __repr__(self) -> str:
+        return f"Location({self.city!r}, {self.state!r}, {self.country!r})"
+
     def valid_location(self) -> bool:
         """Validate location format matches expected pattern.
-        
-        Format must be: "City, ST, CC" (e.g., "LosAngeles, CA, US")
-        
+
+        Format must be: "City, ST, CC" (e.g., "LosAngeles, CA, US").
+        The result is computed once and cached on the instance.
+
         Returns:
             True if location format is valid, False otherwise
         """
-        pattern = r"^(?P<city>[a-zA-Z]+), (?P<state>[A-Z]{2}), (?P<country>[A-Z]{2})$"
-        location_string = f"{self.city}, {self.state}, {self.country}"
-        return re.match(pattern, location_string) is not None
\ No newline at end of file
+        valid = self._valid
+        if valid is None:
+            valid = valid_location_fields(self.city, self.state, self.country)
+            object.__setattr__(self, "_valid", valid)
+        return valid
@@ -1,57 +1,574 @@
 import argparse
+import asyncio
 import json
+import math
+import os
 import sys
+from contextlib import nullcontext
+from datetime import date
+from itertools import chain, islice
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from .user_manager import UserProfileManager
+from .dedup import DEFAULT_EXPECTED_EMAILS, DuplicateDetector
+from .diff import CONFLICT_POLICIES, DEFAULT_PARTITION_BYTES, MergeConflictError, ProfileDiffer
+from .external_sort import DEFAULT_MEMORY_BUDGET, ExternalSorter
+from .ingest import FileReport, expand_inputs, iter_files_profiles
+from .parallel import iter_profiles_parallel
+from .passwords import DEFAULT_COSTS, HASH_ALGORITHMS, PasswordHasher
+from .result_cache import CACHE_KEY_MODES, DEFAULT_CACHE_SIZE, ResultCache, default_cache_dir, result_key
+from .server import OPERATIONS, ProfileServer, send_request
+from .snapshot import SnapshotError, is_snapshot
+from .sorting import SORT_FIELDS, parse_sort_spec, select_top
+from .stats import PipelineStats, StatsRejectSink
+from .streaming import INPUT_FORMATS, InputFormatError, iter_profiles
+from .user_manager import STORAGE_ENGINES, UserProfileManager
+from .user_profile import UserProfile
+from .validation import DEFAULT_VALIDATOR, HASHED_INPUT_VALIDATOR, RejectWriter
+from .writer import DEFAULT_PARTITION_WRITERS, OUTPUT_FORMATS, PartitionedWriter, write_items
 
 
-def _sort_profiles(manager: UserProfileManager, key: str):
-    """Sort profiles by the specified key.
+def _sort_spec(value: str) -> str:
+    """Argparse type for --sort: check that the spec only names known keys."""
+    try:
+        parse_sort_spec(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def _parse_range(value: str, convert):
+    """Split "lo..hi", "lo..", "..hi" or a single value into converted bounds."""
+    if ".." in value:
+        low, high = value.split("..", 1)
+    else:
+        low = high = value
+    return (convert(low) if low else None, convert(high) if high else None)
+
+
+def _parse_where(terms: List[str]) -> dict:
+    """Turn --where terms into UserProfileManager.query keyword arguments.
+    
+    Each term is a comma-separated list of key=value filters:
+    country, state and city match exactly, name matches a prefix,
+    age takes an inclusive range like 30..40 and dob a range of dates
+    like 1990-01-01..1999-12-31. Either end of a range may be omitted.
+    
+    Args:
+        terms: Values of the --where option
+        
+    Returns:
+        Dictionary of query keyword arguments
+        
+    Raises:
+        ValueError: If a filter is malformed or names an unknown key
+    """
+    criteria = {}
+    for term in terms:
+        for condition in term.split(","):
+            key, separator, value = condition.partition("=")
+            key = key.strip()
+            value = value.strip()
+            if not separator or not value:
+                raise ValueError(f"Filter must look like key=value: {condition!r}")
+            if key in ("country", "state", "city"):
+                criteria[key] = value
+            elif key == "name":
+                criteria["name_prefix"] = value
+            elif key == "age":
+                criteria["min_age"], criteria["max_age"] = _parse_range(value, int)
+            elif key == "dob":
+                criteria["dob_from"], criteria["dob_to"] = _parse_range(value, str)
+            else:
+                raise ValueError(f"Unknown filter key: {key}")
+    return criteria
+
+
+def _sort_profiles(manager: UserProfileManager, spec: str, limit: Optional[int] = None, offset: int = 0):
+    """Sort profiles by the specified sort spec.
     
     Args:
         manager: UserProfileManager instance
-        key: Sort key ("age", "name", "email", or "location")
+        spec: Sort spec such as "age" or "country,-age,name"
+        limit: Optional maximum number of profiles to return
+        offset: Number of leading sorted profiles to skip
         
     Returns:
         List of sorted UserProfile objects
         
     Raises:
-        SystemExit: If sort key is invalid
+        SystemExit: If the spec names an unknown key
     """
-    if key == "age":
-        return manager.sort_profiles_by_age()
-    elif key == "name":
-        return manager.sort_profiles_by_name()
-    elif key == "email":
-        return manager.sort_profiles_by_email()
-    elif key == "location":
-        return manager.sort_profiles_by_location()
-    else:
-        raise SystemExit(f"Unknown sort key: {key}")
+    try:
+        return manager.sort_profiles(spec, limit=limit, offset=offset)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+
+def _open_output(output_path: Optional[str]):
+    """Return a context manager giving the output file, or stdout without a path."""
+    return Path(output_path).open(mode="w") if output_path else nullcontext(sys.stdout)
 
 
-def _write_output(obj, output_path: Optional[str]):
-    """Write output to file or stdout.
+def _write_output(items: Iterable[dict], output_path: Optional[str], output_format: str = "json",
+                  compact: bool = False, cache: Optional[ResultCache] = None, cache_key: Optional[str] = None):
+    """Write profile dictionaries as a JSON array or NDJSON to file or stdout.
+    
+    Items are serialized one at a time and written in large blocks, so a
+    generator is never materialized.
     
     Args:
-        obj: Object to serialize as JSON
+        items: Dictionaries to serialize
         output_path: Optional path to output file (None = stdout)
+        output_format: "json" for an array or "ndjson" for one profile per line
+        compact: Write a JSON array without indentation
+        cache: Optional result cache also recording the output
+        cache_key: Key of the recorded output in cache
+    """
+    indent = None if compact else 4
+    with _open_output(output_path) as handle:
+        with cache.record(cache_key, handle) if cache is not None else nullcontext(handle) as target:
+            write_items(items, target, output_format, indent=indent)
+        if not output_path and output_format == "json":
+            handle.write('\n')
+
+
+def _replay_output(args: argparse.Namespace) -> bool:
+    """Copy the cached output of an earlier identical run to the output, if there is one.
+    
+    Returns:
+        True on a cache hit, False if the run has to be done
+    """
+    entry = args.cache.open(args.cache_key)
+    if entry is None:
+        return False
+    with entry, _open_output(args.output) as handle:
+        copied = args.cache.replay(entry, handle)
+        if not args.output and args.output_format == "json":
+            handle.write('\n')
+    print(f"cache: reused {copied} bytes of output from {args.cache.directory}", file=sys.stderr)
+    return True
+
+
+def _partition_fields(value: str) -> tuple:
+    """Argparse type for --partition-by: country or country,state."""
+    fields = tuple(field.strip() for field in value.split(","))
+    if fields not in (("country",), ("country", "state")):
+        raise argparse.ArgumentTypeError("must be country or country,state")
+    return fields
+
+
+def _write_profiles(args: argparse.Namespace, items: Iterable[dict]) -> None:
+    """Write the selected profiles to the output, or with --partition-by to one file per partition."""
+    if args.partition_by is None:
+        _write_output(items, args.output, args.output_format, args.compact, args.cache, args.cache_key)
+        return
+    with PartitionedWriter(args.output, args.partition_by, args.output_format, None if args.compact else 4,
+                           writers=args.writers) as writer:
+        writer.write_all(items)
+    counts = writer.close()
+    print(f"partitions: {len(counts)} files, {sum(counts.values())} profiles written to {args.output}",
+          file=sys.stderr)
+
+
+def _stage(args: argparse.Namespace, name: str):
+    """Return a context manager timing stage name when --stats or --profile is given."""
+    return nullcontext() if args.stats is None else args.stats.stage(name)
+
+
+def _iter_input_profiles(args: argparse.Namespace, rejects: Optional[RejectWriter]) -> Iterator[UserProfile]:
+    """Stream validated profiles from the input without storing them.
+    
+    Mirrors UserProfileManager.load_profiles_from_json: an input of the
+    wrong shape is reported and treated as empty. Several input files are
+    read as UserProfileManager.load_profiles_from_files reads them, with
+    their reports appended to args.file_reports. Passwords are left as
+    they are; see _hash_output for --hash-passwords.
+    """
+    if args.stats is not None:
+        rejects = StatsRejectSink(args.stats, rejects)
+        yield from args.stats.counted("accepted", _read_input_profiles(args, rejects))
+    else:
+        yield from _read_input_profiles(args, rejects)
+
+
+def _hash_output(args: argparse.Namespace, profiles: Iterable[UserProfile]) -> Iterable[UserProfile]:
+    """Hash the passwords of the profiles being written with --hash-passwords.
+
+    The streaming paths hash only what they output, after duplicates were
+    dropped and the page was selected, so no other profile pays for a hash.
+    """
+    if args.hasher is None:
+        return profiles
+    return args.hasher.hash_profiles(profiles, args.stats)
+
+
+def _read_input_profiles(args: argparse.Namespace, rejects) -> Iterator[UserProfile]:
+    """Yield the validated profiles of the input files (see _iter_input_profiles)."""
+    if len(args.input_files) > 1:
+        yield from iter_files_profiles(args.input_files, args.input_format, workers=args.workers,
+                                       rejects=rejects, file_reports=args.file_reports,
+                                       hashed_input=args.hashed_input)
+        return
+    try:
+        if args.workers > 1:
+            yield from iter_profiles_parallel(args.input, args.input_format, workers=args.workers, rejects=rejects,
+                                              hashed_input=args.hashed_input)
+        else:
+            validator = HASHED_INPUT_VALIDATOR if args.hashed_input else DEFAULT_VALIDATOR
+            yield from iter_profiles(args.input, args.input_format, validator=validator, rejects=rejects,
+                                     stats=args.stats)
+    except InputFormatError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+
+
+def _print_file_reports(file_reports: List[FileReport]) -> None:
+    """Print one line per input file and a total line to stderr."""
+    for report in file_reports:
+        print(report, file=sys.stderr)
+    records = sum(report.records for report in file_reports)
+    accepted = sum(report.accepted for report in file_reports)
+    seconds = sum(report.seconds for report in file_reports)
+    print(f"total: {len(file_reports)} files, {records} records, {accepted} accepted, "
+          f"{records - accepted} rejected in {seconds:.3f}s", file=sys.stderr)
+
+
+def _external_sort(args: argparse.Namespace, rejects: Optional[RejectWriter]) -> None:
+    """Sort the input through on-disk runs and stream the merge to the output.
+    
+    Raises:
+        SystemExit: If no valid profiles are loaded
+    """
+    sorter = ExternalSorter(args.sort, memory_budget=args.memory_budget * 2**20, spill_dir=args.spill_dir)
+    sorted_profiles = sorter.sort(_iter_input_profiles(args, rejects), dedup=args.dedup)
+    with _stage(args, "external_sort"):
+        first_profile = next(sorted_profiles, None)
+    if first_profile is None:
+        raise SystemExit("No valid profiles loaded from input file.")
+    page = islice(chain([first_profile], sorted_profiles), args.offset,
+                  None if args.limit is None else args.offset + args.limit)
+    with _stage(args, "merge_and_write"):
+        if args.hasher is None:
+            _write_profiles(args, (json.loads(profile_json) for profile_json in page))
+        else:
+            profiles = (UserProfile.from_dict(json.loads(profile_json)) for profile_json in page)
+            _write_profiles(args, (profile.to_dict() for profile in _hash_output(args, profiles)))
+
+
+def _streaming_top(args: argparse.Namespace, rejects: Optional[RejectWriter]) -> None:
+    """Select the requested page while streaming the input, holding only that page.
+    
+    Raises:
+        SystemExit: If no valid profiles are loaded
     """
-    if output_path:
-        output_file_path = Path(output_path)
-        with output_file_path.open(mode="w") as file_handle:
-            json.dump(obj, file_handle, indent=4)
+    with _stage(args, "select_top"):
+        page, total = select_top(_iter_input_profiles(args, rejects), args.sort, args.limit, args.offset,
+                                 dedup=args.dedup)
+    if total == 0:
+        raise SystemExit("No valid profiles loaded from input file.")
+    with _stage(args, "write"):
+        _write_profiles(args, (profile.to_dict() for profile in _hash_output(args, page)))
+
+
+def _add_input_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options choosing what is loaded and how (shared with serve)."""
+    parser.add_argument(
+        "--input",
+        "-i",
+        required=True,
+        nargs="+",
+        action="extend",
+        help=(
+            "Path to input JSON (single user or list); several files, glob patterns such as "
+            "'shards/*.ndjson' and directories may be given, and earlier files win on duplicate emails"
+        ),
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=INPUT_FORMATS,
+        default="auto",
+        help="Input format: json, ndjson, or auto to detect from content (default: auto)",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=STORAGE_ENGINES,
+        default="dict",
+        help=(
+            "Storage engine: dict, compact (less memory per profile) or sqlite "
+            "(indexed database, see --database) (default: dict)"
+        ),
+    )
+    parser.add_argument(
+        "--database",
+        default=":memory:",
+        help=(
+            "SQLite database file for --storage sqlite; profiles already in it are kept and the "
+            "input is added (default: a private in-memory database)"
+        ),
+    )
+    parser.add_argument("--rejects", help="Path to write rejected records as NDJSON")
+    parser.add_argument(
+        "--dedup-store",
+        help=(
+            "SQLite file remembering the emails seen, behind a Bloom filter, instead of memory; it is kept, "
+            "so later runs (e.g. over other shards) also drop emails seen in earlier ones"
+        ),
+    )
+    parser.add_argument(
+        "--casefold-emails",
+        action="store_true",
+        help="Treat emails that differ only in letter case as duplicates",
+    )
+    parser.add_argument("--duplicates", help="Path to write the dropped duplicate profiles as NDJSON")
+    parser.add_argument(
+        "--expected-emails",
+        type=int,
+        default=DEFAULT_EXPECTED_EMAILS,
+        help=f"Distinct emails the --dedup-store Bloom filter is sized for (default: {DEFAULT_EXPECTED_EMAILS})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to validate the input, or to read several input files (default: 1)",
+    )
+    parser.add_argument(
+        "--hash-passwords",
+        dest="hash_algorithm",
+        choices=HASH_ALGORITHMS,
+        help="Replace the passwords of loaded profiles with salted hashes made with this algorithm",
+    )
+    parser.add_argument(
+        "--hash-cost",
+        type=int,
+        help=(
+            "scrypt work factor N (a power of 2) or PBKDF2 iterations for --hash-passwords "
+            f"(default: {DEFAULT_COSTS['scrypt']} for scrypt, {DEFAULT_COSTS['pbkdf2_sha256']} for pbkdf2_sha256)"
+        ),
+    )
+    parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes hashing passwords (default: CPU count)",
+    )
+    parser.add_argument(
+        "--hashed-input",
+        action="store_true",
+        help=(
+            "Accept passwords that are already hashes, e.g. to reload output saved with --hash-passwords. "
+            "Only for trusted input: without it every password must meet the strength rules"
+        ),
+    )
+
+
+def _add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options choosing where and how profiles are written (shared with client)."""
+    parser.add_argument("--output", "-o", help="Path to write output JSON (defaults to stdout)")
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="Output format: a json array or ndjson with one profile per line (default: json)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write the JSON array without indentation (ndjson is always compact)",
+    )
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Create the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="User profiles processor",
+        epilog=(
+            "Run 'user-profiles serve -h' or 'user-profiles client -h' for the server mode, and "
+            "'user-profiles diff -h' or 'user-profiles merge -h' to compare or combine two datasets."
+        ),
+    )
+    _add_input_arguments(parser)
+    _add_output_arguments(parser)
+    parser.add_argument(
+        "--sort",
+        type=_sort_spec,
+        default="age",
+        help=(
+            "Comma-separated sort keys in priority order, each optionally prefixed with - to reverse it: "
+            f"{', '.join(SORT_FIELDS)} (default: age, oldest first). "
+            "Pass a spec starting with - as --sort=-age"
+        ),
+    )
+    parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        help=(
+            "Only output matching profiles, e.g. country=US,state=WA or age=30..40 or name=Al "
+            "(name matches a prefix; may be repeated)"
+        ),
+    )
+    parser.add_argument(
+        "--external-sort",
+        action="store_true",
+        help="Sort through temporary run files on disk instead of in memory",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET // 2**20,
+        help=f"Approximate MiB of profiles kept in memory per run with --external-sort "
+             f"(default: {DEFAULT_MEMORY_BUDGET // 2**20})",
+    )
+    parser.add_argument("--spill-dir", help="Directory for --external-sort run files (default: system temp dir)")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Only output this many profiles, selected while streaming the input in bounded memory",
+    )
+    parser.add_argument("--offset", type=int, default=0, help="Skip this many sorted profiles (default: 0)")
+    parser.add_argument(
+        "--snapshot",
+        help=(
+            "Also save the loaded profiles as a binary snapshot to this path; "
+            "a snapshot given as --input is memory-mapped instead of parsed"
+        ),
+    )
+    parser.add_argument(
+        "--partition-by",
+        type=_partition_fields,
+        help=(
+            "Write one file per country (--output DIR/US.json) or per state (country,state: DIR/US/WA.json) "
+            "in a single pass; --output names the directory"
+        ),
+    )
+    parser.add_argument(
+        "--writers",
+        type=int,
+        default=DEFAULT_PARTITION_WRITERS,
+        help=f"Number of threads writing --partition-by files (default: {DEFAULT_PARTITION_WRITERS})",
+    )
+    parser.add_argument(
+        "--cache",
+        dest="use_cache",
+        action="store_true",
+        help=(
+            "Cache the output of the run, so a rerun on unchanged input files with the same options "
+            "replays it (in $USER_PROFILES_CACHE_DIR or ~/.cache/user-profiles unless --cache-dir is given)"
+        ),
+    )
+    parser.add_argument("--cache-dir", help="Directory of the result cache; implies --cache")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE // 2**20,
+        help=f"MiB of cached outputs kept; the least recently used are removed (default: {DEFAULT_CACHE_SIZE // 2**20})",
+    )
+    parser.add_argument(
+        "--cache-key",
+        dest="cache_key_mode",
+        choices=CACHE_KEY_MODES,
+        default="mtime",
+        help=(
+            "Recognize unchanged input files by path, size and modification time, or by a hash of "
+            "their content (default: mtime)"
+        ),
+    )
+    parser.add_argument(
+        "--stats",
+        dest="stats_file",
+        help=(
+            "Write per-stage timings and record counts (read, accepted, rejected per field, "
+            "duplicates) to this JSON file"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile_file",
+        help="Run under cProfile and save the pstats data to this file (the top functions also go to --stats)",
+    )
+    return parser
+
+
+def _build_serve_parser() -> argparse.ArgumentParser:
+    """Create the argument parser of the serve subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="user-profiles serve",
+        description="Load the profiles once and answer sort, get, add and remove requests until shut down",
+    )
+    _add_input_arguments(parser)
+    parser.add_argument("--socket", help="Unix socket to serve newline-delimited JSON requests on")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to serve HTTP on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="TCP port to serve HTTP on")
+    return parser
+
+
+def _build_client_parser() -> argparse.ArgumentParser:
+    """Create the argument parser of the client subcommand."""
+    parser = argparse.ArgumentParser(prog="user-profiles client", description="Send one request to a running server")
+    parser.add_argument("op", choices=OPERATIONS, help="Request to send")
+    parser.add_argument("--socket", help="Unix socket of the server")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP host of the server (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="HTTP port of the server")
+    parser.add_argument("--email", help="Email of the profile to get or remove")
+    parser.add_argument("--profile", help="JSON file holding the profile to add (- for stdin)")
+    parser.add_argument("--sort", type=_sort_spec, default="age", help="Sort keys, as for the main command")
+    parser.add_argument("--where", action="append", default=[], help="Filters, as for the main command")
+    parser.add_argument("--limit", type=int, help="Only return this many profiles")
+    parser.add_argument("--offset", type=int, default=0, help="Skip this many sorted profiles (default: 0)")
+    _add_output_arguments(parser)
+    return parser
+
+
+def _build_diff_parser(command: str) -> argparse.ArgumentParser:
+    """Create the argument parser of the diff or merge subcommand."""
+    if command == "diff":
+        description = "Report the profiles added, removed and changed between two datasets as NDJSON"
     else:
-        json.dump(obj, sys.stdout, indent=4)
-        sys.stdout.write('\n')
+        description = "Combine two datasets, resolving profiles whose versions differ"
+    parser = argparse.ArgumentParser(prog=f"user-profiles {command}", description=description)
+    parser.add_argument("old", help="Earlier dataset (JSON or NDJSON)")
+    parser.add_argument("new", help="Later dataset (JSON or NDJSON)")
+    parser.add_argument(
+        "--input-format",
+        choices=INPUT_FORMATS,
+        default="auto",
+        help="Input format of both datasets: json, ndjson, or auto to detect from content (default: auto)",
+    )
+    parser.add_argument("--rejects", help="Path to write rejected records of both datasets as NDJSON")
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        help=(
+            "Number of partitions the datasets are split into on disk to bound memory "
+            f"(default: one per {DEFAULT_PARTITION_BYTES // 2**20} MiB of input)"
+        ),
+    )
+    parser.add_argument("--spill-dir", help="Directory for partition files (default: system temp dir)")
+    if command == "diff":
+        parser.add_argument("--output", "-o", help="Path to write the NDJSON change records (defaults to stdout)")
+        return parser
+    parser.add_argument(
+        "--on-conflict",
+        choices=CONFLICT_POLICIES,
+        default="new",
+        help=(
+            "For an email whose profiles differ: keep the new or the old one, skip both, "
+            "or stop with an error (default: new)"
+        ),
+    )
+    parser.add_argument("--conflicts", help="Path to write each conflict as an NDJSON change record")
+    _add_output_arguments(parser)
+    return parser
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     """Main entry point for user profile processing.
     
-    Loads profiles from JSON, sorts them, and outputs results.
+    Loads profiles from JSON, sorts them, and outputs results. A first
+    argument of "serve" or "client" runs the server mode instead, and
+    "diff" or "merge" compares or combines two datasets.
     
     Args:
         argv: Optional command-line arguments (defaults to sys.argv)
@@ -62,32 +579,314 @@ def main(argv: Optional[List[str]] = None) -> int:
     Raises:
         SystemExit: If no valid profiles are loaded
     """
-    parser = argparse.ArgumentParser(description="User profiles processor")
-    parser.add_argument("--input", "-i", required=True, help="Path to input JSON (single user or list)")
-    parser.add_argument("--output", "-o", help="Path to write output JSON (defaults to stdout)")
-    parser.add_argument(
-        "--sort",
-        choices=["age", "name", "email", "location"],
-        default="age",
-        help="Sort key (default: age)",
-    )
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "serve":
+        return _serve(argv[1:])
+    if argv and argv[0] == "client":
+        return _client(argv[1:])
+    if argv and argv[0] in ("diff", "merge"):
+        return _diff(argv[0], argv[1:])
+    parser = _build_parser()
     args = parser.parse_args(argv)
+    if args.memory_budget < 1:
+        parser.error("--memory-budget must be at least 1")
+    if args.limit is not None and args.limit < 0:
+        parser.error("--limit must not be negative")
+    if args.offset < 0:
+        parser.error("--offset must not be negative")
+    try:
+        criteria = _parse_where(args.where)
+    except ValueError as e:
+        parser.error(f"--where: {e}")
+    if args.external_sort and criteria:
+        parser.error("--where cannot be combined with --external-sort")
+    if args.external_sort and args.snapshot:
+        parser.error("--snapshot cannot be combined with --external-sort")
+    if args.partition_by is not None and not args.output:
+        parser.error("--partition-by needs --output naming the output directory")
+    if args.writers < 1:
+        parser.error("--writers must be at least 1")
+
+    _check_input_arguments(parser, args)
+    if args.cache_size < 0:
+        parser.error("--cache-size must not be negative")
+    args.cache, args.cache_key = _result_cache(args, criteria)
+    if args.cache is not None and _replay_output(args):
+        return 0
+
+    # The report is also written when the run ends with an error.
+    args.stats = PipelineStats() if args.stats_file or args.profile_file else None
+    if args.stats is None:
+        return _run(args, criteria)
+    try:
+        with args.stats.profiling() if args.profile_file else nullcontext(), _stage(args, "total"):
+            return _run(args, criteria)
+    finally:
+        if args.profile_file:
+            args.stats.write_profile(args.profile_file)
+        if args.stats_file:
+            args.stats.write(args.stats_file)
 
-    manager = UserProfileManager()
-    manager.load_profiles_from_json(args.input)
+
+def _check_input_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Check the input options and expand --input into args.input_files."""
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.expected_emails < 1:
+        parser.error("--expected-emails must be at least 1")
+    try:
+        args.input_files = expand_inputs(args.input)
+    except ValueError as e:
+        parser.error(f"--input: {e}")
+    args.file_reports = []
+    args.input = args.input_files[0]
+    args.hasher = None
+    if args.hash_algorithm is not None:
+        try:
+            args.hasher = PasswordHasher(args.hash_algorithm, args.hash_cost, workers=args.hash_workers)
+        except ValueError as e:
+            parser.error(f"--hash-passwords: {e}")
+    elif args.hash_cost is not None:
+        parser.error("--hash-cost needs --hash-passwords")
+
+
+def _result_cache(args: argparse.Namespace, criteria: dict) -> Tuple[Optional[ResultCache], Optional[str]]:
+    """Return the result cache and the key of this run, or (None, None) if it is not cached.
+    
+    Only runs with --cache or --cache-dir are cached. The key covers the
+    input files, the tool's code and every option that changes the
+    output. Runs that write more than the output (--rejects,
+    --duplicates, --dedup-store, --snapshot, --stats, --profile,
+    --partition-by) or read a --database file are not cached.
+    """
+    if not (args.use_cache or args.cache_dir) \
+            or args.partition_by or args.snapshot or args.rejects or args.duplicates \
+            or args.dedup_store or args.stats_file or args.profile_file \
+            or (args.storage == "sqlite" and args.database != ":memory:"):
+        return None, None
+    options = {
+        "sort": args.sort, "where": criteria, "limit": args.limit, "offset": args.offset,
+        "input_format": args.input_format, "output_format": args.output_format, "compact": args.compact,
+        "casefold_emails": args.casefold_emails, "hash": [args.hash_algorithm, args.hash_cost],
+        "hashed_input": args.hashed_input,
+    }
+    if criteria.get("min_age") is not None or criteria.get("max_age") is not None:
+        # Ages change with the date.
+        options["today"] = date.today().isoformat()
+    try:
+        key = result_key(args.input_files, options, args.cache_key_mode)
+    except OSError:
+        return None, None
+    return ResultCache(args.cache_dir or default_cache_dir(), args.cache_size * 2**20), key
+
+
+def _load_manager(args: argparse.Namespace, rejects: Optional[RejectWriter]) -> UserProfileManager:
+    """Create a manager holding the profiles of the input files.
+    
+    Raises:
+        SystemExit: If a snapshot input cannot be read
+    """
+    manager = UserProfileManager(storage=args.storage, database=args.database, stats=args.stats)
+    with _stage(args, "load"):
+        if len(args.input_files) == 1 and is_snapshot(args.input):
+            try:
+                manager.load_snapshot(args.input)
+            except SnapshotError as e:
+                raise SystemExit(str(e))
+        elif len(args.input_files) > 1:
+            _print_file_reports(manager.load_profiles_from_files(
+                args.input_files, input_format=args.input_format, rejects=rejects, workers=args.workers,
+                dedup=args.dedup, hasher=args.hasher, hashed_input=args.hashed_input))
+        else:
+            result = manager.load_profiles_from_json(args.input, input_format=args.input_format, rejects=rejects,
+                                                     workers=args.workers, dedup=args.dedup, hasher=args.hasher,
+                                                     hashed_input=args.hashed_input)
+            if result.partial:
+                print(f"PARTIAL: {result.accepted} accepted, {result.rejected} rejected before ERROR: {result.error}",
+                      file=sys.stderr)
+            elif result.error is not None:
+                print(f"ERROR: {result.error}", file=sys.stderr)
+    return manager
+
+
+def _open_dedup(args: argparse.Namespace):
+    """Return a DuplicateDetector context for the dedup options, or a null context without them."""
+    if not (args.dedup_store or args.casefold_emails or args.duplicates):
+        return nullcontext()
+    return DuplicateDetector(args.dedup_store, casefold=args.casefold_emails, expected=args.expected_emails,
+                             report=args.duplicates)
+
+
+def _print_dedup_report(dedup: Optional[DuplicateDetector]) -> None:
+    """Print how many duplicates a DuplicateDetector dropped to stderr."""
+    if dedup is not None:
+        print(f"duplicates: {dedup.duplicates} of {dedup.checked} profiles dropped "
+              f"({dedup.false_positives} Bloom filter false positives)", file=sys.stderr)
+
+
+def _run(args: argparse.Namespace, criteria: dict) -> int:
+    """Load, select and write the profiles as the parsed arguments ask.
+    
+    Raises:
+        SystemExit: If no valid profiles are loaded
+    """
+    multiple_inputs = len(args.input_files) > 1
+    # Snapshots are served from the mapped file, which makes the streaming paths unnecessary.
+    snapshot_input = not multiple_inputs and is_snapshot(args.input)
+    # The streaming paths only see the input files, not the profiles already in a database;
+    # SQLite sorts and pages on disk anyway.
+    database_input = args.storage == "sqlite" and args.database != ":memory:"
+    with RejectWriter(args.rejects) if args.rejects else nullcontext() as rejects, _open_dedup(args) as dedup:
+        args.dedup = dedup
+        if args.limit is not None and not criteria and not args.snapshot and not snapshot_input \
+                and not database_input:
+            _streaming_top(args, rejects)
+            if multiple_inputs:
+                _print_file_reports(args.file_reports)
+            _print_dedup_report(dedup)
+            return 0
+        if args.external_sort and not snapshot_input and not database_input:
+            _external_sort(args, rejects)
+            if multiple_inputs:
+                _print_file_reports(args.file_reports)
+            _print_dedup_report(dedup)
+            return 0
+        manager = _load_manager(args, rejects)
+        _print_dedup_report(dedup)
 
     if len(manager.user_profiles) == 0:
         raise SystemExit("No valid profiles loaded from input file.")
+    if args.snapshot:
+        with _stage(args, "save_snapshot"):
+            manager.save_snapshot(args.snapshot)
+
+    if criteria:
+        try:
+            with _stage(args, "query"):
+                sorted_profiles = manager.query(sort=args.sort, limit=args.limit, offset=args.offset, **criteria)
+        except ValueError as e:
+            raise SystemExit(str(e))
+    else:
+        with _stage(args, "sort"):
+            sorted_profiles = _sort_profiles(manager, args.sort, limit=args.limit, offset=args.offset)
+    with _stage(args, "write"):
+        _write_profiles(args, (profile.to_dict() for profile in sorted_profiles))
+
+    return 0
 
-    sorted_profiles = _sort_profiles(manager, args.sort)
-    output_list = []
-    for profile in sorted_profiles:
-        profile_dict = profile.to_dict()
-        output_list.append(profile_dict)
-    _write_output(output_list, args.output)
 
+def _serve(argv: List[str]) -> int:
+    """Run the serve subcommand: load once, then answer requests until shut down.
+    
+    Raises:
+        SystemExit: If no valid profiles are loaded
+    """
+    parser = _build_serve_parser()
+    args = parser.parse_args(argv)
+    if args.socket is None and args.port is None:
+        parser.error("give --socket, --port or both")
+    _check_input_arguments(parser, args)
+    args.stats = None
+    with RejectWriter(args.rejects) if args.rejects else nullcontext() as rejects, _open_dedup(args) as dedup:
+        args.dedup = dedup
+        manager = _load_manager(args, rejects)
+        _print_dedup_report(dedup)
+    if len(manager.user_profiles) == 0:
+        raise SystemExit("No valid profiles loaded from input file.")
+
+    def ready(addresses: List[str]) -> None:
+        print(f"Serving {len(manager.user_profiles)} profiles on {', '.join(addresses)}", file=sys.stderr)
+
+    server = ProfileServer(manager, args.hasher)
+    try:
+        asyncio.run(server.serve(args.socket, args.host, args.port, ready))
+    finally:
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+    return 0
+
+
+def _client(argv: List[str]) -> int:
+    """Run the client subcommand: send one request and print the answer.
+    
+    Profiles from a sort are written like the main command's output;
+    other responses are printed as JSON. Failed requests print their
+    error to stderr and exit with status 1.
+    """
+    parser = _build_client_parser()
+    args = parser.parse_args(argv)
+    if args.socket is None and args.port is None:
+        parser.error("give --socket or --port")
+    request = {"op": args.op}
+    if args.op in ("get", "remove"):
+        if args.email is None:
+            parser.error(f"{args.op} needs --email")
+        request["email"] = args.email
+    elif args.op == "add":
+        if args.profile is None:
+            parser.error("add needs --profile")
+        with open(args.profile) if args.profile != "-" else nullcontext(sys.stdin) as profile_file:
+            request["profile"] = json.load(profile_file)
+    elif args.op == "sort":
+        try:
+            where = _parse_where(args.where)
+        except ValueError as e:
+            parser.error(f"--where: {e}")
+        request.update(sort=args.sort, limit=args.limit, offset=args.offset, where=where)
+    try:
+        response = send_request(request, args.socket, args.host, args.port)
+    except OSError as e:
+        raise SystemExit(f"Cannot reach the server: {e}")
+    if not response.get("ok"):
+        print(f"ERROR: {response.get('error')}", file=sys.stderr)
+        for error in response.get("errors", []):
+            print(f"  {error['field']}: {error['message']}", file=sys.stderr)
+        return 1
+    if "profiles" in response:
+        _write_output(response["profiles"], args.output, args.output_format, args.compact)
+    else:
+        print(json.dumps(response))
+    return 0
+
+
+def _diff(command: str, argv: List[str]) -> int:
+    """Run the diff or merge subcommand and print a summary line to stderr.
+    
+    Raises:
+        SystemExit: If an input cannot be read or a merge conflict is fatal
+    """
+    parser = _build_diff_parser(command)
+    args = parser.parse_args(argv)
+    if args.partitions is None:
+        try:
+            input_bytes = os.path.getsize(args.old) + os.path.getsize(args.new)
+        except OSError as e:
+            raise SystemExit(f"Cannot read input: {e}")
+        args.partitions = max(1, math.ceil(input_bytes / DEFAULT_PARTITION_BYTES))
+    elif args.partitions < 1:
+        parser.error("--partitions must be at least 1")
+    differ = ProfileDiffer(args.partitions, args.spill_dir)
+    with RejectWriter(args.rejects) if args.rejects else nullcontext() as rejects:
+        old_profiles = iter_profiles(args.old, args.input_format, rejects=rejects)
+        new_profiles = iter_profiles(args.new, args.input_format, rejects=rejects)
+        try:
+            if command == "diff":
+                _write_output(differ.diff(old_profiles, new_profiles), args.output, "ndjson")
+            else:
+                with open(args.conflicts, mode='w') if args.conflicts else nullcontext() as conflicts:
+                    _write_output(differ.merge(old_profiles, new_profiles, args.on_conflict, conflicts),
+                                  args.output, args.output_format, args.compact)
+        except (InputFormatError, OSError, MergeConflictError) as e:
+            raise SystemExit(f"ERROR: {e}")
+    counts = differ.counts
+    summary = f"{counts['added']} added, {counts['removed']} removed, {counts['changed']} changed, " \
+              f"{counts['unchanged']} unchanged"
+    if command == "merge":
+        summary += f"; {counts['conflicts']} conflicts resolved as {args.on_conflict}"
+    print(f"{command}: {summary}", file=sys.stderr)
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Tuple
+
+from .location import Location
+from .streaming import DEFAULT_BATCH_SIZE, INPUT_FORMATS, iter_batches, iter_profile_items
+from .user_profile import UserProfile
+from .validation import DEFAULT_VALIDATOR, HASHED_INPUT_VALIDATOR, RecordReport, RejectWriter
+
+ProfileRow = Tuple[str, str, str, str, str, str, str]
+
+
+def _iter_ndjson_line_chunks(json_file: str, batch_size: int) -> Iterator[List[str]]:
+    """Yield lists of raw, undecoded NDJSON lines so decoding happens in the workers."""
+    with open(json_file, mode='r') as input_file:
+        while True:
+            lines = list(islice(input_file, batch_size))
+            if not lines:
+                return
+            yield lines
+
+
+def _decode_lines(lines: List[str], start_line: int) -> List[object]:
+    """Decode NDJSON lines, skipping blank ones.
+
+    Raises:
+        json.JSONDecodeError: If a line is malformed (with its 1-based line number)
+    """
+    records = []
+    for line_number, line in enumerate(lines, start=start_line + 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"line {line_number}: {e.msg}", e.doc, e.pos) from None
+    return records
+
+
+def validate_chunk(records: List[object],
+                   hashed_input: bool = False) -> Tuple[int, List[ProfileRow], List[RecordReport]]:
+    """Validate and normalize one chunk of raw records (runs in a worker process).
+
+    Args:
+        records: Decoded JSON records
+        hashed_input: Accept passwords that are already hashed (see HASHED_INPUT_VALIDATOR)
+
+    Returns:
+        (record_count, accepted, rejected): accepted holds the field tuples of
+        valid records in input order, rejected the reports of invalid ones with
+        indexes relative to the chunk
+    """
+    validator = HASHED_INPUT_VALIDATOR if hashed_input else DEFAULT_VALIDATOR
+    reports = validator.validate_batch(records)
+    rejected_indices = {report.index for report in reports}
+    accepted = []
+    for index, record in enumerate(records):
+        if index in rejected_indices:
+            continue
+        location = record["location"]
+        accepted.append((record["name"], record["email"], record["password"], record["dob"],
+                         location["city"], location["state"], location["country"]))
+    return len(records), accepted, reports
+
+
+def _validate_line_chunk(lines: List[str], start_line: int,
+                         hashed_input: bool = False) -> Tuple[int, List[ProfileRow], List[RecordReport]]:
+    """Decode and validate one chunk of NDJSON lines (runs in a worker process)."""
+    return validate_chunk(_decode_lines(lines, start_line), hashed_input)
+
+
+def iter_profiles_parallel(json_file: str, input_format: str = "auto", batch_size: int = DEFAULT_BATCH_SIZE,
+                           workers: int = 2, rejects: RejectWriter | None = None,
+                           hashed_input: bool = False) -> Iterator[UserProfile]:
+    """Stream validated profiles, validating chunks in a pool of worker processes.
+
+    NDJSON lines are decoded in the workers; other inputs are decoded by the
+    streaming reader in this process and only validated in the workers.
+    Chunk results are consumed in submission order and at most 2 * workers
+    chunks are in flight, so output order is file order and memory stays
+    bounded.
+
+    Args:
+        json_file: Path to the input file
+        input_format: One of INPUT_FORMATS
+        batch_size: Number of records per chunk sent to a worker
+        workers: Number of worker processes
+        rejects: Optional sink for rejected records
+        hashed_input: Accept passwords that are already hashed
+
+    Yields:
+        Validated UserProfile objects in file order
+    """
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format: {input_format}")
+    if workers < 1:
+        raise ValueError("workers must be positive")
+    if input_format == "ndjson":
+        chunks = _iter_ndjson_line_chunks(json_file, batch_size)
+    else:
+        chunks = iter_batches(iter_profile_items(json_file, input_format), batch_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        line_offset = 0
+        next_index = 0
+        for chunk in chunks:
+            if input_format == "ndjson":
+                pending.append(executor.submit(_validate_line_chunk, chunk, line_offset, hashed_input))
+                line_offset += len(chunk)
+            else:
+                pending.append(executor.submit(validate_chunk, chunk, hashed_input))
+            if len(pending) >= 2 * workers:
+                next_index = yield from _drain(pending.popleft(), next_index, rejects)
+        while pending:
+            next_index = yield from _drain(pending.popleft(), next_index, rejects)
+
+
+def _drain(future, start_index: int, rejects: RejectWriter | None):
+    """Yield the profiles of one finished chunk and return the next record index."""
+    record_count, accepted, reports = future.result()
+    if rejects is not None:
+        for report in reports:
+            report.index += start_index
+            rejects.write(report)
+    for name, email, password, dob, city, state, country in accepted:
+        yield UserProfile(name=name, email=email, password=password, dob=dob,
+                          location=Location(city, state, country))
+    return start_index + record_count
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Iterable, Iterator, List, Tuple
+
+from .stats import PipelineStats
+from .streaming import iter_batches
+from .user_profile import UserProfile
+from .validation import is_password_hash
+
+HASH_ALGORITHMS = ("scrypt", "pbkdf2_sha256")
+DEFAULT_ALGORITHM = "scrypt"
+# scrypt work factor N (a power of 2) and PBKDF2-SHA256 iterations.
+DEFAULT_COSTS = {"scrypt": 2**14, "pbkdf2_sha256": 600_000}
+# Highest costs accepted, by the hasher and in stored hashes, so a crafted
+# hash cannot make a single verification take minutes or gigabytes.
+MAX_COSTS = {"scrypt": 2**20, "pbkdf2_sha256": 10_000_000}
+MAX_SCRYPT_MEMORY = 2**30
+MAX_SCRYPT_PARALLELISM = 16
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 1
+SALT_SIZE = 16
+KEY_SIZE = 32
+# Passwords hashed per task sent to a worker process.
+DEFAULT_HASH_BATCH_SIZE = 64
+
+# (algorithm, cost, block size, parallelism)
+HashParameters = Tuple[str, int, int, int]
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _check_parameters(algorithm: str, cost: int, block_size: int, parallelism: int) -> None:
+    """Raise ValueError unless the parameters are within the supported range."""
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"Unknown hash algorithm: {algorithm} (expected one of {', '.join(HASH_ALGORITHMS)})")
+    if algorithm == "scrypt" and (cost < 2 or cost & (cost - 1)):
+        raise ValueError("scrypt cost must be a power of 2 greater than 1")
+    if cost < 1 or block_size < 1 or parallelism < 1:
+        raise ValueError("cost parameters must be positive")
+    if cost > MAX_COSTS[algorithm]:
+        raise ValueError(f"{algorithm} cost must be at most {MAX_COSTS[algorithm]}")
+    if algorithm == "scrypt" and (128 * block_size * cost > MAX_SCRYPT_MEMORY
+                                  or parallelism > MAX_SCRYPT_PARALLELISM):
+        raise ValueError(f"scrypt must use at most {MAX_SCRYPT_MEMORY} bytes and parallelism "
+                         f"{MAX_SCRYPT_PARALLELISM}")
+
+
+def _derive(password: str, salt: bytes, algorithm: str, cost: int, block_size: int, parallelism: int) -> bytes:
+    if algorithm == "scrypt":
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=cost, r=block_size, p=parallelism,
+                              maxmem=128 * block_size * (cost + parallelism + 2) + 2**20, dklen=KEY_SIZE)
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, cost, dklen=KEY_SIZE)
+
+
+def _encode(password: str, parameters: HashParameters) -> str:
+    algorithm, cost, block_size, parallelism = parameters
+    salt = os.urandom(SALT_SIZE)
+    key = _b64(_derive(password, salt, algorithm, cost, block_size, parallelism))
+    if algorithm == "scrypt":
+        return f"scrypt${cost}${block_size}${parallelism}${_b64(salt)}${key}"
+    return f"{algorithm}${cost}${_b64(salt)}${key}"
+
+
+def hash_batch(passwords: List[str], parameters: HashParameters) -> List[str]:
+    """Hash a batch of passwords (runs in a worker process).
+
+    Args:
+        passwords: Plaintext passwords
+        parameters: (algorithm, cost, block size, parallelism)
+
+    Returns:
+        The encoded hashes, in the order of passwords
+    """
+    return [_encode(password, parameters) for password in passwords]
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check a password against a stored hash, or a stored plaintext password.
+
+    The algorithm and cost are read from the hash, so hashes made with
+    other settings still verify; hashes whose costs are outside the range
+    a PasswordHasher accepts (see MAX_COSTS) never do. Comparisons take
+    constant time.
+
+    Args:
+        password: Password to check
+        stored: Hash from PasswordHasher, or a password that was never hashed
+
+    Returns:
+        True if password matches
+    """
+    if not is_password_hash(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    algorithm, *fields = stored.split("$")
+    if algorithm == "scrypt":
+        cost, block_size, parallelism = (int(field) for field in fields[:3])
+    else:
+        cost, block_size, parallelism = int(fields[0]), 1, 1
+    try:
+        _check_parameters(algorithm, cost, block_size, parallelism)
+        salt, key = base64.b64decode(fields[-2]), base64.b64decode(fields[-1])
+        derived = _derive(password, salt, algorithm, cost, block_size, parallelism)
+    except ValueError:
+        # Out-of-range costs, malformed base64 or parameters the KDF rejects: not a hash we made.
+        return False
+    return hmac.compare_digest(derived, key)
+
+
+class PasswordHasher:
+    """Replaces plaintext passwords with salted scrypt or PBKDF2 hashes.
+
+    Hashes are stored as "scrypt$N$r$p$salt$key" or
+    "pbkdf2_sha256$iterations$salt$key" (base64 salt and key), so
+    verify_password needs no settings. A key derivation function is slow
+    by design, so with workers > 1 batches of passwords are hashed in a
+    pool of worker processes and throughput grows with the core count.
+    """
+    def __init__(self, algorithm: str = DEFAULT_ALGORITHM, cost: int | None = None, workers: int = 1,
+                 batch_size: int = DEFAULT_HASH_BATCH_SIZE, block_size: int = SCRYPT_BLOCK_SIZE,
+                 parallelism: int = SCRYPT_PARALLELISM):
+        """Initialize a hasher.
+
+        Args:
+            algorithm: One of HASH_ALGORITHMS
+            cost: scrypt N (a power of 2 above 1) or PBKDF2 iterations, at
+                most MAX_COSTS of the algorithm (default: DEFAULT_COSTS)
+            workers: Number of worker processes hashing batches
+            batch_size: Number of passwords per batch
+            block_size: scrypt block size r
+            parallelism: scrypt parallelization p
+
+        Raises:
+            ValueError: If the algorithm is unknown or a parameter is out of range
+        """
+        if cost is None:
+            cost = DEFAULT_COSTS.get(algorithm, 1)
+        _check_parameters(algorithm, cost, block_size, parallelism)
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.algorithm = algorithm
+        self.cost = cost
+        self.workers = workers
+        self.batch_size = batch_size
+        self.parameters: HashParameters = (algorithm, cost, block_size, parallelism)
+
+    def hash(self, password: str) -> str:
+        """Return the hash of one password, computed in this process."""
+        return _encode(password, self.parameters)
+
+    def hash_many(self, passwords: Iterable[str]) -> Iterator[str]:
+        """Yield the hashes of passwords in order, hashing batches in parallel."""
+        for _, hashes in self._hash_batches(iter_batches(passwords, self.batch_size)):
+            yield from hashes
+
+    def hash_profiles(self, profiles: Iterable[UserProfile],
+                      stats: PipelineStats | None = None) -> Iterator[UserProfile]:
+        """Yield profiles with their plaintext password replaced by its hash.
+
+        Profiles are changed in place and yielded in input order; passwords
+        that are already hashes are left alone. At most 2 * workers batches
+        are in flight, so memory stays bounded on any input size.
+
+        Args:
+            profiles: Profiles to hash, typically fresh from a reader
+            stats: Optional PipelineStats; time spent waiting for hashes
+                goes to the "hash" timer and hashed passwords to the
+                "hashed" counter
+        """
+        batches = (
+            (batch, [profile.password for profile in batch if not is_password_hash(profile.password)])
+            for batch in iter_batches(profiles, self.batch_size)
+        )
+        for (batch, _), hashes in self._hash_batches(batches, stats, key=lambda item: item[1]):
+            hashes = iter(hashes)
+            for profile in batch:
+                if not is_password_hash(profile.password):
+                    profile.password = next(hashes)
+            yield from batch
+
+    def _hash_batches(self, batches, stats: PipelineStats | None = None, key=lambda batch: batch):
+        """Yield (batch, hashes) for each batch, hashing key(batch) in order."""
+        if self.workers == 1:
+            for batch in batches:
+                with nullcontext() if stats is None else stats.stage("hash"):
+                    hashes = hash_batch(key(batch), self.parameters)
+                if stats is not None:
+                    stats.count("hashed", len(hashes))
+                yield batch, hashes
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append((batch, executor.submit(hash_batch, key(batch), self.parameters)))
+                if len(pending) >= 2 * self.workers:
+                    yield self._result(pending.popleft(), stats)
+            while pending:
+                yield self._result(pending.popleft(), stats)
+
+    @staticmethod
+    def _result(entry, stats: PipelineStats | None):
+        batch, future = entry
+        if stats is None:
+            return batch, future.result()
+        with stats.stage("hash"):
+            hashes = future.result()
+        stats.count("hashed", len(hashes))
+        return batch, hashes
+
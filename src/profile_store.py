@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+from array import array
+from collections.abc import MutableMapping
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .dates import DOB_FORMATS, parse_dob
+from .location import Location
+from .sorting import SortSpec
+from .user_profile import UserProfile
+
+
+def encode_dob(dob: str) -> Tuple[int, int]:
+    """Encode a date of birth string as (ordinal, format index).
+
+    Args:
+        dob: Date of birth in YYYY-MM-DD or MM/DD/YYYY format
+
+    Returns:
+        Proleptic Gregorian ordinal and the index of the matching format in
+        DOB_FORMATS, or (0, -1) if the string cannot be parsed
+    """
+    try:
+        parsed = parse_dob(dob)
+    except (TypeError, ValueError):
+        return 0, -1
+    return parsed.ordinal, parsed.format_index
+
+
+def decode_dob(ordinal: int, format_index: int) -> str:
+    """Rebuild the date of birth string produced by encode_dob."""
+    return date.fromordinal(ordinal).strftime(DOB_FORMATS[format_index])
+
+
+class ProfileView(UserProfile):
+    """Read-only view of one row of a CompactProfileStore.
+
+    Behaves like a UserProfile (validation, age, serialization) but holds only
+    a reference to the store and a row number; fields are read on access.
+    """
+    __slots__ = ("_store", "_row")
+    # Shadows the UserProfile slot: the date of birth is parsed on access.
+    _parsed_dob = None
+
+    def __init__(self, store: CompactProfileStore, row: int):
+        """Initialize a view.
+
+        Args:
+            store: Store that owns the row
+            row: Row number within the store
+        """
+        self._store = store
+        self._row = row
+
+    @property
+    def name(self) -> str:
+        return self._store._names[self._row]
+
+    @property
+    def email(self) -> str:
+        return self._store._emails[self._row]
+
+    @property
+    def password(self) -> str:
+        return self._store._passwords[self._row]
+
+    @property
+    def dob(self) -> str:
+        return self._store._dob_string(self._row)
+
+    @property
+    def location(self) -> Location:
+        return self._store._locations[self._store._location_ids[self._row]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ProfileView):
+            return self._store is other._store and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._row))
+
+
+class CompactProfileStore(MutableMapping):
+    """Struct-of-arrays profile storage keyed by email address.
+
+    Each field lives in its own column instead of in a per-profile object:
+    dates of birth are stored as integer ordinals in typed arrays, and each
+    distinct (city, state, country) triple is stored once and referenced by
+    id. Values are handed out as ProfileView objects. Iteration follows
+    insertion order, like a dict.
+    """
+    def __init__(self):
+        """Initialize an empty store."""
+        self._rows: Dict[str, int] = {}
+        self._names: List[str | None] = []
+        self._emails: List[str | None] = []
+        self._passwords: List[str | None] = []
+        self._dob_ordinals = array('i')
+        self._dob_formats = array('b')
+        self._dob_overrides: Dict[int, str] = {}
+        self._location_ids = array('I')
+        self._locations: List[Location] = []
+        self._location_index: Dict[Tuple[str, str, str], int] = {}
+        self._free_rows: List[int] = []
+
+    def _dob_string(self, row: int) -> str:
+        """Return the original date of birth string of a row."""
+        override = self._dob_overrides.get(row)
+        if override is not None:
+            return override
+        return decode_dob(self._dob_ordinals[row], self._dob_formats[row])
+
+    def _location_id(self, location: Location) -> int:
+        """Return the id of a location triple, registering it if new."""
+        location_key = (location.city, location.state, location.country)
+        location_id = self._location_index.get(location_key)
+        if location_id is None:
+            location_id = len(self._locations)
+            self._locations.append(Location(*location_key))
+            self._location_index[location_key] = location_id
+        return location_id
+
+    def _write_row(self, row: int, profile: UserProfile) -> None:
+        """Store the fields of profile in an existing row."""
+        dob_ordinal, dob_format = encode_dob(profile.dob)
+        self._names[row] = profile.name
+        self._emails[row] = profile.email
+        self._passwords[row] = profile.password
+        self._dob_ordinals[row] = dob_ordinal
+        self._dob_formats[row] = dob_format
+        self._dob_overrides.pop(row, None)
+        # Dates like "3/5/1990" parse but do not round-trip, so keep the text.
+        if dob_format < 0 or decode_dob(dob_ordinal, dob_format) != profile.dob:
+            self._dob_overrides[row] = profile.dob
+        self._location_ids[row] = self._location_id(profile.location)
+
+    def _allocate_row(self) -> int:
+        """Return a free row number, growing the columns if needed."""
+        if self._free_rows:
+            return self._free_rows.pop()
+        self._names.append(None)
+        self._emails.append(None)
+        self._passwords.append(None)
+        self._dob_ordinals.append(0)
+        self._dob_formats.append(-1)
+        self._location_ids.append(0)
+        return len(self._names) - 1
+
+    def __getitem__(self, email: str) -> ProfileView:
+        return ProfileView(self, self._rows[email])
+
+    def __setitem__(self, email: str, profile: UserProfile) -> None:
+        row = self._rows.get(email)
+        if row is None:
+            row = self._allocate_row()
+            self._rows[email] = row
+        self._write_row(row, profile)
+        self._emails[row] = email
+
+    def __delitem__(self, email: str) -> None:
+        row = self._rows.pop(email)
+        self._names[row] = None
+        self._emails[row] = None
+        self._passwords[row] = None
+        self._dob_overrides.pop(row, None)
+        self._free_rows.append(row)
+
+    def __contains__(self, email) -> bool:
+        return email in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class IndexedProfileStore(MutableMapping):
+    """Base class of storage backends that sort and filter profiles themselves.
+
+    UserProfileManager keeps no in-memory sort keys, indexes or sorted
+    views for such a store: sort_profiles, iter_sorted and query are
+    delegated to it, and bulk loads go through add_many. Subclasses
+    implement the MutableMapping methods plus the ones below.
+    """
+    @abstractmethod
+    def add_many(self, profiles: Iterable[UserProfile]) -> int:
+        """Store profiles in one batch, skipping emails that are already stored.
+
+        Returns:
+            Number of profiles stored
+        """
+
+    def remove_many(self, emails: Iterable[str]) -> int:
+        """Remove the profiles of emails in one batch, skipping emails that are not stored.
+
+        Returns:
+            Number of profiles removed
+        """
+        removed = 0
+        for email in emails:
+            if email in self:
+                del self[email]
+                removed += 1
+        return removed
+
+    @abstractmethod
+    def iter_sorted(self, spec: SortSpec, limit: int | None = None, offset: int = 0) -> Iterator[UserProfile]:
+        """Yield profiles in the order of a parsed sort spec; ties keep insertion order."""
+
+    @abstractmethod
+    def select(self, country: str | None = None, state: str | None = None, city: str | None = None,
+               dob_range: Tuple[int | None, int | None] | None = None,
+               age_range: Tuple[int | None, int | None, date] | None = None,
+               name_prefix: str | None = None, spec: SortSpec | None = None,
+               limit: int | None = None, offset: int = 0) -> List[UserProfile]:
+        """Return the profiles matching every given criterion (see ProfileIndexes.select).
+
+        Unsorted results are in insertion order.
+        """
+
+    def close(self) -> None:
+        """Release resources held by the store."""
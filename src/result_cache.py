@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import IO, BinaryIO, Iterator, Optional, Sequence
+
+from . import __version__
+
+CACHE_KEY_MODES = ("mtime", "content")
+# Total bytes of cached outputs kept before the least recently used are removed.
+DEFAULT_CACHE_SIZE = 1024 * 2**20
+# Bumped when the layout of cache entries changes.
+CACHE_FORMAT = 1
+_ENTRY_SUFFIX = ".out"
+_COPY_SIZE = 2**20
+
+
+def default_cache_dir() -> str:
+    """Return $USER_PROFILES_CACHE_DIR, or user-profiles under $XDG_CACHE_HOME or ~/.cache."""
+    directory = os.environ.get("USER_PROFILES_CACHE_DIR")
+    if directory:
+        return directory
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "user-profiles")
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, mode='rb') as file_handle:
+        for block in iter(lambda: file_handle.read(_COPY_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_digest() -> str:
+    """Return a hash of the package's source files, so any code change invalidates the cache."""
+    digest = hashlib.blake2b(digest_size=16)
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            digest.update(bytes.fromhex(_file_digest(os.path.join(package_dir, name))))
+    return digest.hexdigest()
+
+
+def result_key(input_paths: Sequence[str], options: dict, mode: str = "mtime") -> str:
+    """Return the cache key of a run over input_paths with the given options.
+
+    The key also covers the tool version and code_digest(), so output
+    made by other code is never replayed.
+
+    Args:
+        input_paths: Input files, in the order they are read
+        options: JSON-serializable options that affect the output
+        mode: "mtime" identifies each input by its path, size and
+            modification time; "content" by a hash of its bytes, which
+            reads every input but survives copies and touches
+
+    Returns:
+        Hex digest naming the cache entry
+
+    Raises:
+        ValueError: If mode is unknown
+        OSError: If an input cannot be read
+    """
+    if mode not in CACHE_KEY_MODES:
+        raise ValueError(f"Unknown cache key mode: {mode} (expected one of {', '.join(CACHE_KEY_MODES)})")
+    inputs = []
+    for path in input_paths:
+        if mode == "content":
+            inputs.append(_file_digest(path))
+        else:
+            status = os.stat(path)
+            inputs.append([os.path.realpath(path), status.st_size, status.st_mtime_ns])
+    description = {"format": CACHE_FORMAT, "version": __version__, "code": code_digest(), "inputs": inputs,
+                   "options": options}
+    encoded = json.dumps(description, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=20).hexdigest()
+
+
+def _discard(entry: IO[str], temp_path: str) -> None:
+    """Close and remove an unfinished entry, ignoring errors."""
+    try:
+        entry.close()
+    except OSError:
+        pass
+    try:
+        os.unlink(temp_path)
+    except OSError:
+        pass
+
+
+class _Tee:
+    """Text handle writing to the real output and to a cache entry.
+
+    Recording stops quietly, and the partial entry is removed, if the
+    entry cannot be written or grows past max_bytes, so a full or
+    read-only cache never fails the run and an output too large to cache
+    costs no more disk writes than necessary.
+    """
+    def __init__(self, handle: IO[str], entry: IO[str], temp_path: str, max_bytes: int):
+        self.handle = handle
+        self.entry: IO[str] | None = entry
+        self.temp_path = temp_path
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def write(self, text: str) -> int:
+        written = self.handle.write(text)
+        if self.entry is not None:
+            # Output is ASCII JSON, so characters count bytes; record checks the final size.
+            self.size += len(text)
+            try:
+                if self.size > self.max_bytes:
+                    raise OSError("cache entry larger than the cache")
+                self.entry.write(text)
+            except OSError:
+                _discard(self.entry, self.temp_path)
+                self.entry = None
+        return written
+
+
+class ResultCache:
+    """On-disk cache of command outputs, evicted by size in LRU order.
+
+    Each entry is one file named after its result_key holding the output
+    exactly as written. Entries are created under a temporary name and
+    renamed into place, so concurrent runs never see a partial entry.
+    A hit refreshes the entry's modification time, which is the recency
+    that eviction goes by.
+    """
+    def __init__(self, directory: str | None = None, max_bytes: int = DEFAULT_CACHE_SIZE):
+        """Initialize the cache; the directory is created on the first store.
+
+        Args:
+            directory: Cache directory (defaults to default_cache_dir())
+            max_bytes: Total size of entries kept
+
+        Raises:
+            ValueError: If max_bytes is negative
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Return the entry of key opened for reading, or None on a miss.
+
+        The open handle stays readable even if the entry is evicted meanwhile.
+        """
+        path = self._path(key)
+        try:
+            entry = open(path, mode='rb')
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def replay(self, entry: BinaryIO, handle: IO[str]) -> int:
+        """Copy an entry returned by open to a text handle and return the bytes copied."""
+        copied = 0
+        buffer = getattr(handle, "buffer", None)
+        if buffer is not None:
+            handle.flush()
+        for block in iter(lambda: entry.read(_COPY_SIZE), b""):
+            if buffer is not None:
+                buffer.write(block)
+            else:
+                handle.write(block.decode("utf-8"))
+            copied += len(block)
+        if buffer is not None:
+            buffer.flush()
+        return copied
+
+    @contextmanager
+    def record(self, key: str, handle: IO[str]) -> Iterator[IO[str]]:
+        """Store everything written to the yielded handle as the entry of key.
+
+        The yielded handle passes each write on to handle. The entry is
+        only kept when the block ends without an exception and it fits in
+        max_bytes; older entries are then evicted to make room for it. An
+        output larger than max_bytes is not recorded and evicts nothing.
+        If the cache directory is not writable, output is written without
+        recording.
+
+        Args:
+            key: Key from result_key
+            handle: Text handle receiving the output
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=_ENTRY_SUFFIX, dir=self.directory)
+        except OSError:
+            yield handle
+            return
+        entry = open(descriptor, mode='w', encoding="utf-8")
+        tee = _Tee(handle, entry, temp_path, self.max_bytes)
+        try:
+            yield tee
+        except BaseException:
+            _discard(entry, temp_path)
+            raise
+        if tee.entry is None:
+            return
+        try:
+            entry.close()
+            if os.path.getsize(temp_path) > self.max_bytes:
+                raise OSError("cache entry larger than the cache")
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            _discard(entry, temp_path)
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove the least recently used entries until they fit in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for dir_entry in scan:
+                    if dir_entry.name.endswith(_ENTRY_SUFFIX) and not dir_entry.name.startswith("."):
+                        try:
+                            status = dir_entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((status.st_mtime_ns, status.st_size, dir_entry.path))
+        except OSError:
+            return 0
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+import signal
+import socket
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .passwords import PasswordHasher
+from .user_manager import UserProfileManager
+from .user_profile import UserProfile
+from .validation import DEFAULT_VALIDATOR, FieldError
+
+OPERATIONS = ("sort", "get", "add", "remove", "count", "ping", "shutdown")
+# Keyword arguments of UserProfileManager.query accepted in a request's "where".
+QUERY_KEYS = ("country", "state", "city", "min_age", "max_age", "dob_from", "dob_to", "name_prefix")
+_INTEGER_KEYS = ("min_age", "max_age", "limit", "offset")
+# Longest request line or HTTP body accepted.
+MAX_REQUEST_SIZE = 2**24
+
+_HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class RequestError(ValueError):
+    """Raised when a request cannot be answered.
+
+    Attributes:
+        status: Matching HTTP status code
+        errors: Field errors of a rejected profile, as FieldError dictionaries
+    """
+    def __init__(self, message: str, status: int = 400, errors: Optional[List[dict]] = None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+class ProfileServer:
+    """Answers profile requests from a loaded UserProfileManager.
+
+    Requests are JSON objects with an "op" (one of OPERATIONS) and its
+    arguments:
+
+        {"op": "sort", "sort": "country,-age", "limit": 10, "offset": 0,
+         "where": {"country": "US", "min_age": 30}}
+        {"op": "get", "email": "..."}
+        {"op": "add", "profile": {...profile in the JSON input format...}}
+        {"op": "remove", "email": "..."}
+        {"op": "count"}, {"op": "ping"}, {"op": "shutdown"}
+
+    Every response has "ok"; failed requests carry an "error" message and
+    rejected profiles their field "errors". The same requests are accepted
+    as lines on a Unix socket and over HTTP (see serve).
+    """
+    def __init__(self, manager: UserProfileManager, hasher: Optional[PasswordHasher] = None):
+        """Initialize the server.
+
+        Args:
+            manager: Manager holding the profiles, already loaded
+            hasher: Optional PasswordHasher hashing the password of added profiles
+        """
+        self.manager = manager
+        self.hasher = hasher
+        self._stopping: Optional[asyncio.Event] = None
+
+    def handle(self, request: object) -> Tuple[int, dict]:
+        """Answer one request.
+
+        Args:
+            request: Decoded JSON request
+
+        Returns:
+            (status, response): an HTTP status code and the response object
+        """
+        try:
+            return 200, dict(ok=True, **self._dispatch(request))
+        except RequestError as e:
+            response = {"ok": False, "error": str(e)}
+            if e.errors:
+                response["errors"] = e.errors
+            return e.status, response
+        except ValueError as e:
+            return 400, {"ok": False, "error": str(e)}
+
+    def _dispatch(self, request: object) -> dict:
+        if not isinstance(request, dict):
+            raise RequestError("Request must be a JSON object")
+        operation = request.get("op")
+        if operation not in OPERATIONS:
+            raise RequestError(f"Unknown op: {operation!r} (expected one of {', '.join(OPERATIONS)})")
+        manager = self.manager
+        if operation == "sort":
+            return {"profiles": [profile.to_dict() for profile in self._sort(request)]}
+        if operation == "get":
+            profile = manager.get_profile(self._email(request))
+            if profile is None:
+                raise RequestError(f"No profile with email {request['email']}", 404)
+            return {"profile": profile.to_dict()}
+        if operation == "add":
+            profile_data = request.get("profile")
+            if isinstance(profile_data, dict) and "location" in profile_data \
+                    and not isinstance(profile_data["location"], dict):
+                # UserProfile.from_dict needs a location object to unpack.
+                errors = [FieldError("location", "type", "Location must be a JSON object")]
+            else:
+                errors = DEFAULT_VALIDATOR.validate_record(profile_data)
+            if errors:
+                raise RequestError("Invalid profile", errors=[error.to_dict() for error in errors])
+            profile = UserProfile.from_dict(profile_data)
+            if self.hasher is not None:
+                profile.password = self.hasher.hash(profile.password)
+            manager.add_profile(profile)
+            return {}
+        if operation == "remove":
+            try:
+                manager.remove_profile(self._email(request))
+            except ValueError as e:
+                raise RequestError(str(e), 404)
+            return {}
+        if operation == "count":
+            return {"count": len(manager.user_profiles)}
+        if operation == "shutdown" and self._stopping is not None:
+            self._stopping.set()
+        return {}
+
+    def _sort(self, request: dict) -> List[UserProfile]:
+        sort = request.get("sort", "age")
+        limit = request.get("limit")
+        offset = request.get("offset")
+        if offset is None:
+            offset = 0
+        where = request.get("where") or {}
+        if not isinstance(where, dict):
+            raise RequestError("where must be an object")
+        unknown = sorted(set(where) - set(QUERY_KEYS))
+        if unknown:
+            raise RequestError(f"Unknown where keys: {', '.join(unknown)}")
+        if not isinstance(sort, str):
+            raise RequestError("sort must be a string")
+        for key, value in (*request.items(), *where.items()):
+            if key in _INTEGER_KEYS and value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+                raise RequestError(f"{key} must be an integer")
+        for key, value in where.items():
+            if key not in _INTEGER_KEYS and value is not None and not isinstance(value, str):
+                raise RequestError(f"{key} must be a string")
+        if (limit is not None and limit < 0) or offset < 0:
+            raise RequestError("limit and offset must not be negative")
+        if where:
+            return self.manager.query(sort=sort, limit=limit, offset=offset, **where)
+        return self.manager.sort_profiles(sort, limit=limit, offset=offset)
+
+    @staticmethod
+    def _email(request: dict) -> str:
+        email = request.get("email")
+        if not isinstance(email, str):
+            raise RequestError("email must be a string")
+        return email
+
+    async def _handle_lines(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one Unix socket connection: a JSON request per line, a JSON response per line."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(_encode({"ok": False, "error": "Request too long"}) + b"\n")
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Invalid JSON: {e}"}
+                else:
+                    _, response = self.handle(request)
+                writer.write(_encode(response) + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one HTTP/1.1 connection, keeping it open between requests."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if not header.strip():
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_REQUEST_SIZE:
+                    # The body is not read, so the connection cannot be reused.
+                    headers["connection"] = "close"
+                    error = "Invalid Content-Length" if length < 0 else "Request too long"
+                    status, response = 400, {"ok": False, "error": error}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, response = self._http_request(request_line.decode("latin-1"), body)
+                payload = _encode(response)
+                writer.write(f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, 'Error')}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _http_request(self, request_line: str, body: bytes) -> Tuple[int, dict]:
+        """Map an HTTP request onto a request object and answer it.
+
+        Routes:
+            POST /                   any request object as the body
+            GET /profiles?sort=...   sort; other query parameters are "where" keys
+            GET /profiles/EMAIL      get
+            POST /profiles           add, with the profile as the body
+            DELETE /profiles/EMAIL   remove
+        """
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, {"ok": False, "error": "Malformed request line"}
+        url = urlsplit(target)
+        path = url.path.rstrip("/")
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError as e:
+            return 400, {"ok": False, "error": f"Invalid JSON: {e}"}
+        if path == "" and method == "POST":
+            return self.handle(payload)
+        if path == "/profiles" and method == "GET":
+            request = {"op": "sort", "where": {}}
+            for key, value in parse_qsl(url.query):
+                if key in _INTEGER_KEYS:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        return 400, {"ok": False, "error": f"{key} must be an integer"}
+                if key in ("sort", "limit", "offset"):
+                    request[key] = value
+                else:
+                    request["where"][key] = value
+            return self.handle(request)
+        if path == "/profiles" and method == "POST":
+            return self.handle({"op": "add", "profile": payload})
+        if path.startswith("/profiles/"):
+            email = unquote(path[len("/profiles/"):])
+            if method == "GET":
+                return self.handle({"op": "get", "email": email})
+            if method == "DELETE":
+                return self.handle({"op": "remove", "email": email})
+            return 405, {"ok": False, "error": f"Method {method} not allowed"}
+        return 404, {"ok": False, "error": f"No route for {method} {url.path}"}
+
+    async def serve(self, socket_path: Optional[str] = None, host: Optional[str] = None,
+                    port: Optional[int] = None, ready: Optional[Callable[[List[str]], None]] = None) -> None:
+        """Listen until a shutdown request, SIGINT or SIGTERM.
+
+        Args:
+            socket_path: Unix socket to serve the line protocol on
+            host: Interface to serve HTTP on (with port)
+            port: TCP port to serve HTTP on; 0 picks a free one
+            ready: Optional callback receiving the listening addresses
+                ("unix:PATH" or "http://HOST:PORT") once they accept connections
+
+        Raises:
+            ValueError: If neither a socket path nor a port is given
+        """
+        if socket_path is None and port is None:
+            raise ValueError("Give a Unix socket path or an HTTP port to serve on")
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        servers = []
+        addresses = []
+        if socket_path is not None:
+            servers.append(await asyncio.start_unix_server(self._handle_lines, socket_path,
+                                                           limit=MAX_REQUEST_SIZE))
+            addresses.append(f"unix:{socket_path}")
+        if port is not None:
+            server = await asyncio.start_server(self._handle_http, host or "127.0.0.1", port)
+            servers.append(server)
+            bound_host, bound_port = server.sockets[0].getsockname()[:2]
+            addresses.append(f"http://{bound_host}:{bound_port}")
+        handled_signals = []
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, self._stopping.set)
+                handled_signals.append(signal_number)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Not the main thread, or a platform without loop signal handlers.
+                pass
+        if ready is not None:
+            ready(addresses)
+        try:
+            await self._stopping.wait()
+        finally:
+            for signal_number in handled_signals:
+                loop.remove_signal_handler(signal_number)
+            for server in servers:
+                server.close()
+                await server.wait_closed()
+            self._stopping = None
+
+
+def _encode(response: dict) -> bytes:
+    return json.dumps(response, separators=(",", ":")).encode("utf-8")
+
+
+def send_request(request: dict, socket_path: Optional[str] = None, host: str = "127.0.0.1",
+                 port: Optional[int] = None, timeout: float = 60.0) -> dict:
+    """Send one request to a running server and return its response.
+
+    Args:
+        request: Request object (see ProfileServer)
+        socket_path: Unix socket of the server
+        host: HTTP host of the server, used when no socket path is given
+        port: HTTP port of the server
+        timeout: Seconds to wait for the response
+
+    Returns:
+        Decoded response object
+
+    Raises:
+        ValueError: If neither a socket path nor a port is given
+        OSError: If the server cannot be reached
+    """
+    if socket_path is not None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(timeout)
+            connection.connect(socket_path)
+            connection.sendall(_encode(request) + b"\n")
+            with connection.makefile("rb") as response_file:
+                return json.loads(response_file.readline())
+    if port is None:
+        raise ValueError("Give a Unix socket path or an HTTP port to connect to")
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("POST", "/", body=_encode(request), headers={"Content-Type": "application/json"})
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import repeat
+from collections.abc import MutableMapping, ValuesView
+from typing import Dict, Iterable, Iterator, Sequence, Tuple
+
+from .location import Location
+from .sorting import SortKeys, parse_sort_spec, sort_by_rows, sort_keys_for, spec_fields
+from .user_profile import UserProfile
+
+SNAPSHOT_MAGIC = b"UPSNAP\r\n"
+SNAPSHOT_VERSION = 1
+# Sort orders stored as precomputed permutations (the email order is the
+# email index itself).
+SNAPSHOT_ORDERS = ("age", "name", "location")
+
+# magic, version, reserved, profile count, string count, then the offsets of
+# the string offset table, string heap, record table, email index and orders.
+_HEADER = struct.Struct("<8sHHII5Q")
+# String ids of name, casefolded name, email, password, dob, city, state and
+# country, then the date of birth as a proleptic Gregorian ordinal.
+_RECORD = struct.Struct("<8Ii")
+
+
+class SnapshotError(ValueError):
+    """Raised when a file is not a readable profile snapshot."""
+
+
+def is_snapshot(path: str) -> bool:
+    """Return True if path starts with the snapshot magic bytes."""
+    try:
+        with open(path, mode='rb') as snapshot_file:
+            return snapshot_file.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path: str, profiles: Sequence[UserProfile], rows: Sequence[SortKeys] | None = None) -> int:
+    """Write validated profiles to a binary snapshot file.
+
+    Layout (all integers little-endian, every section 8-byte aligned):
+    a fixed header; a table of string offsets into a UTF-8 string heap in
+    which every distinct string is stored once; one fixed-width record of
+    string ids and the date-of-birth ordinal per profile, in the given
+    order; the record numbers sorted by email; and one permutation of the
+    record numbers for each of SNAPSHOT_ORDERS. The file is written next to
+    path and renamed into place, so readers never see a partial snapshot.
+
+    Args:
+        path: Destination path
+        profiles: Validated profiles in insertion order
+        rows: Sort keys of the profiles, computed here if not given
+
+    Returns:
+        Number of profiles written
+    """
+    profiles = list(profiles)
+    rows = [sort_keys_for(profile) for profile in profiles] if rows is None else list(rows)
+    string_ids: Dict[str, int] = {}
+    records = bytearray()
+    for profile, row in zip(profiles, rows):
+        location = profile.location
+        ids = [string_ids.setdefault(value, len(string_ids)) for value in (
+            profile.name, row.name, profile.email, profile.password, profile.dob,
+            location.city, location.state, location.country,
+        )]
+        records += _RECORD.pack(*ids, row.dob)
+
+    string_offsets = array('Q', [0])
+    heap = bytearray()
+    for value in string_ids:
+        heap += value.encode("utf-8", "surrogatepass")
+        string_offsets.append(len(heap))
+    count = len(profiles)
+    email_index = array('I', sorted(range(count), key=[row.email for row in rows].__getitem__))
+    orders = array('I')
+    for spec in SNAPSHOT_ORDERS:
+        orders.extend(sort_by_rows(list(range(count)), rows, parse_sort_spec(spec)))
+
+    sections = [_little_endian(string_offsets), bytes(heap), bytes(records),
+                _little_endian(email_index), _little_endian(orders)]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        position = _aligned(position)
+        offsets.append(position)
+        position += len(section)
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, mode='wb') as snapshot_file:
+        snapshot_file.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, count, len(string_ids), *offsets))
+        for offset, section in zip(offsets, sections):
+            snapshot_file.write(b"\0" * (offset - snapshot_file.tell()))
+            snapshot_file.write(section)
+    os.replace(temporary_path, path)
+    return count
+
+
+def _uint_view(buffer: memoryview, offset: int, count: int, typecode: str) -> Sequence[int]:
+    """Return count little-endian unsigned integers at offset without copying them."""
+    size = array(typecode).itemsize
+    section = buffer[offset:offset + count * size]
+    if sys.byteorder == "big":
+        values = array(typecode, section.tobytes())
+        values.byteswap()
+        return values
+    return section.cast(typecode)
+
+
+class Snapshot:
+    """A read-only, memory-mapped profile snapshot written by write_snapshot.
+
+    Opening a snapshot only maps the file and reads its header; records are
+    decoded when they are accessed. Profiles were validated before they
+    were written, so nothing is validated or parsed again.
+    """
+    def __init__(self, path: str):
+        """Open and map a snapshot.
+
+        Args:
+            path: Snapshot file path
+
+        Raises:
+            SnapshotError: If the file is not a snapshot of a supported version
+        """
+        self.path = path
+        with open(path, mode='rb') as snapshot_file:
+            try:
+                self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotError(f"Not a profile snapshot: {path}")
+        self._buffer = memoryview(self._mmap)
+        try:
+            magic, version, _, count, string_count, *offsets = _HEADER.unpack_from(self._buffer)
+        except struct.error:
+            magic = version = None
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            if magic == SNAPSHOT_MAGIC:
+                raise SnapshotError(f"Unsupported snapshot version {version}: {path}")
+            raise SnapshotError(f"Not a profile snapshot: {path}")
+        strings_offset, self._heap, self._records, email_offset, orders_offset = offsets
+        self._count = count
+        self._string_offsets = _uint_view(self._buffer, strings_offset, string_count + 1, 'Q')
+        self._email_index = _uint_view(self._buffer, email_offset, count, 'I')
+        self._orders = {
+            spec_fields(parse_sort_spec(spec)):
+                _uint_view(self._buffer, orders_offset + 4 * count * number, count, 'I')
+            for number, spec in enumerate(SNAPSHOT_ORDERS)
+        }
+        self._locations: Dict[Tuple[int, int, int], Location] = {}
+
+    def close(self) -> None:
+        """Unmap the file; profiles read from the snapshot become unusable."""
+        for view in (getattr(self, "_string_offsets", None), getattr(self, "_email_index", None),
+                     *getattr(self, "_orders", {}).values(), self._buffer):
+            if isinstance(view, memoryview):
+                view.release()
+        self._orders = {}
+        self._mmap.close()
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _string(self, string_id: int) -> str:
+        start = self._heap + self._string_offsets[string_id]
+        end = self._heap + self._string_offsets[string_id + 1]
+        return str(self._buffer[start:end], "utf-8", "surrogatepass")
+
+    def _record(self, row: int) -> tuple:
+        return _RECORD.unpack_from(self._buffer, self._records + row * _RECORD.size)
+
+    def email(self, row: int) -> str:
+        """Return the email of a record."""
+        return self._string(self._record(row)[2])
+
+    def find(self, email: str) -> int | None:
+        """Return the record number of email by binary search, or None."""
+        position = bisect_left(self._email_index, email, key=self.email)
+        if position < self._count and self.email(self._email_index[position]) == email:
+            return self._email_index[position]
+        return None
+
+    def field(self, row: int, field_number: int) -> str:
+        """Return one string field of a record, numbered as in the record layout."""
+        return self._string(self._record(row)[field_number])
+
+    def location(self, row: int) -> Location:
+        """Return the Location of a record; equal locations share one object."""
+        location_ids = self._record(row)[5:8]
+        location = self._locations.get(location_ids)
+        if location is None:
+            location = self._locations[location_ids] = Location(*map(self._string, location_ids))
+        return location
+
+    def sort_keys(self, row: int) -> SortKeys:
+        """Return the stored sort keys of a record without parsing any date."""
+        _, name_key, email, _, _, city, state, country, dob = self._record(row)
+        string = self._string
+        return SortKeys(dob, string(name_key), string(email), string(country), string(state), string(city))
+
+    def order(self, fields: Tuple[Tuple[int, bool], ...]) -> Sequence[int] | None:
+        """Return the stored record order for spec_fields(spec), or None if it was not stored."""
+        if fields == ((2, False),):
+            return self._email_index
+        return self._orders.get(fields)
+
+
+class SnapshotProfile(UserProfile):
+    """Read-only profile backed by one record of a Snapshot; fields are decoded on access."""
+    __slots__ = ("_snapshot", "_row")
+    # Shadows the UserProfile slot: the date of birth is parsed on access.
+    _parsed_dob = None
+
+    def __init__(self, snapshot: Snapshot, row: int):
+        """Initialize a profile.
+
+        Args:
+            snapshot: Snapshot that holds the record
+            row: Record number
+        """
+        self._snapshot = snapshot
+        self._row = row
+
+    @property
+    def name(self) -> str:
+        return self._snapshot.field(self._row, 0)
+
+    @property
+    def email(self) -> str:
+        return self._snapshot.field(self._row, 2)
+
+    @property
+    def password(self) -> str:
+        return self._snapshot.field(self._row, 3)
+
+    @property
+    def dob(self) -> str:
+        return self._snapshot.field(self._row, 4)
+
+    @property
+    def location(self) -> Location:
+        return self._snapshot.location(self._row)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SnapshotProfile):
+            return self._snapshot is other._snapshot and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self._snapshot), self._row))
+
+
+class SnapshotStore(MutableMapping):
+    """Profile mapping over a Snapshot with in-memory changes layered on top.
+
+    Lookups binary-search the snapshot's email index, so nothing is loaded
+    up front. Added profiles are kept in a dict and removed emails in a set;
+    the snapshot file itself is never modified. Iteration follows the
+    snapshot's record order, then the order of additions.
+    """
+    def __init__(self, snapshot: Snapshot):
+        """Initialize the store.
+
+        Args:
+            snapshot: Open snapshot
+        """
+        self.snapshot = snapshot
+        self._added: Dict[str, UserProfile] = {}
+        self._removed: set = set()
+
+    @property
+    def modified(self) -> bool:
+        """True once profiles have been added or removed since the snapshot was opened."""
+        return bool(self._added or self._removed)
+
+    def profiles(self, rows: Iterable[int]) -> Iterator[SnapshotProfile]:
+        """Return the profiles of snapshot records, in the order of rows."""
+        return map(SnapshotProfile, repeat(self.snapshot), rows)
+
+    def iter_sort_keys(self) -> Iterator[Tuple[str, SortKeys]]:
+        """Yield (email, sort keys) in iteration order, reading stored keys for snapshot records."""
+        for row in range(len(self.snapshot)):
+            sort_keys = self.snapshot.sort_keys(row)
+            if sort_keys.email not in self._removed:
+                yield sort_keys.email, sort_keys
+        for email, profile in self._added.items():
+            yield email, sort_keys_for(profile)
+
+    def __getitem__(self, email: str) -> UserProfile:
+        profile = self._added.get(email)
+        if profile is not None:
+            return profile
+        if email not in self._removed:
+            row = self.snapshot.find(email)
+            if row is not None:
+                return SnapshotProfile(self.snapshot, row)
+        raise KeyError(email)
+
+    def __setitem__(self, email: str, profile: UserProfile) -> None:
+        if email not in self._removed and self.snapshot.find(email) is not None:
+            self._removed.add(email)
+        self._added[email] = profile
+
+    def __delitem__(self, email: str) -> None:
+        if email in self._added:
+            del self._added[email]
+        elif email not in self._removed and self.snapshot.find(email) is not None:
+            self._removed.add(email)
+        else:
+            raise KeyError(email)
+
+    def __contains__(self, email) -> bool:
+        if email in self._added:
+            return True
+        return email not in self._removed and self.snapshot.find(email) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self.snapshot)):
+            email = self.snapshot.email(row)
+            if email not in self._removed:
+                yield email
+        yield from self._added
+
+    def __len__(self) -> int:
+        return len(self.snapshot) - len(self._removed) + len(self._added)
+
+    def values(self) -> ValuesView:
+        return _SnapshotValues(self)
+
+
+class _SnapshotValues(ValuesView):
+    """Values of a SnapshotStore, read by record number instead of by email lookup."""
+    def __iter__(self) -> Iterator[UserProfile]:
+        store = self._mapping
+        snapshot = store.snapshot
+        for row in range(len(snapshot)):
+            if not store._removed or snapshot.email(row) not in store._removed:
+                yield SnapshotProfile(snapshot, row)
+        yield from store._added.values()
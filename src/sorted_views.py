@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
+
+from .sorting import SortKeys, SortSpec, composite_key
+
+DEFAULT_CHUNK_SIZE = 512
+
+
+class SortedKeyList:
+    """A sorted list stored as a list of bounded, sorted chunks.
+
+    Works like a two-level B-tree: a binary search over the last element of
+    each chunk finds the chunk, and a binary search inside the chunk finds
+    the slot. Inserts and removals therefore shift at most a couple of
+    chunks' worth of pointers instead of the whole list.
+    """
+    def __init__(self, items: Iterable = (), chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Initialize the list.
+
+        Args:
+            items: Initial items, in any order
+            chunk_size: Target chunk length; chunks are split at twice this size
+        """
+        self._chunk_size = chunk_size
+        ordered = sorted(items)
+        self._chunks: List[list] = [ordered[start:start + chunk_size]
+                                    for start in range(0, len(ordered), chunk_size)]
+        self._maxes: List = [chunk[-1] for chunk in self._chunks]
+        self._length = len(ordered)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, item) -> None:
+        """Insert item at its sorted position."""
+        if not self._chunks:
+            self._chunks.append([item])
+            self._maxes.append(item)
+            self._length = 1
+            return
+        chunk_index = bisect_left(self._maxes, item)
+        if chunk_index == len(self._chunks):
+            chunk_index -= 1
+        chunk = self._chunks[chunk_index]
+        insort(chunk, item)
+        self._maxes[chunk_index] = chunk[-1]
+        self._length += 1
+        if len(chunk) > 2 * self._chunk_size:
+            self._chunks.insert(chunk_index + 1, chunk[self._chunk_size:])
+            del chunk[self._chunk_size:]
+            self._maxes.insert(chunk_index, chunk[-1])
+
+    def remove(self, item) -> None:
+        """Remove one occurrence of item.
+
+        Raises:
+            ValueError: If item is not in the list
+        """
+        chunk_index = bisect_left(self._maxes, item)
+        if chunk_index < len(self._chunks):
+            chunk = self._chunks[chunk_index]
+            position = bisect_left(chunk, item)
+            if position < len(chunk) and chunk[position] == item:
+                del chunk[position]
+                self._length -= 1
+                if chunk:
+                    self._maxes[chunk_index] = chunk[-1]
+                else:
+                    del self._chunks[chunk_index]
+                    del self._maxes[chunk_index]
+                return
+        raise ValueError("item not in list")
+
+    def islice(self, start: int = 0, stop: int | None = None) -> Iterator:
+        """Iterate over positions [start, stop) without walking the skipped chunks."""
+        chunk_index = 0
+        skipped = 0
+        while chunk_index < len(self._chunks) and skipped + len(self._chunks[chunk_index]) <= start:
+            skipped += len(self._chunks[chunk_index])
+            chunk_index += 1
+        items = (item for chunk in self._chunks[chunk_index:] for item in chunk)
+        return islice(items, start - skipped, None if stop is None else max(0, stop - skipped))
+
+
+class SortedView:
+    """Profiles kept in the order of one sort spec as they are added and removed.
+
+    Entries are (composite key, insertion sequence, email); the sequence
+    number breaks ties in insertion order, matching the stable
+    UserProfileManager.sort_profiles.
+    """
+    def __init__(self, spec: SortSpec, rows: Iterable[Tuple[SortKeys, int]] = ()):
+        """Build the view.
+
+        Args:
+            spec: Parsed sort spec
+            rows: (SortKeys, insertion sequence) pairs of the current profiles
+        """
+        self.spec = spec
+        self._key = composite_key(spec)
+        self._entries = SortedKeyList((self._key(row), sequence, row.email) for row, sequence in rows)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, row: SortKeys, sequence: int) -> None:
+        """Insert a profile in O(log n)."""
+        self._entries.add((self._key(row), sequence, row.email))
+
+    def remove(self, row: SortKeys, sequence: int) -> None:
+        """Remove a profile in O(log n)."""
+        self._entries.remove((self._key(row), sequence, row.email))
+
+    def emails(self, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        """Lazily yield the emails at sorted positions [start, stop)."""
+        return (email for _, _, email in self._entries.islice(start, stop))
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import heapq
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Sequence, Tuple, TypeVar
+
+from .dedup import DuplicateDetector
+from .user_profile import UserProfile
+
+
+class SortKeys(NamedTuple):
+    """Precomputed sort keys of one profile.
+
+    Attributes:
+        dob: Proleptic Gregorian ordinal of the date of birth
+        name: Casefolded name
+        email: Email address
+        country: Country code
+        state: State code
+        city: City name
+    """
+    dob: int
+    name: str
+    email: str
+    country: str
+    state: str
+    city: str
+
+
+# Positions in SortKeys compared for each sort key name. Every key sorts in
+# the same direction as the matching sort_profiles_by_* method; "age" puts
+# the oldest profiles first.
+SORT_FIELDS = {
+    "age": (0,),
+    "dob": (0,),
+    "name": (1,),
+    "email": (2,),
+    "location": (3, 4, 5),
+    "country": (3,),
+    "state": (4,),
+    "city": (5,),
+}
+
+SortSpec = List[Tuple[str, bool]]
+T = TypeVar("T")
+
+
+def sort_keys_for(profile: UserProfile) -> SortKeys:
+    """Compute the sort keys of a profile.
+
+    Raises:
+        ValueError: If the date of birth cannot be parsed
+    """
+    location = profile.location
+    return SortKeys(
+        profile.dob_ordinal,
+        profile.name.casefold(),
+        profile.email,
+        location.country,
+        location.state,
+        location.city,
+    )
+
+
+def parse_sort_spec(spec: str | Sequence[str]) -> SortSpec:
+    """Parse a sort specification such as "country,-age,name".
+
+    Keys are compared left to right. A leading "-" reverses the key's
+    default direction (for "age", "-age" lists the youngest first).
+
+    Args:
+        spec: Comma-separated string or sequence of key names
+
+    Returns:
+        List of (key name, reversed) pairs
+
+    Raises:
+        ValueError: If the spec is empty or names an unknown key
+    """
+    parts = spec.split(",") if isinstance(spec, str) else list(spec)
+    parsed = []
+    for part in parts:
+        part = part.strip()
+        descending = part.startswith("-")
+        key = part.lstrip("+-")
+        if key not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort key: {key or part}")
+        parsed.append((key, descending))
+    if not parsed:
+        raise ValueError("Sort spec must name at least one key")
+    return parsed
+
+
+def _runs(spec: SortSpec) -> List[Tuple[Tuple[int, ...], bool]]:
+    """Group consecutive keys with the same direction into (positions, reversed) runs."""
+    runs = []
+    for key, descending in spec:
+        positions = SORT_FIELDS[key]
+        if runs and runs[-1][1] == descending:
+            runs[-1] = (runs[-1][0] + positions, descending)
+        else:
+            runs.append((positions, descending))
+    return runs
+
+
+def sort_by_rows(items: List[T], rows: List[SortKeys], spec: SortSpec) -> List[T]:
+    """Return items ordered by their precomputed sort keys.
+
+    Consecutive keys with the same direction are compared in one pass;
+    each change of direction adds one more stable pass over a list of
+    positions, least significant first. Ties keep their original order.
+
+    Args:
+        items: Items to sort
+        rows: SortKeys of each item, in the same order as items
+        spec: Parsed sort spec
+
+    Returns:
+        New list with the items in sorted order
+    """
+    order = list(range(len(items)))
+    for positions, descending in reversed(_runs(spec)):
+        keys = list(map(itemgetter(*positions), rows))
+        order.sort(key=keys.__getitem__, reverse=descending)
+    return list(map(items.__getitem__, order))
+
+
+def spec_fields(spec: SortSpec) -> Tuple[Tuple[int, bool], ...]:
+    """Expand a parsed spec into (SortKeys position, reversed) pairs.
+
+    Specs that order profiles identically (e.g. "location" and
+    "country,state,city", or "age" and "dob") expand to the same fields.
+    """
+    return tuple((position, descending) for key, descending in spec for position in SORT_FIELDS[key])
+
+
+class _Reversed:
+    """Wraps a value so that it compares in reverse order."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other: _Reversed) -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Reversed) and self.value == other.value
+
+
+def composite_key(spec: SortSpec) -> Callable[[SortKeys], tuple]:
+    """Return a function mapping SortKeys to one comparable key for spec.
+
+    Needed where each element must carry a single key (heaps and k-way
+    merges); the key orders elements exactly like sort_by_rows. Reversed
+    date ordinals are negated and reversed strings wrapped in _Reversed.
+    """
+    fields = spec_fields(spec)
+    if not any(descending for _, descending in fields):
+        return itemgetter(*(position for position, _ in fields))
+
+    def key_function(row: SortKeys) -> tuple:
+        return tuple(
+            (-row[position] if position == 0 else _Reversed(row[position])) if descending else row[position]
+            for position, descending in fields
+        )
+    return key_function
+
+
+def select_rows(rows: Sequence[SortKeys], spec: SortSpec, limit: int | None, offset: int = 0) -> List[int]:
+    """Return the positions of one page of rows in sorted order.
+
+    Equivalent to taking [offset:offset + limit] of the stable sort of rows,
+    but when the page ends before the last row only offset + limit rows are
+    kept in a heap, which costs O(n log k) instead of a full sort.
+
+    Args:
+        rows: SortKeys to select from
+        spec: Parsed sort spec
+        limit: Maximum number of positions to return (None for all)
+        offset: Number of leading sorted rows to skip
+
+    Returns:
+        Positions into rows
+    """
+    if limit is None or offset + limit >= len(rows):
+        order = sort_by_rows(list(range(len(rows))), list(rows), spec)
+        return order[offset:] if limit is None else order[offset:offset + limit]
+    keys = list(map(composite_key(spec), rows))
+    # nsmallest breaks ties by input position, so the selection is stable.
+    return heapq.nsmallest(offset + limit, range(len(rows)), key=keys.__getitem__)[offset:]
+
+
+def select_top(profiles: Iterable[UserProfile], spec: str | Sequence[str], limit: int,
+               offset: int = 0, dedup: DuplicateDetector | None = None) -> Tuple[List[UserProfile], int]:
+    """Select one sorted page from a stream of profiles in bounded memory.
+
+    Only offset + limit profiles are held at any time, plus the set of
+    emails seen, used to drop later duplicates like UserProfileManager
+    does. That set grows with the number of distinct emails; pass a
+    DuplicateDetector with a path to keep them on disk instead.
+
+    Args:
+        profiles: Validated profiles in input order
+        spec: Sort spec (see UserProfileManager.sort_profiles)
+        limit: Page size
+        offset: Number of leading sorted profiles to skip
+        dedup: Optional DuplicateDetector keeping track of the seen emails
+            instead of the in-memory set
+
+    Returns:
+        (page, total): the selected profiles in sorted order and the number
+        of distinct profiles read
+
+    Raises:
+        ValueError: If the spec is invalid
+    """
+    key_function = composite_key(parse_sort_spec(spec))
+    seen_emails = set()
+    total = 0
+
+    def unique_profiles() -> Iterator[UserProfile]:
+        nonlocal total
+        if dedup is not None:
+            for profile in dedup.unique(profiles):
+                total += 1
+                yield profile
+            return
+        for profile in profiles:
+            if profile.email not in seen_emails:
+                seen_emails.add(profile.email)
+                yield profile
+        total = len(seen_emails)
+
+    if offset + limit <= 0:
+        # nsmallest would not read the stream at all; still count it.
+        for _ in unique_profiles():
+            pass
+        return [], total
+    top = heapq.nsmallest(offset + limit, unique_profiles(), key=lambda profile: key_function(sort_keys_for(profile)))
+    return top[offset:], total
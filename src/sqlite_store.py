@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import sqlite3
+from bisect import bisect_left, bisect_right
+from collections.abc import ValuesView
+from datetime import date
+from typing import Iterable, Iterator, List, Tuple
+
+from .location import Location
+from .profile_store import IndexedProfileStore
+from .sorting import SortSpec, sort_keys_for, spec_fields
+from .user_profile import UserProfile, age_on
+
+# Column holding each SortKeys position.
+_SORT_COLUMNS = ("dob_ordinal", "name_key", "email", "country", "state", "city")
+_PROFILE_COLUMNS = "name, email, password, dob, city, state, country"
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    seq INTEGER PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    password TEXT NOT NULL,
+    dob TEXT NOT NULL,
+    dob_ordinal INTEGER NOT NULL,
+    city TEXT NOT NULL,
+    state TEXT NOT NULL,
+    country TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_location ON profiles (country, state, city);
+CREATE INDEX IF NOT EXISTS profiles_dob ON profiles (dob_ordinal);
+CREATE INDEX IF NOT EXISTS profiles_name ON profiles (name_key);
+"""
+_ORDINALS = range(1, date.max.toordinal() + 1)
+
+
+def _row_values(profile: UserProfile) -> tuple:
+    """Return the column values of profile, in table order after seq."""
+    sort_keys = sort_keys_for(profile)
+    location = profile.location
+    return (profile.email, profile.name, sort_keys.name, profile.password, profile.dob, sort_keys.dob,
+            location.city, location.state, location.country)
+
+
+def _profile(row: tuple) -> UserProfile:
+    name, email, password, dob, city, state, country = row
+    return UserProfile(name=name, email=email, password=password, dob=dob, location=Location(city, state, country))
+
+
+def _order_by(spec: SortSpec) -> str:
+    """Translate a parsed sort spec into an ORDER BY clause; seq breaks ties."""
+    terms = [_SORT_COLUMNS[position] + (" DESC" if descending else "") for position, descending in spec_fields(spec)]
+    return " ORDER BY " + ", ".join(terms + ["seq"])
+
+
+def _limit(limit: int | None, offset: int) -> str:
+    if limit is None and offset == 0:
+        return ""
+    return f" LIMIT {-1 if limit is None else int(limit)} OFFSET {int(offset)}"
+
+
+def _age_ordinals(min_age: int | None, max_age: int | None, reference_date: date) -> Tuple[int, int]:
+    """Return the inclusive range of DOB ordinals whose age lies in [min_age, max_age].
+
+    Age never increases with the date of birth, so the range is found by
+    binary search over all possible ordinals.
+    """
+    def negative_age(ordinal: int) -> int:
+        return -age_on(date.fromordinal(ordinal), reference_date)
+    first = 0 if max_age is None else bisect_left(_ORDINALS, -max_age, key=negative_age)
+    last = len(_ORDINALS) if min_age is None else bisect_right(_ORDINALS, -min_age, key=negative_age)
+    return first + 1, last
+
+
+class SQLiteProfileStore(IndexedProfileStore):
+    """Profile storage in an SQLite database keyed by email address.
+
+    Profiles live in one table with indexes on email, location, date of
+    birth and casefolded name, so lookups, sorting by any sort_profiles key
+    and filtering run in SQLite instead of over in-memory copies. Dates of
+    birth are stored as ordinals next to the original text. An insertion
+    sequence column keeps iteration and ties in insertion order, like a
+    dict. Single changes are committed immediately; add_many inserts a whole
+    batch in one transaction.
+    """
+    def __init__(self, database: str = ":memory:"):
+        """Open or create a profile database.
+
+        Args:
+            database: Database file path, or ":memory:" for a private in-memory database
+        """
+        self.database = database
+        self._connection = sqlite3.connect(database, isolation_level=None)
+        if database != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+    def add_many(self, profiles: Iterable[UserProfile]) -> int:
+        """Insert profiles in one transaction; the first profile stored for an email wins.
+
+        Returns:
+            Number of profiles inserted
+        """
+        connection = self._connection
+        before = connection.total_changes
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "INSERT OR IGNORE INTO profiles"
+                " (email, name, name_key, password, dob, dob_ordinal, city, state, country)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                map(_row_values, profiles),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return connection.total_changes - before
+
+    def remove_many(self, emails: Iterable[str]) -> int:
+        """Delete profiles in one transaction; emails that are not stored are skipped.
+
+        Returns:
+            Number of profiles deleted
+        """
+        connection = self._connection
+        before = connection.total_changes
+        connection.execute("BEGIN")
+        try:
+            connection.executemany("DELETE FROM profiles WHERE email = ?", ((email,) for email in emails))
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return connection.total_changes - before
+
+    def _fetch(self, sql: str, parameters: Iterable = ()) -> Iterator[UserProfile]:
+        for row in self._connection.execute(sql, tuple(parameters)):
+            yield _profile(row)
+
+    def iter_sorted(self, spec: SortSpec, limit: int | None = None, offset: int = 0) -> Iterator[UserProfile]:
+        """Yield profiles in sort order, read through the matching index where there is one."""
+        return self._fetch(f"SELECT {_PROFILE_COLUMNS} FROM profiles" + _order_by(spec) + _limit(limit, offset))
+
+    def select(self, country: str | None = None, state: str | None = None, city: str | None = None,
+               dob_range: Tuple[int | None, int | None] | None = None,
+               age_range: Tuple[int | None, int | None, date] | None = None,
+               name_prefix: str | None = None, spec: SortSpec | None = None,
+               limit: int | None = None, offset: int = 0) -> List[UserProfile]:
+        """Return the profiles matching every given criterion, filtered and sorted by SQLite.
+
+        Args:
+            country, state, city: Exact location parts
+            dob_range: Inclusive (first, last) DOB ordinals, either may be None
+            age_range: Inclusive (min_age, max_age, reference_date)
+            name_prefix: Case-insensitive name prefix
+            spec: Optional parsed sort spec
+            limit: Maximum number of profiles to return (None for all)
+            offset: Number of leading profiles to skip
+
+        Returns:
+            Matching profiles, sorted by spec or else in insertion order
+        """
+        conditions = []
+        parameters = []
+        for column, value in (("country", country), ("state", state), ("city", city)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        bounds = [dob_range or (None, None)]
+        if age_range is not None:
+            bounds.append(_age_ordinals(*age_range))
+        for first, last in bounds:
+            if first is not None:
+                conditions.append("dob_ordinal >= ?")
+                parameters.append(first)
+            if last is not None:
+                conditions.append("dob_ordinal <= ?")
+                parameters.append(last)
+        if name_prefix is not None:
+            prefix = name_prefix.casefold()
+            # The range lets SQLite use the name index; substr makes the match exact.
+            conditions.append("name_key >= ? AND name_key < ? AND substr(name_key, 1, ?) = ?")
+            parameters.extend((prefix, prefix + "\U0010ffff", len(prefix), prefix))
+        sql = f"SELECT {_PROFILE_COLUMNS} FROM profiles"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += (_order_by(spec) if spec is not None else " ORDER BY seq") + _limit(limit, offset)
+        return list(self._fetch(sql, parameters))
+
+    def __getitem__(self, email: str) -> UserProfile:
+        row = self._connection.execute(f"SELECT {_PROFILE_COLUMNS} FROM profiles WHERE email = ?",
+                                       (email,)).fetchone()
+        if row is None:
+            raise KeyError(email)
+        return _profile(row)
+
+    def __setitem__(self, email: str, profile: UserProfile) -> None:
+        values = _row_values(profile)
+        self._connection.execute(
+            "INSERT INTO profiles (email, name, name_key, password, dob, dob_ordinal, city, state, country)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (email) DO UPDATE SET"
+            " name = excluded.name, name_key = excluded.name_key, password = excluded.password,"
+            " dob = excluded.dob, dob_ordinal = excluded.dob_ordinal, city = excluded.city,"
+            " state = excluded.state, country = excluded.country",
+            (email, *values[1:]),
+        )
+
+    def __delitem__(self, email: str) -> None:
+        if self._connection.execute("DELETE FROM profiles WHERE email = ?", (email,)).rowcount == 0:
+            raise KeyError(email)
+
+    def __contains__(self, email) -> bool:
+        return self._connection.execute("SELECT 1 FROM profiles WHERE email = ?", (email,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (email,) in self._connection.execute("SELECT email FROM profiles ORDER BY seq"):
+            yield email
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT count(*) FROM profiles").fetchone()[0]
+
+    def values(self) -> ValuesView:
+        return _SQLiteValues(self)
+
+
+class _SQLiteValues(ValuesView):
+    """Values of an SQLiteProfileStore, read with one query instead of a lookup per email."""
+    def __iter__(self) -> Iterator[UserProfile]:
+        return self._mapping._fetch(f"SELECT {_PROFILE_COLUMNS} FROM profiles ORDER BY seq")
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from .validation import RecordReport, RejectWriter
+
+T = TypeVar("T")
+
+# Functions listed in the "profile" section of the report.
+PROFILE_TOP = 25
+
+
+class _Stage:
+    """Context manager adding the time spent inside it to one timer."""
+    __slots__ = ("_timers", "_name", "_start")
+
+    def __init__(self, timers: Dict[str, float], name: str):
+        self._timers = timers
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._timers[self._name] = self._timers.get(self._name, 0.0) + time.perf_counter() - self._start
+
+
+class PipelineStats:
+    """Timers and counters collected while profiles are processed.
+
+    Instrumented code takes an optional PipelineStats and does nothing
+    extra when it is None. Timers accumulate, so a stage entered once per
+    batch reports its total. Counters are updated per batch or per stage
+    where possible; only rejected records are counted one by one.
+
+    Counters:
+        accepted: Records that passed validation
+        rejected: Records that failed validation
+        rejected.<field>: Rejected records with an error in field
+        duplicates: Valid records dropped because their email was already stored
+    """
+    def __init__(self):
+        self.timers: Dict[str, float] = {}
+        self.counters: Counter = Counter()
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def stage(self, name: str) -> _Stage:
+        """Return a context manager that adds its running time to timer name."""
+        return _Stage(self.timers, name)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add amount to counter name."""
+        self.counters[name] += amount
+
+    def count_rejected(self, report: RecordReport) -> None:
+        """Count one rejected record and each field it failed on."""
+        self.counters["rejected"] += 1
+        for field in dict.fromkeys(report.fields):
+            self.counters[f"rejected.{field}"] += 1
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from items, adding the time spent producing them to timer name."""
+        iterator = iter(items)
+        stage = self.stage(name)
+        while True:
+            with stage:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def counted(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from items, counting them in counter name."""
+        count = 0
+        try:
+            for item in items:
+                count += 1
+                yield item
+        finally:
+            self.counters[name] += count
+
+    @contextmanager
+    def profiling(self) -> Iterator[None]:
+        """Run the enclosed code under cProfile (see write_profile and to_dict)."""
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        try:
+            yield
+        finally:
+            self._profiler.disable()
+
+    def write_profile(self, path: str) -> None:
+        """Save the cProfile data in pstats format, readable with pstats or snakeviz."""
+        if self._profiler is not None:
+            self._profiler.dump_stats(path)
+
+    def _profile_top(self) -> List[dict]:
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        entries = sorted(stats.stats.items(), key=lambda entry: entry[1][3], reverse=True)
+        return [
+            {
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "seconds": own_time,
+                "cumulative_seconds": cumulative_time,
+            }
+            for (filename, line, function), (_, calls, own_time, cumulative_time, _) in entries[:PROFILE_TOP]
+        ]
+
+    def to_dict(self) -> dict:
+        """Return the report as a JSON-serializable dictionary.
+
+        "read" is derived as accepted + rejected; with profiling on, the
+        functions with the highest cumulative time are listed too.
+        """
+        counters = {"read": self.counters["accepted"] + self.counters["rejected"]}
+        counters.update(sorted(self.counters.items()))
+        report = {"timers": dict(self.timers), "counters": counters}
+        if self._profiler is not None:
+            report["profile"] = self._profile_top()
+        return report
+
+    def write(self, path: str) -> None:
+        """Write the report to a JSON file."""
+        with open(path, mode='w') as stats_file:
+            json.dump(self.to_dict(), stats_file, indent=4)
+
+
+class StatsRejectSink:
+    """Reject sink that counts rejected records before passing them on."""
+    def __init__(self, stats: PipelineStats, rejects: RejectWriter | None = None):
+        self.stats = stats
+        self.rejects = rejects
+
+    def write(self, report: RecordReport) -> None:
+        """Count one rejected record and forward it to the wrapped writer."""
+        self.stats.count_rejected(report)
+        if self.rejects is not None:
+            self.rejects.write(report)
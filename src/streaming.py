@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+from contextlib import nullcontext
+from typing import IO, Iterable, Iterator, List
+
+from .stats import PipelineStats
+from .user_profile import UserProfile
+from .validation import DEFAULT_VALIDATOR, ProfileValidator, RejectWriter
+
+INPUT_FORMATS = ("auto", "json", "ndjson")
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_READ_SIZE = 1 << 16
+# Largest single JSON value (one profile) buffered before the input is rejected.
+MAX_RECORD_SIZE = 1 << 24
+_WHITESPACE = " \t\n\r"
+# A decode error this close to the end of the buffer may only mean the value
+# is cut short, e.g. inside a literal or a \\uXXXX escape.
+_TRUNCATION_MARGIN = 12
+
+
+class InputFormatError(ValueError):
+    """Raised when an input file does not match the requested input format."""
+
+
+class _JSONStreamReader:
+    """Incrementally decodes top-level JSON values from a text file handle.
+
+    Only a bounded window of the file is buffered at any time: consumed text
+    is dropped as soon as the value it belongs to has been decoded, and a
+    malformed value fails without reading further.
+    """
+    def __init__(self, handle: IO[str], read_size: int = DEFAULT_READ_SIZE,
+                 max_record_size: int = MAX_RECORD_SIZE):
+        """Initialize the reader.
+
+        Args:
+            handle: Text file handle positioned at the start of the input
+            read_size: Number of characters to read per refill
+            max_record_size: Largest number of characters one value may span
+        """
+        self._handle = handle
+        self._read_size = read_size
+        self._max_record_size = max_record_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        """Read more text into the buffer, discarding the consumed prefix.
+
+        Returns:
+            True if any text was read, False at end of file
+        """
+        if self._eof:
+            return False
+        chunk = self._handle.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            buffer_length = len(self._buffer)
+            while self._pos < buffer_length and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < buffer_length:
+                return self._buffer[self._pos]
+            if not self._fill(self._read_size):
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consume char as the next non-whitespace character.
+
+        Raises:
+            json.JSONDecodeError: If a different character (or end of file) follows
+        """
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def decode(self) -> object:
+        """Decode the next JSON value, reading more input as needed.
+
+        Raises:
+            json.JSONDecodeError: If the value is malformed or truncated
+            InputFormatError: If the value spans more than max_record_size characters
+        """
+        self.peek()
+        read_size = self._read_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                # Only a value cut off by the end of the buffer can be completed by reading more.
+                truncated = e.pos >= len(self._buffer) - _TRUNCATION_MARGIN or e.msg.startswith("Unterminated")
+                if not truncated:
+                    raise
+                if len(self._buffer) - self._pos > self._max_record_size:
+                    raise InputFormatError(f"JSON value longer than {self._max_record_size} characters") from None
+                if not self._fill(read_size):
+                    raise
+                read_size = min(read_size * 2, self._max_record_size)
+                continue
+            # A number or literal ending exactly at the buffer edge may be cut short.
+            if end == len(self._buffer) and self._buffer[self._pos] not in '{["' and self._fill(read_size):
+                continue
+            self._pos = end
+            return value
+
+
+def _iter_json_array(reader: _JSONStreamReader) -> Iterator[object]:
+    """Yield the elements of a top-level JSON array one at a time."""
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.expect("]")
+        return
+    while True:
+        yield reader.decode()
+        if reader.peek() == "]":
+            reader.expect("]")
+            return
+        reader.expect(",")
+
+
+def _iter_json_values(reader: _JSONStreamReader) -> Iterator[object]:
+    """Yield whitespace-separated top-level JSON values (a single object or NDJSON)."""
+    while reader.peek():
+        yield reader.decode()
+
+
+def _iter_json_document(reader: _JSONStreamReader) -> Iterator[object]:
+    """Yield the profile items of a single JSON document (an object or an array)."""
+    first_char = reader.peek()
+    if first_char == "[":
+        yield from _iter_json_array(reader)
+    elif first_char == "{":
+        yield reader.decode()
+    else:
+        raise InputFormatError("JSON file must contain a dictionary or list")
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader._buffer, reader._pos)
+
+
+def _iter_ndjson(handle: IO[str]) -> Iterator[object]:
+    """Yield one decoded JSON value per non-blank line."""
+    for line_number, line in enumerate(handle, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"line {line_number}: {e.msg}", e.doc, e.pos) from None
+
+
+def iter_profile_items(json_file: str, input_format: str = "auto",
+                       read_size: int = DEFAULT_READ_SIZE) -> Iterator[object]:
+    """Yield raw profile items from a JSON or NDJSON file without loading it whole.
+
+    Formats:
+    - "json": a single profile object or a top-level array of profiles
+    - "ndjson": one profile object per line
+    - "auto": an array is read as "json", anything starting with "{" is read
+      as a sequence of objects (which covers both a single object and NDJSON)
+
+    Args:
+        json_file: Path to the input file
+        input_format: One of INPUT_FORMATS
+        read_size: Number of characters read from the file at a time
+
+    Yields:
+        Decoded items, normally dictionaries
+
+    Raises:
+        InputFormatError: If the file content does not fit the format
+        json.JSONDecodeError: If the file is not well-formed JSON
+    """
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"Unknown input format: {input_format}")
+    with open(json_file, mode='r') as input_file:
+        if input_format == "ndjson":
+            yield from _iter_ndjson(input_file)
+            return
+        reader = _JSONStreamReader(input_file, read_size)
+        if input_format == "json":
+            yield from _iter_json_document(reader)
+            return
+        first_char = reader.peek()
+        if first_char == "[":
+            yield from _iter_json_document(reader)
+        elif first_char == "{":
+            yield from _iter_json_values(reader)
+        elif first_char:
+            raise InputFormatError("JSON file must contain a dictionary or list")
+
+
+def iter_batches(items: Iterable[object], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[object]]:
+    """Group items into lists of at most batch_size elements.
+
+    Args:
+        items: Any iterable
+        batch_size: Maximum number of items per batch (must be positive)
+
+    Yields:
+        Lists of consecutive items
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_profiles(json_file: str, input_format: str = "auto", batch_size: int = DEFAULT_BATCH_SIZE,
+                  validator: ProfileValidator | None = None,
+                  rejects: RejectWriter | None = None, stats: PipelineStats | None = None) -> Iterator[UserProfile]:
+    """Stream validated profiles from a file, one batch of raw items at a time.
+
+    At most batch_size raw items are held in memory at once. Each batch is
+    validated in one pass; rejected items are skipped silently or, if a
+    RejectWriter is given, written to its quarantine file.
+
+    Args:
+        json_file: Path to the input file
+        input_format: One of INPUT_FORMATS
+        batch_size: Number of raw items validated together
+        validator: ProfileValidator to use (defaults to the shared validator)
+        rejects: Optional sink for rejected records
+        stats: Optional PipelineStats timing the "parse" and "validate" stages
+
+    Yields:
+        Validated UserProfile objects in file order
+    """
+    if validator is None:
+        validator = DEFAULT_VALIDATOR
+    start_index = 0
+    batches = iter_batches(iter_profile_items(json_file, input_format), batch_size)
+    if stats is not None:
+        batches = stats.timed("parse", batches)
+    for batch in batches:
+        with nullcontext() if stats is None else stats.stage("validate"):
+            reports = {report.index: report for report in validator.validate_batch(batch, start_index)}
+        for index, profile_item in enumerate(batch, start=start_index):
+            report = reports.get(index)
+            if report is None:
+                yield UserProfile.from_dict(profile_item)
+            elif rejects is not None:
+                rejects.write(report)
+        start_index += len(batch)
@@ -1,18 +1,140 @@
 from __future__ import annotations
 
 import json
-from .location import Location
+import os
+import threading
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Iterator, List, Sequence
+
+from .dates import parse_dob
+from .dedup import DuplicateDetector
+from .indexes import ProfileIndexes
+from .ingest import FileReport, iter_files_profiles
+from .journal import ADD, DEFAULT_COMPACT_EVERY, DEFAULT_SYNC_EVERY, ProfileJournal, replay
+from .parallel import iter_profiles_parallel
+from .passwords import PasswordHasher, verify_password
+from .profile_store import CompactProfileStore, IndexedProfileStore
+from .snapshot import Snapshot, SnapshotStore, write_snapshot
+from .sorted_views import SortedView
+from .sqlite_store import SQLiteProfileStore
+from .stats import PipelineStats, StatsRejectSink
+from .sorting import SortKeys, parse_sort_spec, select_rows, sort_by_rows, sort_keys_for, spec_fields
+from .streaming import DEFAULT_BATCH_SIZE, InputFormatError, iter_batches, iter_profiles
 from .user_profile import UserProfile
+from .validation import DEFAULT_VALIDATOR, HASHED_INPUT_VALIDATOR, RecordReport, RejectWriter, is_password_hash
+
+STORAGE_ENGINES = ("dict", "compact", "sqlite")
+
+
+@dataclass
+class BulkResult:
+    """Outcome of UserProfileManager.add_profiles, remove_profiles or a load.
+
+    Attributes:
+        accepted: Profiles added, or for remove_profiles, profiles removed
+        rejected: Profiles that failed validation
+        duplicates: Profiles whose email was already stored or came earlier
+            in the same call, or emails repeated in a remove_profiles call
+        missing: Emails given to remove_profiles that were not stored
+        committed: False if an all-or-nothing call changed nothing
+        error: Why a load stopped before the end of its input, or None
+    """
+    accepted: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+    missing: int = 0
+    committed: bool = True
+    error: str | None = None
+
+    @property
+    def partial(self) -> bool:
+        """True if a load failed after some of its records were read."""
+        return self.error is not None and self.accepted + self.rejected + self.duplicates > 0
+
+    def to_dict(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "missing": self.missing,
+            "committed": self.committed,
+            "error": self.error,
+            "partial": self.partial,
+        }
+
+
+class _RejectCounter:
+    """Reject sink that counts rejected records in a BulkResult before passing them on."""
+    def __init__(self, result: BulkResult, rejects=None):
+        self.result = result
+        self.rejects = rejects
+
+    def write(self, report: RecordReport) -> None:
+        self.result.rejected += 1
+        if self.rejects is not None:
+            self.rejects.write(report)
+
+
+def _until_input_error(profiles: Iterator[UserProfile], result: BulkResult) -> Iterator[UserProfile]:
+    """Yield profiles until the input turns out to be malformed, which is recorded in result.error.
+    
+    The profiles read before the problem are kept, as a clean end of the
+    input lets add_profiles store its last, partial batch.
+    """
+    try:
+        yield from profiles
+    except InputFormatError as e:
+        result.error = str(e)
+
 
 class UserProfileManager:
     """Manages a collection of user profiles with CRUD operations and sorting.
     
     Provides methods to add, remove, retrieve, and sort user profiles.
-    Profiles are stored in a dictionary keyed by email address.
+    Profiles are stored in a mapping keyed by email address: a plain dict of
+    UserProfile objects by default, a column-oriented CompactProfileStore
+    that hands out lightweight ProfileView objects, or an SQLiteProfileStore
+    that keeps them on disk. Any other MutableMapping can be plugged in;
+    stores derived from IndexedProfileStore do their own sorting and
+    filtering.
     """
-    def __init__(self):
-        """Initialize an empty UserProfileManager."""
-        self.user_profiles = {}
+    def __init__(self, storage: str | MutableMapping = "dict", database: str = ":memory:",
+                 stats: PipelineStats | None = None):
+        """Initialize a UserProfileManager.
+        
+        Args:
+            storage: Storage engine, "dict" (default), "compact" or "sqlite",
+                or an empty-or-populated MutableMapping of profiles by email
+            database: SQLite database path for the "sqlite" engine; profiles
+                already in the database are kept
+            stats: Optional PipelineStats recording load timings and counters
+            
+        Raises:
+            ValueError: If the storage engine is unknown
+        """
+        if isinstance(storage, MutableMapping):
+            self.user_profiles = storage
+        elif storage == "dict":
+            self.user_profiles = {}
+        elif storage == "compact":
+            self.user_profiles = CompactProfileStore()
+        elif storage == "sqlite":
+            self.user_profiles = SQLiteProfileStore(database)
+        else:
+            raise ValueError(f"Unknown storage engine: {storage}")
+        self._sort_keys = {}
+        self._indexes = None
+        self._sorted_views = {}
+        self._sequences = {}
+        self._next_sequence = 0
+        self._journal = None
+        self._journal_snapshot = None
+        self._compact_every = None
+        self._compaction = None
+        self._compaction_error = None
+        self.stats = stats
         
     def add_profile(self, profile: UserProfile) -> None:
         """Add a validated profile to the manager.
@@ -24,12 +146,40 @@ class UserProfileManager:
             ValueError: If profile is invalid or email already exists
         """
         if profile.validate():
-            if profile.email in self.user_profiles:
-                raise ValueError(f"Profile with email {profile.email} already exists")
-            self.user_profiles[profile.email] = profile
+            self._insert_profile(profile)
             return
         raise ValueError(f"Failed to add profile for '{profile.email}'")
 
+    def _insert_profile(self, profile: UserProfile) -> None:
+        """Store an already validated profile.
+        
+        Raises:
+            ValueError: If a profile with the same email already exists
+        """
+        if profile.email in self.user_profiles:
+            raise ValueError(f"Profile with email {profile.email} already exists")
+        self._store_profile(profile)
+
+    def _store_profile(self, profile: UserProfile) -> None:
+        """Store a validated profile whose email is not stored yet."""
+        if isinstance(self.user_profiles, IndexedProfileStore):
+            self.user_profiles[profile.email] = profile
+            return
+        sort_keys = sort_keys_for(profile)
+        if self._journal is not None:
+            self._journal.append_add(profile)
+        self.user_profiles[profile.email] = profile
+        self._sort_keys[profile.email] = sort_keys
+        if self._indexes is not None:
+            self._indexes.add(sort_keys)
+        if self._sorted_views:
+            sequence = self._sequences[profile.email] = self._next_sequence
+            self._next_sequence += 1
+            for view in self._sorted_views.values():
+                view.add(sort_keys, sequence)
+        if self._journal is not None:
+            self._compact_if_due()
+
     def get_profile(self, email: str) -> UserProfile | None:
         """Retrieve a profile by email address.
         
@@ -41,6 +191,19 @@ class UserProfileManager:
         """
         return self.user_profiles.get(email, None)
 
+    def verify_password(self, email: str, password: str) -> bool:
+        """Check a password against the stored (hashed or plaintext) password of a profile.
+        
+        Args:
+            email: Email address of the profile
+            password: Password to check
+            
+        Returns:
+            True if the profile exists and the password matches, False otherwise
+        """
+        profile = self.user_profiles.get(email, None)
+        return profile is not None and verify_password(password, profile.password)
+
     def remove_profile(self, email: str) -> None:
         """Remove a profile by email address.
         
@@ -51,26 +214,394 @@ class UserProfileManager:
             ValueError: If profile with email does not exist
         """
         if email in self.user_profiles:
-            del self.user_profiles[email]
+            self._delete_profile(email)
             return
         raise ValueError(f"Failed to remove profile for '{email}'")
 
+    def _delete_profile(self, email: str) -> None:
+        """Remove the stored profile of email."""
+        if self._journal is not None:
+            self._journal.append_remove(email)
+        del self.user_profiles[email]
+        sort_keys = self._sort_keys.pop(email, None)
+        if self._indexes is not None and sort_keys is not None:
+            self._indexes.remove(sort_keys)
+        sequence = self._sequences.pop(email, None)
+        if sequence is not None and sort_keys is not None:
+            for view in self._sorted_views.values():
+                view.remove(sort_keys, sequence)
+        if self._journal is not None:
+            self._compact_if_due()
+
+    def add_profiles(self, profiles: Iterable[UserProfile], atomic: bool = False,
+                     batch_size: int = DEFAULT_BATCH_SIZE, rejects: RejectWriter | None = None,
+                     validate: bool = True, hasher: PasswordHasher | None = None) -> BulkResult:
+        """Add many profiles, validating them in batches instead of raising for each bad one.
+        
+        Invalid profiles are counted as rejected, and written to rejects if
+        it is given. Profiles whose email is already stored, or came
+        earlier in profiles, are counted as duplicates; the first
+        occurrence wins. Indexed storage backends store each batch in one
+        transaction.
+        
+        With atomic=True the profiles are stored only if none is rejected
+        or a duplicate. Otherwise nothing changes, committed is False and
+        the counts tell what was wrong. All profiles are then held in
+        memory until every one is checked, and indexed backends store them
+        in a single transaction.
+        
+        Args:
+            profiles: Profiles to add
+            atomic: Store all profiles or none
+            batch_size: Number of profiles validated and stored together
+            rejects: Optional RejectWriter receiving invalid profiles, indexed
+                by their position in profiles
+            validate: Validate the profiles; pass False for profiles that were
+                validated when they were read
+            hasher: Optional PasswordHasher replacing the passwords of the
+                accepted profiles with their hashes before they are stored;
+                rejected and duplicate profiles are never hashed
+            
+        Returns:
+            BulkResult counting the accepted, rejected and duplicate profiles
+        """
+        result = BulkResult()
+        self._add_profiles(profiles, result, atomic, batch_size, rejects, validate, hasher)
+        return result
+
+    def _add_profiles(self, profiles: Iterable[UserProfile], result: BulkResult, atomic: bool,
+                      batch_size: int, rejects, validate: bool, hasher: PasswordHasher | None = None) -> None:
+        """Add profiles as add_profiles does, counting into result as they go."""
+        store = self.user_profiles
+        indexed = isinstance(store, IndexedProfileStore)
+        # Indexed backends skip stored emails themselves in add_many, saving a lookup per profile,
+        # but a password hash costs far more than the lookup.
+        batches = self._checked_batches(profiles, result, batch_size, rejects, validate,
+                                        check_store=atomic or not indexed or hasher is not None, whole_call=atomic)
+        if atomic:
+            pending = [profile for batch in batches for profile in batch]
+            if result.rejected or result.duplicates:
+                result.committed = False
+                return
+            batches = [pending]
+        for batch in batches:
+            if hasher is not None:
+                # Each batch is hashed before the next one is checked against the store.
+                batch = list(hasher.hash_profiles(batch, self.stats))
+            if indexed:
+                stored = store.add_many(batch)
+                result.duplicates += len(batch) - stored
+                result.accepted += stored
+                continue
+            for profile in batch:
+                self._store_profile(profile)
+            result.accepted += len(batch)
+
+    def _checked_batches(self, profiles: Iterable[UserProfile], result: BulkResult, batch_size: int, rejects,
+                         validate: bool, check_store: bool, whole_call: bool) -> Iterator[List[UserProfile]]:
+        """Yield each batch of profiles without the invalid and duplicate ones, counting those in result.
+        
+        Earlier batches are already stored when a batch is checked against
+        the store, unless whole_call is set; then emails are remembered
+        across all batches.
+        """
+        store = self.user_profiles
+        validate_profile = DEFAULT_VALIDATOR.validate_profile
+        seen = set()
+        index = 0
+        for batch in iter_batches(profiles, batch_size):
+            if not whole_call:
+                seen = set()
+            checked = []
+            for offset, profile in enumerate(batch):
+                if validate:
+                    errors = validate_profile(profile)
+                    if errors:
+                        result.rejected += 1
+                        if rejects is not None:
+                            rejects.write(RecordReport(index + offset, errors, profile.to_dict()))
+                        continue
+                email = profile.email
+                if email in seen or (check_store and email in store):
+                    result.duplicates += 1
+                    continue
+                seen.add(email)
+                checked.append(profile)
+            index += len(batch)
+            yield checked
+
+    def remove_profiles(self, emails: Iterable[str], atomic: bool = False) -> BulkResult:
+        """Remove the profiles of many emails in one pass.
+        
+        Emails that are not stored are counted as missing and repeated ones
+        as duplicates. Indexed storage backends remove the profiles in one
+        transaction. With atomic=True the profiles are removed only if
+        every email is stored; otherwise nothing changes and committed is
+        False.
+        
+        Args:
+            emails: Email addresses of the profiles to remove
+            atomic: Remove all profiles or none
+            
+        Returns:
+            BulkResult counting the removed (accepted), missing and duplicate emails
+        """
+        result = BulkResult()
+        store = self.user_profiles
+        seen = set()
+        stored = []
+        for email in emails:
+            if email in seen:
+                result.duplicates += 1
+                continue
+            seen.add(email)
+            if email in store:
+                stored.append(email)
+            else:
+                result.missing += 1
+        if atomic and result.missing:
+            result.committed = False
+            return result
+        if isinstance(store, IndexedProfileStore):
+            result.accepted = store.remove_many(stored)
+            return result
+        for email in stored:
+            self._delete_profile(email)
+        result.accepted = len(stored)
+        return result
+
+    def _sort_key_rows(self) -> list[SortKeys]:
+        """Return the cached sort keys of every profile, in insertion order.
+        
+        Keys are computed when a profile is added; they are rebuilt here only
+        if profiles were added to or removed from user_profiles directly.
+        """
+        self._sync_sort_keys()
+        return list(self._sort_keys.values())
+
+    def _sync_sort_keys(self) -> None:
+        """Rebuild cached sort keys, indexes and sorted views if user_profiles was changed directly."""
+        if len(self._sort_keys) != len(self.user_profiles):
+            if isinstance(self.user_profiles, SnapshotStore):
+                self._sort_keys = dict(self.user_profiles.iter_sort_keys())
+            else:
+                self._sort_keys = {email: sort_keys_for(profile) for email, profile in self.user_profiles.items()}
+            self._indexes = None
+            if self._sorted_views:
+                self._sequences = {}
+                self._sorted_views = {fields: self._build_sorted_view(view.spec)
+                                      for fields, view in self._sorted_views.items()}
+
+    def _build_sorted_view(self, parsed_spec) -> SortedView:
+        """Build a sorted view of the current profiles, numbering them in insertion order if needed."""
+        if not self._sequences:
+            self._sequences = {email: sequence for sequence, email in enumerate(self._sort_keys)}
+            self._next_sequence = len(self._sequences)
+        sequences = self._sequences
+        return SortedView(parsed_spec, ((row, sequences[email]) for email, row in self._sort_keys.items()))
+
+    def enable_sorted_view(self, spec: str | Sequence[str]) -> None:
+        """Keep the profiles continuously sorted by spec.
+        
+        The view is built once (O(n log n)) and then updated in O(log n)
+        by every add_profile and remove_profile, so sort_profiles and
+        iter_sorted with an equivalent spec no longer sort at all. Worth
+        it when the same order is read repeatedly between few mutations;
+        each enabled view slows down adds and removes slightly.
+        
+        Args:
+            spec: Sort spec (see sort_profiles)
+            
+        Raises:
+            ValueError: If the spec names an unknown key, or the storage
+                backend sorts by itself (see IndexedProfileStore)
+        """
+        parsed_spec = parse_sort_spec(spec)
+        if isinstance(self.user_profiles, IndexedProfileStore):
+            raise ValueError("Sorted views are not supported by indexed storage backends")
+        self._sync_sort_keys()
+        fields = spec_fields(parsed_spec)
+        if fields not in self._sorted_views:
+            self._sorted_views[fields] = self._build_sorted_view(parsed_spec)
+
+    def disable_sorted_view(self, spec: str | Sequence[str]) -> None:
+        """Stop maintaining the sorted view for spec, if there is one.
+        
+        Raises:
+            ValueError: If the spec names an unknown key
+        """
+        self._sorted_views.pop(spec_fields(parse_sort_spec(spec)), None)
+        if not self._sorted_views:
+            self._sequences = {}
+
+    def _sorted_view(self, parsed_spec) -> SortedView | None:
+        """Return the up-to-date sorted view for parsed_spec, if one is enabled."""
+        if not self._sorted_views:
+            return None
+        self._sync_sort_keys()
+        return self._sorted_views.get(spec_fields(parsed_spec))
+
+    def _stored_order(self, parsed_spec) -> Sequence[int] | None:
+        """Return the snapshot's precomputed record order for parsed_spec, if it still applies."""
+        store = self.user_profiles
+        if not isinstance(store, SnapshotStore) or store.modified:
+            return None
+        return store.snapshot.order(spec_fields(parsed_spec))
+
+    def iter_sorted(self, spec: str | Sequence[str], offset: int = 0) -> Iterator[UserProfile]:
+        """Lazily iterate over the profiles in sort order.
+        
+        With an enabled sorted view for spec, or an unmodified snapshot
+        that stores this order, profiles are produced without sorting;
+        otherwise the profiles are sorted first. The manager must not be
+        modified while iterating.
+        
+        Args:
+            spec: Sort spec (see sort_profiles)
+            offset: Number of leading sorted profiles to skip
+            
+        Raises:
+            ValueError: If the spec names an unknown key
+        """
+        parsed_spec = parse_sort_spec(spec)
+        if isinstance(self.user_profiles, IndexedProfileStore):
+            yield from self.user_profiles.iter_sorted(parsed_spec, offset=offset)
+            return
+        view = self._sorted_view(parsed_spec)
+        if view is not None:
+            user_profiles = self.user_profiles
+            for email in view.emails(offset):
+                yield user_profiles[email]
+            return
+        order = self._stored_order(parsed_spec)
+        if order is not None:
+            yield from self.user_profiles.profiles(order[offset:])
+            return
+        yield from self.sort_profiles(spec, offset=offset)
+
+    def sort_profiles(self, spec: str | Sequence[str], limit: int | None = None,
+                      offset: int = 0) -> list[UserProfile]:
+        """Sort profiles by a composite sort spec.
+        
+        The spec lists keys in priority order, e.g. "country,-age,name".
+        Keys: age (oldest first), dob, name, email, location (country,
+        state, city), country, state and city. A leading "-" reverses a
+        key. Sorting uses keys cached at insertion time, so no dates are
+        parsed here. Profiles that compare equal keep insertion order.
+        
+        With a limit, only one page of the sorted order is returned and it
+        is found by heap selection (O(n log k) for k = offset + limit)
+        instead of a full sort. If a sorted view is enabled for the spec
+        (see enable_sorted_view), or the profiles come from an unmodified
+        snapshot that stores this order (age, name, email and location),
+        the result is read in O(n), or O(limit) for a page, without sorting.
+        Indexed storage backends such as SQLite sort by themselves.
+        
+        Args:
+            spec: Comma-separated string or sequence of key names
+            limit: Maximum number of profiles to return (None for all)
+            offset: Number of leading sorted profiles to skip
+            
+        Returns:
+            List of UserProfile objects in sorted order
+            
+        Raises:
+            ValueError: If the spec names an unknown key
+        """
+        parsed_spec = parse_sort_spec(spec)
+        if isinstance(self.user_profiles, IndexedProfileStore):
+            return list(self.user_profiles.iter_sorted(parsed_spec, limit, offset))
+        view = self._sorted_view(parsed_spec)
+        if view is not None:
+            user_profiles = self.user_profiles
+            end = None if limit is None else offset + limit
+            return [user_profiles[email] for email in view.emails(offset, end)]
+        order = self._stored_order(parsed_spec)
+        if order is not None:
+            end = None if limit is None else offset + limit
+            return list(self.user_profiles.profiles(order[offset:end]))
+        rows = self._sort_key_rows()
+        if limit is None and offset == 0:
+            return sort_by_rows(list(self.user_profiles.values()), rows, parsed_spec)
+        user_profiles = self.user_profiles
+        return [user_profiles[rows[position].email] for position in select_rows(rows, parsed_spec, limit, offset)]
+
+    def top_profiles(self, spec: str | Sequence[str], limit: int) -> list[UserProfile]:
+        """Return the first limit profiles of the sorted order, e.g. the 100 oldest.
+        
+        Shorthand for sort_profiles(spec, limit=limit).
+        """
+        return self.sort_profiles(spec, limit=limit)
+
+    def query(self, country: str | None = None, state: str | None = None, city: str | None = None,
+              min_age: int | None = None, max_age: int | None = None,
+              dob_from: str | None = None, dob_to: str | None = None,
+              name_prefix: str | None = None, sort: str | Sequence[str] | None = None,
+              limit: int | None = None, offset: int = 0,
+              reference_date: date | None = None) -> list[UserProfile]:
+        """Find profiles matching all given criteria using secondary indexes.
+        
+        Indexes by location, date of birth and name are built on the first
+        query and then kept up to date by add_profile and remove_profile.
+        Only the candidates of the most selective criterion are examined,
+        so a query costs about the size of its result rather than the
+        size of the whole collection.
+        
+        Args:
+            country, state, city: Exact location parts
+            min_age, max_age: Inclusive age bounds (ages as computed by get_age)
+            dob_from, dob_to: Inclusive date-of-birth bounds (YYYY-MM-DD or MM/DD/YYYY)
+            name_prefix: Case-insensitive prefix of the name
+            sort: Optional sort spec (see sort_profiles) applied to the result
+            limit: Maximum number of profiles to return (None for all)
+            offset: Number of leading profiles to skip
+            reference_date: Date ages are computed at (defaults to today)
+            
+        Returns:
+            List of matching UserProfile objects; unsorted results, and
+            profiles that tie on the sort keys, are in insertion order
+            
+        Raises:
+            ValueError: If a date bound or the sort spec is invalid
+        """
+        parsed_spec = parse_sort_spec(sort) if sort is not None else None
+        dob_range = None
+        if dob_from is not None or dob_to is not None:
+            dob_range = tuple(None if bound is None else parse_dob(bound).ordinal
+                              for bound in (dob_from, dob_to))
+        age_range = None
+        if min_age is not None or max_age is not None:
+            age_range = (min_age, max_age, reference_date or date.today())
+        if isinstance(self.user_profiles, IndexedProfileStore):
+            return self.user_profiles.select(country=country, state=state, city=city, dob_range=dob_range,
+                                             age_range=age_range, name_prefix=name_prefix, spec=parsed_spec,
+                                             limit=limit, offset=offset)
+        self._sync_sort_keys()
+        if self._indexes is None:
+            self._indexes = ProfileIndexes(self._sort_keys.values())
+        emails = self._indexes.select(self._sort_keys, country=country, state=state, city=city,
+                                      dob_range=dob_range, age_range=age_range, name_prefix=name_prefix)
+        if parsed_spec is None:
+            end = None if limit is None else offset + limit
+            return [self.user_profiles[email] for email in emails[offset:end]]
+        rows = [self._sort_keys[email] for email in emails]
+        return [self.user_profiles[rows[position].email] for position in select_rows(rows, parsed_spec, limit, offset)]
+
     def sort_profiles_by_age(self):
         """Sort profiles by age in descending order (oldest first).
         
         Returns:
             List of UserProfile objects sorted by age
         """
-        profiles = sorted(self.user_profiles.values(), key=lambda p: p.get_age(), reverse=True)
-        return profiles
+        return self.sort_profiles("age")
     
     def sort_profiles_by_name(self):
-        """Sort profiles by name alphabetically.
+        """Sort profiles by name alphabetically (case-insensitive).
         
         Returns:
             List of UserProfile objects sorted by name
         """
-        return sorted(self.user_profiles.values(), key=lambda p: p.name)
+        return self.sort_profiles("name")
     
     def sort_profiles_by_email(self):
         """Sort profiles by email alphabetically.
@@ -78,7 +609,7 @@ class UserProfileManager:
         Returns:
             List of UserProfile objects sorted by email
         """
-        return sorted(self.user_profiles.values(), key=lambda p: p.email)
+        return self.sort_profiles("email")
     
     def sort_profiles_by_location(self):
         """Sort profiles by location (country, state, city).
@@ -86,20 +617,28 @@ class UserProfileManager:
         Returns:
             List of UserProfile objects sorted by location
         """
-        return sorted(self.user_profiles.values(), key=lambda p: (p.location.country, p.location.state, p.location.city))
+        return self.sort_profiles("location")
     
-    def save_profiles_to_json(self, json_file: str):
+    def save_profiles_to_json(self, json_file: str, hasher: PasswordHasher | None = None):
         """Save all profiles to a JSON file.
         
         Args:
             json_file: Path to output JSON file
+            hasher: Optional PasswordHasher; passwords still stored as
+                plaintext are written as hashes (the stored ones are kept)
         """
+        profiles = list(self.user_profiles.values())
+        passwords = [user_profile.password for user_profile in profiles]
+        if hasher is not None:
+            plaintext = [index for index, password in enumerate(passwords) if not is_password_hash(password)]
+            for index, password_hash in zip(plaintext, hasher.hash_many(passwords[index] for index in plaintext)):
+                passwords[index] = password_hash
         profile_list = []
-        for user_profile in self.user_profiles.values():
+        for user_profile, password in zip(profiles, passwords):
             profile_data = {
                 'name': user_profile.name,
                 'email': user_profile.email,
-                'password': user_profile.password,
+                'password': password,
                 'dob': user_profile.dob,
                 'location': {
                     'city': user_profile.location.city,
@@ -111,38 +650,274 @@ class UserProfileManager:
         with open(json_file, mode='w') as f:
             json.dump(profile_list, f, indent=4)
     
-    def load_profiles_from_json(self, json_file: str):
-        """Load profiles from a JSON file.
+    def save_snapshot(self, snapshot_file: str) -> int:
+        """Save all profiles to a binary snapshot file.
         
-        Supports both single profile object and list of profiles.
-        Invalid profiles are skipped with error messages.
+        A snapshot stores the profiles already validated, with dates of
+        birth as ordinals, precomputed sort orders and an email index, so
+        load_snapshot can serve it without parsing or validating anything.
         
         Args:
-            json_file: Path to JSON file containing profile(s)
+            snapshot_file: Path to output snapshot file
+            
+        Returns:
+            Number of profiles written
         """
-        with open(json_file, mode='r') as input_file:
-            loaded_data = json.load(input_file)
-        if isinstance(loaded_data, dict):
-            profile_items = [loaded_data]
-        elif isinstance(loaded_data, list):
-            profile_items = loaded_data
-        else:
-            print(f"ERROR: JSON file must contain a dictionary or list")
-            return
-        for profile_item in profile_items:
+        rows = None if isinstance(self.user_profiles, IndexedProfileStore) else self._sort_key_rows()
+        return write_snapshot(snapshot_file, list(self.user_profiles.values()), rows)
+
+    def load_snapshot(self, snapshot_file: str) -> None:
+        """Replace the manager's profiles with those of a snapshot file.
+        
+        The file is memory-mapped rather than read: get_profile binary-searches
+        its email index and sorting by age, name, email or location walks its
+        stored orders, so profiles are only decoded when they are accessed.
+        Profiles added or removed afterwards are kept in memory; the file is
+        never modified.
+        
+        Args:
+            snapshot_file: Path to a file written by save_snapshot
+            
+        Raises:
+            SnapshotError: If the file is not a snapshot of a supported version
+        """
+        self.user_profiles = SnapshotStore(Snapshot(snapshot_file))
+        self._sort_keys = {}
+        self._indexes = None
+        self._sorted_views = {}
+        self._sequences = {}
+
+    def open_journal(self, journal_file: str, snapshot_file: str, sync_every: int = DEFAULT_SYNC_EVERY,
+                     compact_every: int | None = DEFAULT_COMPACT_EVERY) -> int:
+        """Restore the manager from a snapshot and journal, then journal every change.
+        
+        The profiles of snapshot_file (if it exists) are added, followed by
+        the changes recorded in journal_file. From then on add_profile and
+        remove_profile append one record per change to the journal, fsynced
+        in groups of sync_every records, so persisting a change costs one
+        short append instead of rewriting every profile. Once compact_every
+        records have accumulated, the journal is folded into a new snapshot
+        in a background thread (see compact_journal).
+        
+        Args:
+            journal_file: Journal path
+            snapshot_file: Path of the snapshot the journal is compacted into
+            sync_every: Number of journal records per fsync
+            compact_every: Records that trigger a background compaction (None to only compact explicitly)
+            
+        Returns:
+            Number of journal records replayed
+            
+        Raises:
+            ValueError: If a journal is already open or the storage backend is indexed
+            JournalError: If the journal contains an invalid record
+        """
+        if self._journal is not None:
+            raise ValueError("A journal is already open")
+        if isinstance(self.user_profiles, IndexedProfileStore):
+            raise ValueError("Indexed storage backends are persistent and do not use a journal")
+        if os.path.exists(snapshot_file):
+            with Snapshot(snapshot_file) as snapshot:
+                for profile in SnapshotStore(snapshot).values():
+                    self._replay_add(profile)
+        rotated_file = journal_file + ".compacting"
+        replayed = 0
+        for path in (rotated_file, journal_file):
+            # A change may be replayed onto a snapshot that already contains it
+            # (after a crash during compaction), so adds and removes are idempotent.
+            for operation, value in replay(path):
+                if operation == ADD:
+                    self._replay_add(value)
+                elif value in self.user_profiles:
+                    self.remove_profile(value)
+                replayed += 1
+        self._journal_snapshot = snapshot_file
+        self._compact_every = compact_every
+        if os.path.exists(rotated_file):
+            # An interrupted compaction: fold everything into the snapshot now.
+            write_snapshot(snapshot_file, self._profile_copies(), self._sort_key_rows())
+            open(journal_file, mode='w').close()
+            os.remove(rotated_file)
+            replayed = 0
+        self._journal = ProfileJournal(journal_file, sync_every)
+        self._journal.count = replayed
+        return replayed
+
+    def _replay_add(self, profile: UserProfile) -> None:
+        if profile.email not in self.user_profiles:
+            self._insert_profile(UserProfile(name=profile.name, email=profile.email, password=profile.password,
+                                             dob=profile.dob, location=profile.location))
+
+    def _profile_copies(self) -> list[UserProfile]:
+        """Return the profiles as objects that later changes to the store cannot affect."""
+        if type(self.user_profiles) is dict:
+            return list(self.user_profiles.values())
+        return [UserProfile(name=profile.name, email=profile.email, password=profile.password,
+                            dob=profile.dob, location=profile.location)
+                for profile in self.user_profiles.values()]
+
+    def _compact_if_due(self) -> None:
+        if (self._compact_every is not None and self._journal.count >= self._compact_every
+                and (self._compaction is None or not self._compaction.is_alive())):
+            self.compact_journal(wait=False)
+
+    def compact_journal(self, wait: bool = True) -> None:
+        """Fold the journal into a new snapshot.
+        
+        The current journal is set aside and a fresh one is started, so new
+        changes can be recorded while the snapshot is written. The snapshot
+        replaces the previous one atomically, and only then is the old
+        journal deleted; a crash at any point leaves files that open_journal
+        restores to the same profiles.
+        
+        Args:
+            wait: Write the snapshot before returning instead of in a background thread
+            
+        Raises:
+            ValueError: If no journal is open
+        """
+        if self._journal is None:
+            raise ValueError("No journal is open")
+        self._wait_for_compaction()
+        profiles = self._profile_copies()
+        rows = self._sort_key_rows()
+        rotated_file = self._journal.path + ".compacting"
+        self._journal.rotate(rotated_file)
+        snapshot_file = self._journal_snapshot
+
+        def fold():
             try:
-                user_profile = UserProfile(
-                    name=profile_item['name'],
-                    email=profile_item['email'],
-                    password=profile_item['password'],
-                    dob=profile_item['dob'],
-                    location=Location(**profile_item['location'])
-                )
-                try:
-                    self.add_profile(user_profile)
-                except ValueError:
-                    pass
-            except KeyError as e:
-                print(f"error loading profile: missing field {e}")
+                write_snapshot(snapshot_file, profiles, rows)
+                os.remove(rotated_file)
             except Exception as e:
-                print(f"error loading profile: {e}")
\ No newline at end of file
+                self._compaction_error = e
+
+        if wait:
+            fold()
+            self._raise_compaction_error()
+        else:
+            self._compaction = threading.Thread(target=fold, name="journal-compaction")
+            self._compaction.start()
+
+    def _wait_for_compaction(self) -> None:
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+        self._raise_compaction_error()
+
+    def _raise_compaction_error(self) -> None:
+        error, self._compaction_error = self._compaction_error, None
+        if error is not None:
+            raise error
+
+    def close_journal(self) -> None:
+        """Wait for a running compaction, then sync and close the journal."""
+        if self._journal is None:
+            return
+        try:
+            self._wait_for_compaction()
+        finally:
+            self._journal.close()
+            self._journal = None
+
+    def load_profiles_from_json(self, json_file: str, input_format: str = "auto",
+                                batch_size: int = DEFAULT_BATCH_SIZE,
+                                rejects: RejectWriter | None = None, workers: int = 1,
+                                dedup: DuplicateDetector | None = None,
+                                hasher: PasswordHasher | None = None, hashed_input: bool = False) -> BulkResult:
+        """Load profiles from a JSON or newline-delimited JSON file.
+        
+        Supports a single profile object, a list of profiles, and NDJSON.
+        The file is read incrementally, so at most batch_size raw records
+        are held in memory at a time. Records are validated in batches;
+        invalid ones are skipped, or written to rejects if it is given.
+        With workers > 1, batches are validated in a pool of worker
+        processes; results are merged in file order, so the outcome is the
+        same as a serial load. The valid profiles are stored with
+        add_profiles, so duplicate emails keep the first occurrence and
+        indexed storage backends receive them in batches of batch_size,
+        each stored in one transaction.
+        
+        Args:
+            json_file: Path to JSON file containing profile(s)
+            input_format: "json", "ndjson", or "auto" to detect from content
+            batch_size: Number of raw records decoded per batch
+            rejects: Optional RejectWriter receiving invalid records
+            workers: Number of worker processes used for validation
+            dedup: Optional DuplicateDetector that drops (and reports) profiles
+                whose email it has seen, e.g. in an earlier shard or run, or
+                in another letter case when it casefolds
+            hasher: Optional PasswordHasher replacing the passwords of the
+                loaded profiles with their hashes before they are stored;
+                duplicates are dropped first, so they are never hashed
+            hashed_input: Accept passwords that are already hashes, as in a
+                file saved with a hasher, and store them unchanged. Only
+                for trusted input: otherwise every password must meet the
+                strength rules, whatever it looks like
+                
+        Returns:
+            BulkResult counting the accepted and rejected records, and the
+            duplicates dropped by dedup or the store. If the input is
+            malformed, the profiles read before the problem are kept and
+            result.error says what went wrong (result.partial if any were
+            read)
+        """
+        result = BulkResult()
+        if self.stats is not None:
+            rejects = StatsRejectSink(self.stats, rejects)
+        rejects = _RejectCounter(result, rejects)
+        if workers > 1:
+            profiles = iter_profiles_parallel(json_file, input_format, batch_size, workers, rejects, hashed_input)
+        else:
+            validator = HASHED_INPUT_VALIDATOR if hashed_input else DEFAULT_VALIDATOR
+            profiles = iter_profiles(json_file, input_format, batch_size, validator, rejects, self.stats)
+        self._load_profiles(profiles, result, batch_size, dedup, hasher)
+        return result
+
+    def load_profiles_from_files(self, json_files: Sequence[str], input_format: str = "auto",
+                                 batch_size: int = DEFAULT_BATCH_SIZE, rejects: RejectWriter | None = None,
+                                 workers: int = 1, dedup: DuplicateDetector | None = None,
+                                 hasher: PasswordHasher | None = None,
+                                 hashed_input: bool = False) -> list[FileReport]:
+        """Load profiles from several JSON, NDJSON or snapshot files.
+        
+        With workers > 1 the files are read and validated concurrently in
+        worker processes, each file as a whole. Profiles are merged in the
+        order of json_files, so for a duplicate email the first file (and
+        within it the first record) wins regardless of the worker count.
+        
+        Args:
+            json_files: Input files in priority order (see ingest.expand_inputs)
+            input_format: "json", "ndjson", or "auto" to detect from content
+            batch_size: Number of records validated together
+            rejects: Optional RejectWriter receiving invalid records
+            workers: Number of worker processes reading files
+            dedup: Optional DuplicateDetector (see load_profiles_from_json)
+            hasher: Optional PasswordHasher (see load_profiles_from_json)
+            hashed_input: Accept passwords that are already hashes (see load_profiles_from_json)
+            
+        Returns:
+            One FileReport per file with its record counts and timing
+        """
+        file_reports = []
+        if self.stats is not None:
+            rejects = StatsRejectSink(self.stats, rejects)
+        self._load_profiles(iter_files_profiles(json_files, input_format, batch_size, workers, rejects,
+                                                file_reports, hashed_input), BulkResult(), batch_size, dedup, hasher)
+        return file_reports
+
+    def _load_profiles(self, profiles: Iterator[UserProfile], result: BulkResult, batch_size: int,
+                       dedup: DuplicateDetector | None = None, hasher: PasswordHasher | None = None) -> None:
+        """Store already validated profiles with add_profiles, counting into result."""
+        if self.stats is not None:
+            accepted = self.stats.counters["accepted"]
+            profiles = self.stats.counted("accepted", profiles)
+        dropped = 0 if dedup is None else dedup.duplicates
+        if dedup is not None:
+            profiles = dedup.unique(profiles)
+        self._add_profiles(_until_input_error(profiles, result), result, False, batch_size, None, validate=False,
+                           hasher=hasher)
+        if dedup is not None:
+            result.duplicates += dedup.duplicates - dropped
+        if self.stats is not None:
+            self.stats.count("duplicates", self.stats.counters["accepted"] - accepted - result.accepted)
@@ -1,16 +1,55 @@
 from __future__ import annotations
 
 import json
-import re
-from datetime import datetime
+from datetime import date, datetime
+from . import validation
+from .dates import ParsedDate, parse_dob
 from .location import Location
+from .validation import FieldError
+
+def parse_date(date_str: str) -> datetime:
+    """Parse a date string in YYYY-MM-DD or MM/DD/YYYY format.
+    
+    Args:
+        date_str: Date string to parse
+        
+    Returns:
+        datetime object parsed from the string
+        
+    Raises:
+        ValueError: If date format is not supported
+    """
+    parsed = parse_dob(date_str)
+    return datetime(parsed.year, parsed.month, parsed.day)
+
+
+def age_on(dob_date: date, reference_date: date) -> int:
+    """Calculate the age in years of someone born on dob_date at reference_date.
+    
+    Args:
+        dob_date: Date of birth
+        reference_date: Date to calculate age at
+        
+    Returns:
+        Age in years as an integer
+    """
+    age_result = reference_date.year - dob_date.year
+    if reference_date.month <= dob_date.month or (reference_date.month == dob_date.month and reference_date.day <= dob_date.day):
+        age_result -= 1
+    return age_result
+
 
 class UserProfile:
     """Represents a user profile with validation capabilities.
     
     Stores user information including name, email, password, date of birth,
     and location. Provides methods for validation and data serialization.
+    The date of birth is parsed once, when it is set, so ages and sort keys
+    never parse it again.
     """
+    # _parsed_dob is the parsed date of birth, None while dob is not a valid date.
+    __slots__ = ("name", "email", "password", "_dob", "_parsed_dob", "location")
+
     def __init__(self, name: str, email: str, password: str, dob: str, location: Location):
         """Initialize a UserProfile instance.
         
@@ -26,6 +65,32 @@ class UserProfile:
         self.password = password
         self.dob = dob
         self.location = location
+
+    @property
+    def dob(self) -> str:
+        return self._dob
+
+    @dob.setter
+    def dob(self, dob: str) -> None:
+        self._dob = dob
+        try:
+            self._parsed_dob = parse_dob(dob)
+        except (TypeError, ValueError):
+            self._parsed_dob = None
+
+    def parsed_dob(self) -> ParsedDate:
+        """Return the parsed date of birth.
+        
+        Raises:
+            ValueError: If the date of birth cannot be parsed
+        """
+        parsed = self._parsed_dob
+        return parsed if parsed is not None else parse_dob(self.dob)
+
+    @property
+    def dob_ordinal(self) -> int:
+        """Proleptic Gregorian ordinal of the date of birth (raises ValueError if it is invalid)."""
+        return self.parsed_dob().ordinal
         
     @staticmethod
     def valid_name(name: str) -> bool:
@@ -37,14 +102,7 @@ class UserProfile:
         Returns:
             True if name is valid, False otherwise
         """
-        name_parts = name.strip().split()
-        if 2 <= len(name_parts) <= 3:
-            for name_part in name_parts:
-                regex = r"^[A-Z][a-z]*$"
-                if re.fullmatch(regex, name_part) is None:
-                    return False
-            return True
-        return False
+        return validation.valid_name(name)
     
     @staticmethod
     def valid_email(email: str) -> bool:
@@ -56,8 +114,7 @@ class UserProfile:
         Returns:
             True if email format is valid, False otherwise
         """
-        email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-        return re.match(email_pattern, email) is not None
+        return validation.valid_email(email)
     
     @staticmethod
     def valid_password(password: str) -> bool:
@@ -71,8 +128,7 @@ class UserProfile:
         Returns:
             True if password meets requirements, False otherwise
         """
-        regex = r'^(?=^[A-Z])(?=.*[a-z]?)(?=.*\d)(?=.*[@$!%*?&])[A-z\d@$!%*?&]{8,}$'
-        return re.match(regex, password) is not None
+        return validation.valid_password(password)
     
     @staticmethod
     def valid_dob(dob: str) -> bool:
@@ -84,15 +140,7 @@ class UserProfile:
         Returns:
             True if date format is valid, False otherwise
         """
-        try:
-            datetime.strptime(dob, "%Y-%m-%d")
-            return True
-        except ValueError:
-            try:
-                datetime.strptime(dob, "%m/%d/%Y")
-                return True
-            except ValueError:
-                return False
+        return validation.valid_dob(dob)
 
     @staticmethod
     def valid_location(location: Location) -> bool:
@@ -110,27 +158,26 @@ class UserProfile:
         """Validate all profile fields and collect any validation errors.
         
         Checks: date of birth, location, name, email, and password.
-        Prints error messages if validation fails.
+        Prints error messages if validation fails. Use
+        ProfileValidator.validate_profile for structured errors without output.
         
         Returns:
             True if all fields are valid, False otherwise
         """
-        validation_errors = {}
-        if not self.valid_dob(self.dob):
-            validation_errors["dob"] = ["Invalid date of birth format"]
-        if not self.valid_location(self.location):
-            validation_errors["location"] = ["Invalid location format"]
-        if not self.valid_name(self.name):
-            validation_errors["name"] = ["Invalid name format"]
-        if not self.valid_email(self.email):
-            validation_errors["email"] = ["Invalid email format"]
-        if not self.valid_password(self.password):
-            validation_errors["password"] = ["Invalid password format"]
+        validation_errors = self.validation_errors()
         if validation_errors:
-            print(f"validation failed for {', '.join(validation_errors.keys())}")
+            print(f"validation failed for {', '.join(error.field for error in validation_errors)}")
             return False
         return True
 
+    def validation_errors(self) -> list[FieldError]:
+        """Return the structured validation errors of this profile.
+        
+        Returns:
+            List of FieldError objects (empty if the profile is valid)
+        """
+        return validation.DEFAULT_VALIDATOR.validate_profile(self)
+
     def extract_date(self, date_str: str) -> datetime:
         """Extract datetime object from date string in supported formats.
         
@@ -145,30 +192,24 @@ class UserProfile:
         Raises:
             ValueError: If date format is not supported
         """
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            try:
-                return datetime.strptime(date_str, "%m/%d/%Y")
-            except ValueError:
-                raise ValueError(f"Invalid date format: {date_str}")
-
-    def get_age(self, reference_date: datetime | None = None) -> int:
+        return parse_date(date_str)
+
+    def get_age(self, reference_date: date | None = None) -> int:
         """Calculate age based on date of birth.
         
+        The date of birth is already parsed, so this is integer arithmetic.
+        When computing many ages, look today up once and pass it as
+        reference_date.
+        
         Args:
-            reference_date: Date to calculate age from (defaults to today)
+            reference_date: Date or datetime to calculate age from (defaults to today)
             
         Returns:
             Age in years as an integer
         """
         if reference_date is None:
-            reference_date = datetime.today()
-        dob_date = self.extract_date(self.dob)
-        age_result = reference_date.year - dob_date.year
-        if reference_date.month <= dob_date.month or (reference_date.month == dob_date.month and reference_date.day <= dob_date.day):
-            age_result -= 1
-        return age_result
+            reference_date = date.today()
+        return age_on(self.parsed_dob(), reference_date)
     
     @classmethod
     def from_json(cls, json_file: str) -> 'UserProfile':
@@ -182,12 +223,27 @@ class UserProfile:
         """
         with open(json_file, mode='r') as file_handle:
             json_content = json.load(file_handle)
+        return cls.from_dict(json_content)
+
+    @classmethod
+    def from_dict(cls, profile_data: dict) -> 'UserProfile':
+        """Create UserProfile instance from a decoded JSON dictionary.
+        
+        Args:
+            profile_data: Dictionary with name, email, password, dob and location
+            
+        Returns:
+            UserProfile instance built from the dictionary
+            
+        Raises:
+            KeyError: If a required field is missing
+        """
         return cls(
-            name=json_content["name"],
-            email=json_content["email"],
-            password=json_content["password"],
-            dob=json_content["dob"],
-            location=Location(**json_content["location"])
+            name=profile_data["name"],
+            email=profile_data["email"],
+            password=profile_data["password"],
+            dob=profile_data["dob"],
+            location=Location(**profile_data["location"])
         )
         
     def to_json(self, json_file: str) -> None:
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import IO, Iterable, List, Optional
+
+from .dates import parse_dob
+
+NAME_PART_PATTERN = re.compile(r"^[A-Z][a-z]*$")
+EMAIL_LOCAL_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+\Z")
+EMAIL_DOMAIN_PATTERN = re.compile(r"[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+PASSWORD_PATTERN = re.compile(r'^(?=^[A-Z])(?=.*[a-z]?)(?=.*\d)(?=.*[@$!%*?&])[A-z\d@$!%*?&]{8,}$')
+# Hashes written by passwords.PasswordHasher: algorithm and cost fields, then base64 salt and key.
+PASSWORD_HASH_PATTERN = re.compile(
+    r"^(?:scrypt\$\d+\$\d+\$\d+|pbkdf2_sha256\$\d+)\$[A-Za-z0-9+/]+={0,2}\$[A-Za-z0-9+/]+={0,2}$")
+LOCATION_PATTERN = re.compile(r"^(?P<city>[a-zA-Z]+), (?P<state>[A-Z]{2}), (?P<country>[A-Z]{2})$")
+
+PROFILE_FIELDS = ("name", "email", "password", "dob", "location")
+LOCATION_FIELDS = ("city", "state", "country")
+
+# Field order matches the order in which UserProfile.validate reports failures.
+_ERROR_MESSAGES = {
+    "dob": "Invalid date of birth format",
+    "location": "Invalid location format",
+    "name": "Invalid name format",
+    "email": "Invalid email format",
+    "password": "Invalid password format",
+}
+
+
+def valid_name(name: str) -> bool:
+    """Return True if name has 2-3 parts, each starting with an uppercase letter."""
+    name_parts = name.strip().split()
+    if 2 <= len(name_parts) <= 3:
+        for name_part in name_parts:
+            if NAME_PART_PATTERN.fullmatch(name_part) is None:
+                return False
+        return True
+    return False
+
+
+def valid_email_domain(domain: str) -> bool:
+    """Return True if domain is a valid email domain (the part after '@')."""
+    return EMAIL_DOMAIN_PATTERN.match(domain) is not None
+
+
+def valid_email(email: str) -> bool:
+    """Return True if email is a local part and a domain separated by one '@'."""
+    local_part, separator, domain = email.partition("@")
+    return bool(separator) and EMAIL_LOCAL_PATTERN.match(local_part) is not None and valid_email_domain(domain)
+
+
+def valid_password(password: str) -> bool:
+    """Return True if password meets the security requirements."""
+    return PASSWORD_PATTERN.match(password) is not None
+
+
+def is_password_hash(value: object) -> bool:
+    """Return True if value is a stored password hash rather than a plaintext password."""
+    return isinstance(value, str) and PASSWORD_HASH_PATTERN.match(value) is not None
+
+
+def valid_dob(dob: str) -> bool:
+    """Return True if dob is a real date in YYYY-MM-DD or MM/DD/YYYY format."""
+    try:
+        parse_dob(dob)
+    except ValueError:
+        return False
+    return True
+
+
+def valid_location_fields(city: str, state: str, country: str) -> bool:
+    """Return True if the fields form a location like "City, ST, CC"."""
+    return LOCATION_PATTERN.match(f"{city}, {state}, {country}") is not None
+
+
+@dataclass(frozen=True)
+class FieldError:
+    """A single validation failure for one field of one record.
+
+    Attributes:
+        field: Field name ("name", "email", "password", "dob", "location" or "record")
+        code: Machine-readable reason: "invalid", "missing", "type" or "unexpected"
+        message: Human-readable description
+    """
+    field: str
+    code: str
+    message: str
+
+    def to_dict(self) -> dict:
+        return {"field": self.field, "code": self.code, "message": self.message}
+
+
+@dataclass
+class RecordReport:
+    """Validation outcome for one rejected record.
+
+    Attributes:
+        index: Position of the record in its input (0-based)
+        errors: Field errors, in the order UserProfile.validate reports them
+        record: The raw record that was rejected
+        source: Input file of the record, set when several files are read
+    """
+    index: int
+    errors: List[FieldError] = field(default_factory=list)
+    record: object = None
+    source: Optional[str] = None
+
+    @property
+    def email(self) -> Optional[str]:
+        if isinstance(self.record, dict) and isinstance(self.record.get("email"), str):
+            return self.record["email"]
+        return None
+
+    @property
+    def fields(self) -> List[str]:
+        return [error.field for error in self.errors]
+
+    def to_dict(self) -> dict:
+        report = {} if self.source is None else {"source": self.source}
+        report.update({
+            "index": self.index,
+            "email": self.email,
+            "errors": [error.to_dict() for error in self.errors],
+            "record": self.record,
+        })
+        return report
+
+
+class ProfileValidator:
+    """Validates profile records in batches without printing.
+
+    All patterns are compiled once at import time. Results for the fields
+    that repeat heavily across users (names, dates of birth, email domains
+    and locations) are memoized per validator in bounded LRU caches;
+    passwords are never cached.
+    """
+    def __init__(self, cache_size: int = 1 << 16, accept_password_hashes: bool = False):
+        """Initialize a validator.
+
+        Args:
+            cache_size: Maximum number of memoized values per field
+            accept_password_hashes: Also accept passwords in the form of a
+                stored hash, for input saved with hashing on. Only set this
+                for trusted input: a hash-shaped plaintext password skips
+                the strength rules.
+        """
+        self.cache_size = cache_size
+        self.accept_password_hashes = accept_password_hashes
+        self._valid_name = lru_cache(maxsize=cache_size)(valid_name)
+        self._valid_dob = lru_cache(maxsize=cache_size)(valid_dob)
+        self._valid_domain = lru_cache(maxsize=cache_size)(valid_email_domain)
+        self._valid_location = lru_cache(maxsize=cache_size)(valid_location_fields)
+
+    def cache_info(self) -> dict:
+        """Return hit/miss statistics of the memoization caches by field."""
+        return {
+            "name": self._valid_name.cache_info()._asdict(),
+            "dob": self._valid_dob.cache_info()._asdict(),
+            "email_domain": self._valid_domain.cache_info()._asdict(),
+            "location": self._valid_location.cache_info()._asdict(),
+        }
+
+    def _check_email(self, email: str) -> bool:
+        local_part, separator, domain = email.partition("@")
+        return bool(separator) and EMAIL_LOCAL_PATTERN.match(local_part) is not None and self._valid_domain(domain)
+
+    def _check_location(self, city, state, country) -> bool:
+        try:
+            return self._valid_location(city, state, country)
+        except TypeError:
+            return valid_location_fields(city, state, country)
+
+    def check_fields(self, name, email, password, dob, city, state, country) -> List[FieldError]:
+        """Validate already extracted field values.
+
+        Returns:
+            List of field errors (empty if every field is valid)
+        """
+        errors = []
+        if not isinstance(dob, str) or not self._valid_dob(dob):
+            errors.append(FieldError("dob", "invalid", _ERROR_MESSAGES["dob"]))
+        if not self._check_location(city, state, country):
+            errors.append(FieldError("location", "invalid", _ERROR_MESSAGES["location"]))
+        if not isinstance(name, str) or not self._valid_name(name):
+            errors.append(FieldError("name", "invalid", _ERROR_MESSAGES["name"]))
+        if not isinstance(email, str) or not self._check_email(email):
+            errors.append(FieldError("email", "invalid", _ERROR_MESSAGES["email"]))
+        # Hashed passwords come from profiles saved with hashing on; their plaintext was checked then.
+        if not isinstance(password, str) or not (
+                valid_password(password) or (self.accept_password_hashes and is_password_hash(password))):
+            errors.append(FieldError("password", "invalid", _ERROR_MESSAGES["password"]))
+        return errors
+
+    def validate_profile(self, profile) -> List[FieldError]:
+        """Validate a UserProfile (or any object with the same attributes).
+
+        Returns:
+            List of field errors (empty if the profile is valid)
+        """
+        location = profile.location
+        return self.check_fields(profile.name, profile.email, profile.password, profile.dob,
+                                 location.city, location.state, location.country)
+
+    def validate_record(self, record: object) -> List[FieldError]:
+        """Validate a raw decoded JSON record.
+
+        Besides field formats, checks that the record is a dictionary with
+        every required field and a location with exactly city, state and country.
+
+        Returns:
+            List of field errors (empty if the record is valid)
+        """
+        if not isinstance(record, dict):
+            return [FieldError("record", "type", "Profile must be a JSON object")]
+        missing = [FieldError(name, "missing", f"Missing field '{name}'")
+                   for name in PROFILE_FIELDS if name not in record]
+        if missing:
+            return missing
+        location = record["location"]
+        if not isinstance(location, dict):
+            return [FieldError("location", "type", "Location must be a JSON object")]
+        location_errors = [FieldError("location", "missing", f"Missing field '{name}'")
+                           for name in LOCATION_FIELDS if name not in location]
+        location_errors.extend(FieldError("location", "unexpected", f"Unexpected field '{name}'")
+                               for name in location if name not in LOCATION_FIELDS)
+        if location_errors:
+            return location_errors
+        return self.check_fields(record["name"], record["email"], record["password"], record["dob"],
+                                 location["city"], location["state"], location["country"])
+
+    def validate_batch(self, records: Iterable[object], start_index: int = 0) -> List[RecordReport]:
+        """Validate a batch of raw records in one pass.
+
+        Args:
+            records: Decoded JSON records
+            start_index: Index assigned to the first record of the batch
+
+        Returns:
+            Reports for the rejected records only, in input order
+        """
+        reports = []
+        validate_record = self.validate_record
+        for index, record in enumerate(records, start=start_index):
+            errors = validate_record(record)
+            if errors:
+                reports.append(RecordReport(index, errors, record))
+        return reports
+
+
+DEFAULT_VALIDATOR = ProfileValidator()
+# Validator for input known to hold hashed passwords, such as output saved with hashing on.
+HASHED_INPUT_VALIDATOR = ProfileValidator(accept_password_hashes=True)
+
+
+class RejectWriter:
+    """Writes rejected records to a quarantine file, one JSON object per line."""
+    def __init__(self, rejects_file: str | IO[str]):
+        """Initialize the writer.
+
+        Args:
+            rejects_file: Path to the NDJSON file to create, or an open text handle
+        """
+        if isinstance(rejects_file, str):
+            self._handle = open(rejects_file, mode='w')
+            self._owns_handle = True
+        else:
+            self._handle = rejects_file
+            self._owns_handle = False
+        self.count = 0
+
+    def write(self, report: RecordReport) -> None:
+        """Append one rejected record."""
+        self._handle.write(json.dumps(report.to_dict()))
+        self._handle.write("\n")
+        self.count += 1
+
+    def close(self) -> None:
+        """Flush the file, closing it if this writer opened it."""
+        if self._owns_handle:
+            self._handle.close()
+        else:
+            self._handle.flush()
+
+    def __enter__(self) -> RejectWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
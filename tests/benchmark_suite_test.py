@@ -0,0 +1,55 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.validation import ProfileValidator
+from benchmarks.suite import compare_results, main
+from benchmarks.synthetic import generate_profiles
+
+
+class TestBenchmarkSuite:
+    def test_invalid_fraction(self):
+        assert list(generate_profiles(50, seed=4, invalid_fraction=0.0)) == list(generate_profiles(50, seed=4))
+        records = list(generate_profiles(1000, seed=4, invalid_fraction=0.2))
+        assert records == list(generate_profiles(1000, seed=4, invalid_fraction=0.2))
+        rejected = len(ProfileValidator().validate_batch(records))
+        assert 150 < rejected < 250
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": [
+            {"case": "sort", "count": 1000, "seconds": 0.5, "peak_bytes": 10_000_000},
+            {"case": "load", "count": 1000, "seconds": 0.5, "peak_bytes": 10_000_000},
+            {"case": "tiny", "count": 1000, "seconds": 0.0001, "peak_bytes": 1000},
+        ]}
+        current = {"results": [
+            {"case": "sort", "count": 1000, "seconds": 0.52, "peak_bytes": 10_500_000},
+            {"case": "load", "count": 1000, "seconds": 0.7, "peak_bytes": 9_000_000},
+            {"case": "tiny", "count": 1000, "seconds": 0.0003, "peak_bytes": 3000},
+            {"case": "new", "count": 1000, "seconds": 1.0, "peak_bytes": 1},
+        ]}
+        comparisons = compare_results(baseline, current, threshold=0.1)
+        assert [(c["case"], c["regressed"]) for c in comparisons] == [("sort", False), ("load", True), ("tiny", False)]
+        assert [c["case"] for c in compare_results(baseline, current, threshold=0.01) if c["regressed"]] == [
+            "sort", "load"]
+
+    def test_run_and_compare(self, tmp_path, capsys):
+        baseline_path = tmp_path / 'baseline.json'
+        assert main(["run", "--sizes", "200", "--repeat", "1", "--case", "to_dict", "--case", "main.main",
+                     "--save", str(baseline_path)]) == 0
+        baseline = json.loads(baseline_path.read_text())
+        assert [(result["case"], result["count"]) for result in baseline["results"]] == [
+            ("to_dict", 200), ("main.main", 200)]
+        assert main(["compare", str(baseline_path), str(baseline_path)]) == 0
+        for result in baseline["results"]:
+            result["seconds"] /= 10
+        faster_path = tmp_path / 'faster_baseline.json'
+        faster_path.write_text(json.dumps(baseline))
+        assert main(["compare", str(faster_path), str(baseline_path)]) == 1
+        assert "REGRESSION" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
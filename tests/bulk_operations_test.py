@@ -0,0 +1,142 @@
+import pytest
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import BulkResult, PipelineStats, RejectWriter, UserProfile, UserProfileManager
+from src import user_manager
+from src.streaming import InputFormatError
+from benchmarks.synthetic import generate_profiles
+
+
+def _complete(record):
+    """Whether a UserProfile can be built from the record, even if its fields are invalid."""
+    try:
+        UserProfile.from_dict(record)
+    except (KeyError, TypeError, AttributeError):
+        return False
+    return True
+
+
+@pytest.fixture
+def records():
+    records = [record for record in generate_profiles(240, seed=25, invalid_fraction=0.2) if _complete(record)]
+    # Repeat a few valid emails, with different names so the first occurrence can be told apart.
+    valid = [record for record in records if not UserProfile.from_dict(record).validation_errors()]
+    for record in valid[:5]:
+        records.append(dict(record, name="Second Copy"))
+    return records
+
+
+def _profiles(records):
+    return [UserProfile.from_dict(record) for record in records]
+
+
+def _one_by_one(records):
+    """Expected outcome of adding the records with add_profile, one exception per bad record."""
+    manager = UserProfileManager()
+    rejected = duplicates = 0
+    for profile in _profiles(records):
+        if profile.validation_errors():
+            rejected += 1
+        elif profile.email in manager.user_profiles:
+            duplicates += 1
+        else:
+            manager.add_profile(profile)
+    return manager, rejected, duplicates
+
+
+class TestBulkOperations:
+    @pytest.mark.parametrize("storage", ["dict", "compact", "sqlite"])
+    def test_add_profiles_matches_add_profile(self, records, storage):
+        expected, rejected, duplicates = _one_by_one(records)
+        manager = UserProfileManager(storage=storage)
+        handle = io.StringIO()
+        result = manager.add_profiles(_profiles(records), batch_size=16, rejects=RejectWriter(handle))
+        assert result == BulkResult(accepted=len(expected.user_profiles), rejected=rejected, duplicates=duplicates)
+        assert rejected > 0 and duplicates == 5
+        assert list(manager.user_profiles) == list(expected.user_profiles)
+        assert all(manager.get_profile(email).name != "Second Copy" for email in manager.user_profiles)
+        reports = [json.loads(line) for line in handle.getvalue().splitlines()]
+        assert len(reports) == rejected
+        assert all(records[report["index"]]["email"] == report["email"] for report in reports)
+
+        again = manager.add_profiles(_profiles(records[:10]))
+        assert again.accepted == 0 and again.committed
+
+    @pytest.mark.parametrize("storage", ["dict", "sqlite"])
+    def test_atomic_add(self, records, storage):
+        manager = UserProfileManager(storage=storage)
+        result = manager.add_profiles(_profiles(records), atomic=True)
+        assert not result.committed
+        assert result.accepted == 0 and result.rejected > 0 and result.duplicates == 5
+        assert len(manager.user_profiles) == 0
+
+        valid = [profile for profile in _profiles(records[:-5]) if not profile.validation_errors()]
+        result = manager.add_profiles(valid, atomic=True, batch_size=16)
+        assert result.committed and result.accepted == len(valid)
+        assert len(manager.user_profiles) == len(valid)
+        result = manager.add_profiles(valid[:1], atomic=True)
+        assert not result.committed and result.duplicates == 1
+        assert len(manager.user_profiles) == len(valid)
+
+    @pytest.mark.parametrize("storage", ["dict", "sqlite"])
+    def test_remove_profiles(self, records, storage):
+        manager = UserProfileManager(storage=storage)
+        manager.add_profiles(_profiles(records))
+        emails = list(manager.user_profiles)
+        if storage == "dict":
+            manager.enable_sorted_view("name")
+
+        result = manager.remove_profiles([*emails[:3], "nobody@example.com"], atomic=True)
+        assert result == BulkResult(missing=1, committed=False)
+        assert len(manager.user_profiles) == len(emails)
+
+        result = manager.remove_profiles([*emails[:10], emails[0], "nobody@example.com"])
+        assert result == BulkResult(accepted=10, duplicates=1, missing=1)
+        assert list(manager.user_profiles) == emails[10:]
+        remaining = UserProfileManager()
+        remaining.add_profiles(manager.get_profile(email) for email in emails[10:])
+        assert [profile.email for profile in manager.sort_profiles("name")] == \
+            [profile.email for profile in remaining.sort_profiles("name")]
+
+        result = manager.remove_profiles(emails[10:], atomic=True)
+        assert result.committed and result.accepted == len(emails) - 10
+        assert len(manager.user_profiles) == 0
+
+    def test_load_returns_summary(self, records, tmp_path):
+        input_path = tmp_path / 'profiles.json'
+        input_path.write_text(json.dumps(records))
+        expected, rejected, duplicates = _one_by_one(records)
+        stats = PipelineStats()
+        manager = UserProfileManager(stats=stats)
+        result = manager.load_profiles_from_json(str(input_path), batch_size=16)
+        assert result == BulkResult(accepted=len(expected.user_profiles), rejected=rejected, duplicates=duplicates)
+        assert list(manager.user_profiles) == list(expected.user_profiles)
+        assert stats.counters["duplicates"] == duplicates
+        assert result.to_dict()["accepted"] == len(manager.user_profiles)
+
+    def test_load_reports_input_error(self, records, tmp_path, monkeypatch):
+        input_path = tmp_path / 'profiles.json'
+        input_path.write_text("42")
+        result = UserProfileManager().load_profiles_from_json(str(input_path))
+        assert result.error == "JSON file must contain a dictionary or list" and not result.partial
+
+        valid = [profile for profile in _profiles(records) if not profile.validation_errors()][:10]
+
+        def stops_early(*args, **kwargs):
+            yield from valid
+            raise InputFormatError("JSON value longer than 16 characters")
+
+        monkeypatch.setattr(user_manager, "iter_profiles", stops_early)
+        manager = UserProfileManager()
+        result = manager.load_profiles_from_json(str(input_path), batch_size=4)
+        assert result.partial and result.accepted == len(manager.user_profiles) == 10
+        assert result.to_dict()["error"] == "JSON value longer than 16 characters"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
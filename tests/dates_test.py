@@ -0,0 +1,82 @@
+import pytest
+import random
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import CompactProfileStore, Location, UserProfile
+from src import user_profile as user_profile_module
+from src.dates import DOB_FORMATS, parse_dob
+
+
+def _strptime(value):
+    """The parser parse_dob replaces: (ordinal, format index) or None."""
+    for format_index, dob_format in enumerate(DOB_FORMATS):
+        try:
+            return datetime.strptime(value, dob_format).toordinal(), format_index
+        except ValueError:
+            continue
+    return None
+
+
+def _candidates(count, seed):
+    rng = random.Random(seed)
+    pieces = ["0", "00", "1", "01", "2", "09", "12", "13", "29", "30", "31", "32", " 5", "1990", "2000",
+              "2023", "0000", "999", "10000", "-", "/", "", "a", " "]
+    for _ in range(count):
+        yield "".join(rng.choice(pieces) for _ in range(rng.randint(1, 6)))
+        year, month, day = rng.randint(1, 9999), rng.randint(0, 13), rng.randint(0, 32)
+        yield f"{year:04d}-{month:02d}-{day:02d}"
+        yield f"{month}/{day}/{year:04d}"
+
+
+class TestDates:
+    def test_matches_strptime(self):
+        for value in ["2006-10-15", "10/10/2006", "2024-02-29", "2023-02-29", "1990-1-5", "1/5/1990",
+                      "2006-10- 5", "2006-10-15 ", "20061015", "15-01-1990", "1990-13-45", *_candidates(3000, 21)]:
+            try:
+                parsed = parse_dob(value)
+            except ValueError:
+                parsed = None
+            expected = _strptime(value)
+            assert (None if parsed is None else (parsed.ordinal, parsed.format_index)) == expected, value
+            if parsed is not None:
+                assert date.fromordinal(parsed.ordinal) == date(parsed.year, parsed.month, parsed.day)
+
+    def test_cached(self):
+        parse_dob.cache_clear()
+        parse_dob("1990-01-15")
+        parse_dob("1990-01-15")
+        assert parse_dob.cache_info().hits == 1
+        with pytest.raises(ValueError, match="Invalid date format"):
+            parse_dob("1990-02-30")
+
+    def test_profile_parses_dob_once(self, monkeypatch):
+        profile = UserProfile("Ada Lovelace", "ada@example.com", "Secret@123", "not a date",
+                              Location("London", "EN", "GB"))
+        with pytest.raises(ValueError):
+            profile.dob_ordinal
+        profile.dob = "12/10/1815"
+        calls = []
+        monkeypatch.setattr(user_profile_module, "parse_dob", calls.append)
+        assert profile.dob_ordinal == date(1815, 12, 10).toordinal()
+        reference = date(2025, 6, 1)
+        assert profile.get_age(reference) == 209
+        assert profile.get_age(datetime(2025, 12, 31)) == 209
+        assert profile.get_age(reference) == profile.get_age(datetime(2025, 6, 1, 12))
+        assert calls == []
+
+    def test_views_use_stored_dates(self):
+        store = CompactProfileStore()
+        store["ada@example.com"] = UserProfile("Ada Lovelace", "ada@example.com", "Secret@123", "12/10/1815",
+                                               Location("London", "EN", "GB"))
+        view = store["ada@example.com"]
+        assert view.dob == "12/10/1815"
+        assert view.dob_ordinal == date(1815, 12, 10).toordinal()
+        assert view.get_age(date(2025, 6, 1)) == 209
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
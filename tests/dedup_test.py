@@ -0,0 +1,106 @@
+import pytest
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from src.dedup import BloomFilter, DuplicateDetector
+from src.main import main
+from benchmarks.synthetic import generate_profiles
+
+
+def _emails(count, prefix="user"):
+    return [f"{prefix}{number}@example.com" for number in range(count)]
+
+
+@pytest.fixture
+def shards(tmp_path):
+    """Two shards sharing 20 emails, the shared ones upper-cased in the second."""
+    records = list(generate_profiles(100, seed=18))
+    second = records[40:60] + records[60:]
+    second = [dict(record, email=record["email"].upper()) if index < 20 else record
+              for index, record in enumerate(second)]
+    paths = tmp_path / 'first.json', tmp_path / 'second.json'
+    paths[0].write_text(json.dumps(records[:60]))
+    paths[1].write_text(json.dumps(second))
+    return [str(path) for path in paths]
+
+
+class TestDedup:
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [email.encode() for email in _emails(1000)]
+        assert not any(bloom.add(key) for key in keys[:500])
+        assert all(key in bloom for key in keys[:500])
+        false_positives = sum(key in bloom for key in keys[500:])
+        assert false_positives < 25
+        restored = BloomFilter(1000, 0.01, bytearray(bloom.bits))
+        assert all(key in restored for key in keys[:500])
+
+    @pytest.mark.parametrize("on_disk", [False, True])
+    def test_detector(self, tmp_path, on_disk):
+        path = str(tmp_path / 'emails.db') if on_disk else None
+        emails = _emails(3000)
+        with DuplicateDetector(path, expected=1000, flush_size=100) as dedup:
+            assert all(dedup.add(email) for email in emails)
+            assert not any(dedup.add(email) for email in emails[::7])
+            assert dedup.add(emails[0].upper())
+            assert (dedup.checked, dedup.duplicates, dedup.count) == (3000 + 429 + 1, 429, 3001)
+        with DuplicateDetector(str(tmp_path / 'folded.db') if on_disk else None, casefold=True) as dedup:
+            assert dedup.add("Ann@Example.com") and not dedup.add("ann@example.COM")
+
+    def test_store_persists_and_recovers(self, tmp_path):
+        path = str(tmp_path / 'emails.db')
+        emails = _emails(500)
+        with DuplicateDetector(path, expected=100) as dedup:
+            for email in emails[:300]:
+                dedup.add(email)
+        with DuplicateDetector(path, expected=100) as dedup:
+            assert [dedup.add(email) for email in emails[290:310]] == [False] * 10 + [True] * 10
+        # A run that crashed leaves its filter marked dirty; it is rebuilt from the file.
+        crashed = DuplicateDetector(path, expected=100)
+        for email in emails[310:400]:
+            crashed.add(email)
+        crashed._flush()
+        crashed._database.close()
+        assert sqlite3.connect(path).execute("SELECT dirty FROM bloom").fetchone() == (1,)
+        with DuplicateDetector(path, expected=100) as dedup:
+            assert not any(dedup.add(email) for email in emails[:400])
+            assert all(dedup.add(email) for email in emails[400:])
+
+    def test_manager_with_dedup(self, shards, tmp_path):
+        report = tmp_path / 'duplicates.ndjson'
+        manager = UserProfileManager()
+        with DuplicateDetector(casefold=True, report=str(report)) as dedup:
+            manager.load_profiles_from_files(shards, dedup=dedup)
+        assert len(manager.user_profiles) == 100
+        assert len(report.read_text().splitlines()) == 20
+        assert all(line["email"].isupper() for line in map(json.loads, report.read_text().splitlines()))
+        plain = UserProfileManager()
+        plain.load_profiles_from_files(shards)
+        assert len(plain.user_profiles) == 120
+
+    def test_cli_runs_share_store(self, shards, tmp_path, capsys):
+        store = str(tmp_path / 'store.db')
+        first_output = tmp_path / 'first_out.json'
+        second_output = tmp_path / 'second_out.json'
+        assert main(["-i", shards[0], "-o", str(first_output), "--dedup-store", store, "--casefold-emails"]) == 0
+        assert main(["-i", shards[1], "-o", str(second_output), "--dedup-store", store, "--casefold-emails",
+                     "--duplicates", str(tmp_path / 'dropped.ndjson')]) == 0
+        assert "duplicates: 20 of 60 profiles dropped" in capsys.readouterr().err
+        assert len(json.loads(first_output.read_text())) + len(json.loads(second_output.read_text())) == 100
+
+        expected = tmp_path / 'expected.json'
+        assert main(["-i", *shards, "-o", str(expected), "--sort", "email", "--casefold-emails"]) == 0
+        for options in (["--limit", "200"], ["--external-sort"]):
+            output = tmp_path / 'output.json'
+            assert main(["-i", *shards, "-o", str(output), "--sort", "email", "--casefold-emails",
+                         "--dedup-store", str(tmp_path / f'{options[0]}.db'), *options]) == 0
+            assert output.read_bytes() == expected.read_bytes()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+import pytest
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, ProfileDiffer, UserProfile
+from src.diff import MergeConflictError, fingerprint
+from src.main import main
+from benchmarks.synthetic import generate_profiles
+
+
+def _profiles(records):
+    return [UserProfile.from_dict(record) for record in records]
+
+
+@pytest.fixture
+def datasets():
+    """Old and new records: 10 removed, 10 added, 5 changed, one duplicate email in new."""
+    records = list(generate_profiles(70, seed=22))
+    old = records[:60]
+    new = [dict(record) for record in records[10:70]]
+    new[0]["name"] = "Changed Name"
+    new[1]["dob"] = "2000-01-01"
+    new[2]["location"] = dict(new[2]["location"], city="Tacoma")
+    new[3]["password"] = "Changed@123"
+    new[4]["name"], new[4]["location"] = "Other Name", dict(new[4]["location"], country="ZZ")
+    new.append(dict(records[30], name="Later Duplicate"))
+    return old, new
+
+
+class TestDiff:
+    def test_fingerprint(self):
+        location = Location("Seattle", "WA", "US")
+        profile = UserProfile("Ada Lovelace", "ada@example.com", "Secret@123", "1815-12-10", location)
+        same = UserProfile("Ada Lovelace", "ada@example.com", "Secret@123", "1815-12-10", location)
+        other = UserProfile("Ada Lovelace", "ada@example.com", "Secret@123", "1815-12-11", location)
+        assert fingerprint(profile) == fingerprint(same) != fingerprint(other)
+        assert len(fingerprint(profile)) == 32
+
+    @pytest.mark.parametrize("partitions", [1, 4])
+    def test_diff(self, datasets, partitions, tmp_path):
+        old, new = datasets
+        differ = ProfileDiffer(partitions, spill_dir=str(tmp_path))
+        records = list(differ.diff(_profiles(old), _profiles(new)))
+        assert dict(differ.counts) == {"added": 10, "removed": 10, "changed": 5, "unchanged": 45}
+        by_email = {record["email"]: record for record in records}
+        assert {email for email, record in by_email.items() if record["status"] == "removed"} == \
+               {record["email"] for record in old[:10]}
+        assert by_email[new[-2]["email"]]["profile"] == new[-2]
+        assert by_email[new[0]["email"]]["changes"] == [
+            {"field": "name", "old": old[10]["name"], "new": "Changed Name"}]
+        assert [change["field"] for change in by_email[new[4]["email"]]["changes"]] == ["name", "location.country"]
+        assert by_email[new[2]["email"]]["changes"][0]["field"] == "location.city"
+        assert list(tmp_path.iterdir()) == []
+        if partitions == 1:
+            # One partition keeps the new input's order, removed profiles last.
+            assert [record["email"] for record in records[:5]] == [record["email"] for record in new[:5]]
+            assert all(record["status"] == "removed" for record in records[-10:])
+
+    @pytest.mark.parametrize("on_conflict", ["new", "old", "skip"])
+    def test_merge(self, datasets, on_conflict):
+        old, new = datasets
+        conflicts = io.StringIO()
+        differ = ProfileDiffer(3)
+        merged = list(differ.merge(_profiles(old), _profiles(new), on_conflict, conflicts))
+        assert differ.counts["conflicts"] == 5
+        assert len(conflicts.getvalue().splitlines()) == 5
+        by_email = {profile["email"]: profile for profile in merged}
+        assert len(merged) == len(by_email) == (70 if on_conflict != "skip" else 65)
+        if on_conflict == "new":
+            assert by_email[new[0]["email"]] == new[0]
+        elif on_conflict == "old":
+            assert by_email[new[0]["email"]] == old[10]
+        else:
+            assert new[0]["email"] not in by_email
+        assert by_email[old[0]["email"]] == old[0]
+        assert by_email[old[30]["email"]]["name"] != "Later Duplicate"
+
+    def test_merge_error(self, datasets):
+        old, new = datasets
+        with pytest.raises(MergeConflictError) as error:
+            list(ProfileDiffer().merge(_profiles(old), _profiles(new), "error"))
+        assert error.value.email == new[0]["email"]
+        with pytest.raises(ValueError):
+            list(ProfileDiffer().merge([], [], "newest"))
+
+    def test_cli(self, datasets, tmp_path, capsys):
+        old, new = datasets
+        old_path, new_path = tmp_path / 'old.json', tmp_path / 'new.ndjson'
+        old_path.write_text(json.dumps(old))
+        new_path.write_text("\n".join(json.dumps(record) for record in new))
+        diff_path, merged_path = tmp_path / 'diff.ndjson', tmp_path / 'merged.json'
+        assert main(["diff", str(old_path), str(new_path), "--output", str(diff_path), "--partitions", "2"]) == 0
+        assert "diff: 10 added, 10 removed, 5 changed, 45 unchanged" in capsys.readouterr().err
+        statuses = [json.loads(line)["status"] for line in diff_path.read_text().splitlines()]
+        assert sorted(statuses) == ["added"] * 10 + ["changed"] * 5 + ["removed"] * 10
+
+        assert main(["merge", str(old_path), str(new_path), "--on-conflict", "old",
+                     "--output", str(merged_path), "--conflicts", str(tmp_path / 'conflicts.ndjson')]) == 0
+        assert "5 conflicts resolved as old" in capsys.readouterr().err
+        assert len(json.loads(merged_path.read_text())) == 70
+        assert len((tmp_path / 'conflicts.ndjson').read_text().splitlines()) == 5
+        with pytest.raises(SystemExit, match="Conflicting versions"):
+            main(["merge", str(old_path), str(new_path), "--on-conflict", "error", "--output", str(merged_path)])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
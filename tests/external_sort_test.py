@@ -0,0 +1,73 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.external_sort import ExternalSorter
+from src.main import main
+from benchmarks.synthetic import generate_profiles, write_profiles
+
+
+def _profiles(count, seed=2):
+    profiles = []
+    for profile_data in generate_profiles(count, seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        profiles.append(UserProfile(**profile_data))
+    return profiles
+
+
+class TestExternalSort:
+    @pytest.mark.parametrize("spec", ["age", "name", "location", "country,-age,name", "-state,-name,email"])
+    def test_matches_in_memory_sort(self, tmp_path, spec):
+        profiles = _profiles(150)
+        # Duplicate emails: the first occurrence must win, as in the manager.
+        profiles.insert(40, UserProfile(name="Zed Dupe", email=profiles[90].email, password="Password1!",
+                                        dob="1950-01-01", location=Location("Austin", "TX", "US")))
+        manager = UserProfileManager()
+        for profile in profiles:
+            try:
+                manager.add_profile(profile)
+            except ValueError:
+                pass
+        expected = [json.dumps(profile.to_dict()) for profile in manager.sort_profiles(spec)]
+
+        sorter = ExternalSorter(spec, memory_budget=4000, spill_dir=str(tmp_path), fan_in=3)
+        assert list(sorter.sort(iter(profiles))) == expected
+        assert sorter.run_count > 3
+        assert list(tmp_path.iterdir()) == []
+
+    def test_duplicates_after_spilling(self, tmp_path):
+        profiles = _profiles(80)
+        sorter = ExternalSorter("name", memory_budget=4000, spill_dir=str(tmp_path))
+        result = [json.loads(profile_json)["email"] for profile_json in sorter.sort(profiles + profiles[::-1])]
+        assert sorted(result) == sorted({profile.email for profile in profiles})
+        assert sorter.run_count > 1
+        assert list(tmp_path.iterdir()) == []
+
+    def test_single_run_stays_in_memory(self, tmp_path):
+        sorter = ExternalSorter("email", spill_dir=str(tmp_path))
+        result = [json.loads(profile_json)["email"] for profile_json in sorter.sort(_profiles(20))]
+        assert result == sorted(result)
+        assert sorter.run_count == 0
+
+    def test_cli_output_is_byte_identical(self, tmp_path):
+        input_path = tmp_path / 'input.json'
+        write_profiles(str(input_path), 300, seed=4)
+        in_memory_path = tmp_path / 'in_memory.json'
+        external_path = tmp_path / 'external.json'
+        assert main(["-i", str(input_path), "-o", str(in_memory_path), "--sort", "location,name"]) == 0
+        assert main(["-i", str(input_path), "-o", str(external_path), "--sort", "location,name",
+                     "--external-sort", "--memory-budget", "1", "--spill-dir", str(tmp_path)]) == 0
+        assert external_path.read_bytes() == in_memory_path.read_bytes()
+
+    def test_cli_without_valid_profiles(self, tmp_path):
+        invalid_path = Path(__file__).parent.parent / 'data' / 'invalid' / 'user_list.json'
+        with pytest.raises(SystemExit):
+            main(["-i", str(invalid_path), "--external-sort"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,108 @@
+import pytest
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.main import _parse_where
+from benchmarks.synthetic import generate_profiles
+
+REFERENCE_DATE = datetime(2024, 6, 15)
+
+
+def _build_manager(count, seed=1):
+    manager = UserProfileManager()
+    for profile_data in generate_profiles(count, seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        manager.add_profile(UserProfile(**profile_data))
+    return manager
+
+
+def _brute_force(manager, country=None, state=None, min_age=None, max_age=None, name_prefix=None):
+    result = []
+    for profile in manager.user_profiles.values():
+        age = profile.get_age(REFERENCE_DATE)
+        if ((country is None or profile.location.country == country)
+                and (state is None or profile.location.state == state)
+                and (min_age is None or age >= min_age)
+                and (max_age is None or age <= max_age)
+                and (name_prefix is None or profile.name.casefold().startswith(name_prefix.casefold()))):
+            result.append(profile.email)
+    return sorted(result)
+
+
+class TestQuery:
+    def test_query_matches_full_scan(self):
+        manager = _build_manager(400)
+        cases = [
+            dict(country="US"),
+            dict(country="US", state="WA"),
+            dict(state="ON"),
+            dict(min_age=30, max_age=40),
+            dict(min_age=80),
+            dict(max_age=20, country="CA"),
+            dict(name_prefix="al"),
+            dict(name_prefix="Bob K", min_age=25),
+            dict(country="XX"),
+        ]
+        for criteria in cases:
+            result = manager.query(reference_date=REFERENCE_DATE, **criteria)
+            assert sorted(p.email for p in result) == _brute_force(manager, **criteria), criteria
+
+    def test_indexes_follow_mutations(self):
+        manager = _build_manager(200)
+        assert len(manager.query(country="US", reference_date=REFERENCE_DATE)) > 0
+        rng = random.Random(3)
+        for email in rng.sample(list(manager.user_profiles), 50):
+            manager.remove_profile(email)
+        manager.add_profile(UserProfile(name="Alma Stone", email="alma@example.com", password="Password1!",
+                                        dob="1984-06-16", location=Location("Seattle", "WA", "US")))
+        for criteria in (dict(country="US", state="WA"), dict(min_age=39, max_age=39), dict(name_prefix="Alm")):
+            result = manager.query(reference_date=REFERENCE_DATE, **criteria)
+            assert sorted(p.email for p in result) == _brute_force(manager, **criteria), criteria
+        assert [p.email for p in manager.query(name_prefix="alma")] == ["alma@example.com"]
+
+    def test_dob_range_and_sort(self):
+        manager = _build_manager(300)
+        result = manager.query(dob_from="1990-01-01", dob_to="12/31/1994", sort="-age,email")
+        expected = [p for p in manager.sort_profiles("-age,email")
+                    if datetime(1990, 1, 1) <= p.extract_date(p.dob) <= datetime(1994, 12, 31)]
+        assert result == expected
+
+    def test_ties_keep_insertion_order(self):
+        manager = _build_manager(400, seed=6)
+        removed = manager.get_profile(next(iter(manager.user_profiles)))
+        manager.remove_profile(removed.email)
+        manager.add_profile(removed)
+        database = UserProfileManager(storage="sqlite")
+        database.add_profiles(manager.get_profile(email) for email in manager.user_profiles)
+        for criteria, matches in ((dict(country="US"), lambda p: p.location.country == "US"),
+                                  (dict(min_age=30, max_age=60), lambda p: 30 <= p.get_age(REFERENCE_DATE) <= 60),
+                                  (dict(name_prefix="a"), lambda p: p.name.casefold().startswith("a"))):
+            for spec in ("name", "age", "country", "-state"):
+                expected = [p.email for p in manager.sort_profiles(spec) if matches(p)]
+                result = manager.query(sort=spec, reference_date=REFERENCE_DATE, **criteria)
+                assert [p.email for p in result] == expected, (criteria, spec)
+                assert [p.email for p in database.query(sort=spec, reference_date=REFERENCE_DATE,
+                                                        **criteria)] == expected, (criteria, spec)
+            unsorted = [p.email for p in manager.user_profiles.values() if matches(p)]
+            assert [p.email for p in manager.query(reference_date=REFERENCE_DATE, **criteria)] == unsorted
+
+    def test_parse_where(self):
+        assert _parse_where(["country=US,state=WA", "age=30..40"]) == {
+            "country": "US", "state": "WA", "min_age": 30, "max_age": 40,
+        }
+        assert _parse_where(["age=..20", "name=Al", "dob=1990-01-01.."]) == {
+            "min_age": None, "max_age": 20, "name_prefix": "Al", "dob_from": "1990-01-01", "dob_to": None,
+        }
+        with pytest.raises(ValueError):
+            _parse_where(["height=2"])
+        with pytest.raises(ValueError):
+            _parse_where(["country"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
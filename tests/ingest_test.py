@@ -0,0 +1,107 @@
+import pytest
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from src.ingest import expand_inputs, read_file
+from src.main import main
+from benchmarks.synthetic import generate_profiles
+
+
+@pytest.fixture
+def shards(tmp_path):
+    """Three shards whose emails overlap, plus one invalid record."""
+    records = list(generate_profiles(90, seed=14))
+    shard_dir = tmp_path / 'shards'
+    (shard_dir / 'nested').mkdir(parents=True)
+    first = records[:40]
+    second = [dict(record, name="Second Copy") for record in records[30:70]]
+    second.append(dict(records[0], email="not-an-email"))
+    third = [dict(record, name="Third Copy") for record in records[60:90]]
+    (shard_dir / 'a.json').write_text(json.dumps(first))
+    (shard_dir / 'b.ndjson').write_text("".join(json.dumps(record) + "\n" for record in second))
+    (shard_dir / 'nested' / 'c.json').write_text(json.dumps(third))
+    (shard_dir / 'notes.txt').write_text("not an input")
+    return shard_dir
+
+
+class TestIngest:
+    def test_expand_inputs(self, shards):
+        expected = [str(shards / 'a.json'), str(shards / 'b.ndjson'), str(shards / 'nested' / 'c.json')]
+        assert expand_inputs([str(shards)]) == expected
+        assert expand_inputs([str(shards / '**' / '*.json'), str(shards / 'b.ndjson')]) == [
+            str(shards / 'a.json'), str(shards / 'nested' / 'c.json'), str(shards / 'b.ndjson')]
+        assert expand_inputs([str(shards / 'b.ndjson'), str(shards)]) == [
+            str(shards / 'b.ndjson'), str(shards / 'a.json'), str(shards / 'nested' / 'c.json')]
+        with pytest.raises(ValueError):
+            expand_inputs([str(shards / 'missing.json')])
+        with pytest.raises(ValueError):
+            expand_inputs([str(shards / '*.xml')])
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_first_file_wins(self, shards, workers):
+        manager = UserProfileManager()
+        reports = manager.load_profiles_from_files(expand_inputs([str(shards)]), workers=workers)
+        assert [(report.records, report.accepted, report.rejected) for report in reports] == [
+            (40, 40, 0), (41, 40, 1), (30, 30, 0)]
+        assert all(report.error is None for report in reports)
+        names = [profile.name for profile in manager.user_profiles.values()]
+        assert len(names) == 90
+        assert names.count("Second Copy") == 30
+        assert names.count("Third Copy") == 20
+
+    def test_unreadable_file_is_reported(self, tmp_path):
+        broken = tmp_path / 'broken.json'
+        broken.write_text('{"name": ')
+        report, accepted, rejected = read_file(str(broken))
+        assert report.error is not None and accepted == [] and rejected == []
+        assert "ERROR" in str(report)
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_partial_file_is_reported(self, shards, tmp_path, workers):
+        records = list(generate_profiles(10, seed=15))
+        truncated = tmp_path / 'truncated.ndjson'
+        truncated.write_text("".join(json.dumps(record) + "\n" for record in records[:6]) + '{"name": \n'
+                             + "".join(json.dumps(record) + "\n" for record in records[6:]))
+        manager = UserProfileManager()
+        reports = manager.load_profiles_from_files([str(truncated), str(shards / 'a.json')], batch_size=3,
+                                                   workers=workers)
+        assert reports[0].partial and reports[0].error is not None
+        assert (reports[0].records, reports[0].accepted) == (6, 6)
+        assert str(reports[0]).startswith(f"{truncated}: PARTIAL: 6 records, 6 accepted")
+        assert not reports[1].partial and reports[1].accepted == 40
+        assert all(manager.get_profile(record["email"]) is not None for record in records[:6])
+        assert all(manager.get_profile(record["email"]) is None for record in records[6:])
+
+    def test_cli_multiple_inputs(self, shards, tmp_path, capsys):
+        merged = tmp_path / 'merged.json'
+        with open(merged, mode='w') as merged_file:
+            json.dump([json.loads(line) for line in (shards / 'b.ndjson').read_text().splitlines()]
+                      + json.loads((shards / 'a.json').read_text()), merged_file)
+        expected_output = tmp_path / 'expected.json'
+        assert main(["-i", str(merged), "-o", str(expected_output), "--sort", "name,email"]) == 0
+        capsys.readouterr()
+
+        output = tmp_path / 'output.json'
+        rejects = tmp_path / 'rejects.ndjson'
+        assert main(["-i", str(shards / 'b.ndjson'), str(shards / 'a.json'), "-o", str(output),
+                     "--sort", "name,email", "--workers", "2", "--rejects", str(rejects)]) == 0
+        assert output.read_bytes() == expected_output.read_bytes()
+        lines = capsys.readouterr().err.splitlines()
+        assert lines[0].startswith(f"{shards / 'b.ndjson'}: 41 records, 40 accepted, 1 rejected")
+        assert lines[-1].startswith("total: 2 files, 81 records, 80 accepted, 1 rejected")
+        assert json.loads(rejects.read_text())["source"] == str(shards / 'b.ndjson')
+
+        assert main(["-i", os.path.join(str(shards), "*.json*"), "-i", str(shards / 'nested'),
+                     "-o", str(output), "--limit", "5"]) == 0
+        assert len(json.loads(output.read_text())) == 5
+        with pytest.raises(SystemExit):
+            main(["-i", str(shards / 'missing.json'), "-o", str(output)])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,94 @@
+import pytest
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.journal import JournalError, ProfileJournal, replay
+from benchmarks.synthetic import generate_profiles
+
+
+def _profiles(count, seed=10):
+    profiles = []
+    for profile_data in generate_profiles(count, seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        profiles.append(UserProfile(**profile_data))
+    return profiles
+
+
+def _state(manager):
+    return [profile.to_dict() for profile in manager.user_profiles.values()]
+
+
+def _reopen(tmp_path, storage="dict"):
+    manager = UserProfileManager(storage=storage)
+    manager.open_journal(str(tmp_path / 'profiles.journal'), str(tmp_path / 'profiles.snap'), compact_every=None)
+    return manager
+
+
+class TestJournal:
+    @pytest.mark.parametrize("storage", ["dict", "compact"])
+    def test_replay_rebuilds_manager(self, tmp_path, storage):
+        manager = _reopen(tmp_path, storage)
+        profiles = _profiles(60)
+        for profile in profiles[:40]:
+            manager.add_profile(profile)
+        for profile in profiles[:40:3]:
+            manager.remove_profile(profile.email)
+        manager.compact_journal()
+        assert os.path.getsize(tmp_path / 'profiles.journal') == 0
+        for profile in profiles[40:]:
+            manager.add_profile(profile)
+        manager.remove_profile(profiles[1].email)
+        manager.add_profile(profiles[0])
+        expected = _state(manager)
+        manager.close_journal()
+
+        reopened = _reopen(tmp_path, storage)
+        assert _state(reopened) == expected
+        reopened.close_journal()
+
+    def test_background_compaction(self, tmp_path):
+        manager = UserProfileManager()
+        journal_path = str(tmp_path / 'profiles.journal')
+        manager.open_journal(journal_path, str(tmp_path / 'profiles.snap'), sync_every=8, compact_every=25)
+        for profile in _profiles(100):
+            manager.add_profile(profile)
+        expected = _state(manager)
+        manager.close_journal()
+        assert not os.path.exists(journal_path + ".compacting")
+        assert len(list(replay(journal_path))) < 25
+        assert _state(_reopen(tmp_path)) == expected
+
+    def test_interrupted_compaction_and_torn_record(self, tmp_path):
+        manager = _reopen(tmp_path)
+        profiles = _profiles(20)
+        for profile in profiles[:10]:
+            manager.add_profile(profile)
+        manager.compact_journal()
+        manager.remove_profile(profiles[0].email)
+        manager.add_profile(profiles[10])
+        manager.close_journal()
+        expected = _state(manager)
+        journal_path = tmp_path / 'profiles.journal'
+        # Compaction rotated the journal but crashed before writing the snapshot.
+        os.replace(journal_path, str(journal_path) + ".compacting")
+        journal = ProfileJournal(str(journal_path))
+        journal.append_add(profiles[11])
+        journal.close()
+        with open(journal_path, mode='a') as journal_file:
+            journal_file.write('["+","Half Writ')
+        reopened = _reopen(tmp_path)
+        assert _state(reopened) == expected + [profiles[11].to_dict()]
+        assert not os.path.exists(str(journal_path) + ".compacting")
+        reopened.close_journal()
+
+        journal_path.write_text('["?"]\n')
+        with pytest.raises(JournalError):
+            _reopen(tmp_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,56 @@
+import pytest
+import copy
+import pickle
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from benchmarks.synthetic import write_profiles
+
+
+class TestLocation:
+    def test_interned_value_object(self):
+        location = Location("Seattle", "WA", "US")
+        assert Location(city="Seattle", state="WA", country="US") is location
+        assert pickle.loads(pickle.dumps(location)) is location
+        assert copy.deepcopy(location) is location
+        assert location == Location("Seattle", "WA", "US") and location != Location("Austin", "TX", "US")
+        assert len({location, Location("Seattle", "WA", "US"), Location("Austin", "TX", "US")}) == 2
+        assert repr(location) == "Location('Seattle', 'WA', 'US')"
+        with pytest.raises(AttributeError):
+            location.city = "Tacoma"
+        with pytest.raises(AttributeError):
+            location.extra = 1
+        assert not hasattr(location, "__dict__")
+
+    def test_validation_cached(self, monkeypatch):
+        calls = []
+        from src import location as location_module
+        validate = location_module.valid_location_fields
+        monkeypatch.setattr(location_module, "valid_location_fields",
+                            lambda *fields: calls.append(fields) or validate(*fields))
+        location = Location("Cachetown", "CT", "US")
+        assert location.valid_location() and Location("Cachetown", "CT", "US").valid_location()
+        assert not Location("Cachetown", "Connecticut", "US").valid_location()
+        assert len(calls) == 2
+
+    def test_unhashable_fields(self):
+        location = Location(["Seattle"], "WA", "US")
+        assert location is not Location(["Seattle"], "WA", "US")
+        assert not location.valid_location()
+
+    def test_loaded_profiles_share_locations(self, tmp_path):
+        input_path = tmp_path / 'input.json'
+        write_profiles(str(input_path), 500, seed=19)
+        manager = UserProfileManager()
+        manager.load_profiles_from_json(str(input_path))
+        locations = {id(profile.location) for profile in manager.user_profiles.values()}
+        assert len(locations) <= 12
+        profile = UserProfile.from_dict(next(iter(manager.user_profiles.values())).to_dict())
+        assert any(profile.location is other.location for other in manager.user_profiles.values())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,51 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import RejectWriter, UserProfileManager
+
+DATA_PATH = Path(__file__).parent.parent / 'data'
+
+
+def _write_mixed_input(path, ndjson):
+    with open(DATA_PATH / 'valid' / 'input' / 'user_list.json', 'r') as f:
+        valid = json.load(f)
+    with open(DATA_PATH / 'invalid' / 'user_list.json', 'r') as f:
+        invalid = json.load(f)
+    duplicate = dict(valid[2], name="Other Person")
+    records = [valid[0], invalid[0], valid[1], duplicate, invalid[1], valid[2], valid[3], valid[4], invalid[2]]
+    if ndjson:
+        path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    else:
+        path.write_text(json.dumps(records))
+
+
+class TestParallelIngest:
+    @pytest.mark.parametrize("input_format", ["json", "ndjson"])
+    def test_parallel_matches_serial(self, tmp_path, input_format):
+        input_path = tmp_path / f'mixed.{input_format}'
+        _write_mixed_input(input_path, input_format == "ndjson")
+
+        results = []
+        for workers in (1, 3):
+            rejects_path = tmp_path / f'rejects_{workers}.ndjson'
+            manager = UserProfileManager()
+            with RejectWriter(str(rejects_path)) as rejects:
+                manager.load_profiles_from_json(str(input_path), input_format=input_format, batch_size=2,
+                                                rejects=rejects, workers=workers)
+            profiles = [profile.to_dict() for profile in manager.user_profiles.values()]
+            results.append((profiles, rejects_path.read_text()))
+
+        assert results[0] == results[1]
+        profiles, rejects_text = results[1]
+        assert len(profiles) == 5
+        # The first occurrence of a duplicate email wins.
+        assert profiles[2]["name"] == "Other Person"
+        assert [json.loads(line)["index"] for line in rejects_text.splitlines()] == [1, 4, 8]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
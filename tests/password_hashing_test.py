@@ -0,0 +1,144 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import PasswordHasher, PipelineStats, UserProfile, UserProfileManager
+from src.main import main
+from src.passwords import verify_password
+from src.validation import is_password_hash
+from benchmarks.synthetic import generate_profiles
+
+# Low costs keep the tests fast; the format and the code paths are the same.
+FAST_COSTS = {"scrypt": 16, "pbkdf2_sha256": 100}
+
+
+@pytest.fixture
+def records():
+    return list(generate_profiles(40, seed=20))
+
+
+@pytest.fixture
+def input_path(tmp_path, records):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps(records))
+    return str(path)
+
+
+class TestPasswordHashing:
+    @pytest.mark.parametrize("algorithm", ["scrypt", "pbkdf2_sha256"])
+    def test_hash_and_verify(self, algorithm):
+        hasher = PasswordHasher(algorithm, FAST_COSTS[algorithm])
+        first, second = hasher.hash("Secret@123"), hasher.hash("Secret@123")
+        assert first.startswith(f"{algorithm}${FAST_COSTS[algorithm]}$")
+        assert first != second
+        assert is_password_hash(first)
+        assert verify_password("Secret@123", first)
+        assert verify_password("Secret@123", second)
+        assert not verify_password("Secret@124", first)
+        assert verify_password("Secret@123", "Secret@123")
+        assert not verify_password("Secret@123", "scrypt$16$8$1$!!!$x")
+
+    def test_verify_rejects_out_of_range_costs(self):
+        salt_and_key = "$c2FsdA==$a2V5"
+        for stored in ("scrypt$4194304$8$1", "scrypt$1024$8$64", "scrypt$1024$1000000$1", "scrypt$1000$8$1",
+                       "pbkdf2_sha256$1000000000", "pbkdf2_sha256$0"):
+            assert not verify_password("Secret@123", stored + salt_and_key), stored
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            PasswordHasher("md5")
+        with pytest.raises(ValueError):
+            PasswordHasher("scrypt", 1000)
+        with pytest.raises(ValueError):
+            PasswordHasher("pbkdf2_sha256", 100, workers=0)
+        with pytest.raises(ValueError):
+            PasswordHasher("pbkdf2_sha256", 10**9)
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_hash_many_keeps_order(self, records, workers):
+        hasher = PasswordHasher("scrypt", FAST_COSTS["scrypt"], workers=workers, batch_size=7)
+        hashes = list(hasher.hash_many(record["password"] for record in records))
+        assert len(hashes) == len(records)
+        assert all(verify_password(record["password"], password_hash)
+                   for record, password_hash in zip(records, hashes))
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_load_and_verify(self, input_path, records, workers):
+        stats = PipelineStats()
+        manager = UserProfileManager(stats=stats)
+        hasher = PasswordHasher("scrypt", FAST_COSTS["scrypt"], workers=workers, batch_size=8)
+        manager.load_profiles_from_json(input_path, hasher=hasher)
+        assert len(manager.user_profiles) == len(records)
+        assert stats.counters["hashed"] == len(records)
+        assert "hash" in stats.timers
+        for record in records[:5]:
+            assert is_password_hash(manager.get_profile(record["email"]).password)
+            assert manager.verify_password(record["email"], record["password"])
+            assert not manager.verify_password(record["email"], record["password"] + "x")
+        assert not manager.verify_password("nobody@example.com", records[0]["password"])
+
+    def test_save_hashes_plaintext(self, input_path, records, tmp_path):
+        manager = UserProfileManager()
+        manager.load_profiles_from_json(input_path)
+        output_path = tmp_path / 'saved.json'
+        manager.save_profiles_to_json(str(output_path), hasher=PasswordHasher("pbkdf2_sha256", 100))
+        assert manager.get_profile(records[0]["email"]).password == records[0]["password"]
+        saved = json.loads(output_path.read_text())
+        assert [profile["email"] for profile in saved] == [record["email"] for record in records]
+        assert all(verify_password(record["password"], profile["password"])
+                   for record, profile in zip(records, saved))
+
+        # Hashes only pass validation when the input is marked as hashed.
+        assert UserProfileManager().load_profiles_from_json(str(output_path)).rejected == len(records)
+        for workers in (1, 2):
+            reloaded = UserProfileManager()
+            reloaded.load_profiles_from_json(str(output_path), workers=workers, hashed_input=True,
+                                             hasher=PasswordHasher("pbkdf2_sha256", 100))
+            assert len(reloaded.user_profiles) == len(records)
+            assert reloaded.get_profile(records[0]["email"]).password == saved[0]["password"]
+
+    def test_hash_shaped_password_is_validated(self, records, tmp_path):
+        record = dict(records[0], password="pbkdf2_sha256$1$YQ==$YQ==")
+        input_path = tmp_path / 'weak.json'
+        input_path.write_text(json.dumps([record]))
+        manager = UserProfileManager()
+        assert manager.load_profiles_from_json(str(input_path)).rejected == 1
+        assert manager.add_profiles([UserProfile.from_dict(record)]).rejected == 1
+        with pytest.raises(SystemExit):
+            main(["--input", str(input_path), "--rejects", str(tmp_path / 'rejects.ndjson')])
+        assert json.loads((tmp_path / 'rejects.ndjson').read_text())["errors"][0]["field"] == "password"
+
+    @pytest.mark.parametrize("storage", ["dict", "sqlite"])
+    def test_duplicates_are_not_hashed(self, records, storage):
+        stats = PipelineStats()
+        manager = UserProfileManager(storage=storage, stats=stats)
+        manager.add_profiles(UserProfile.from_dict(record) for record in records[:10])
+        hasher = PasswordHasher("scrypt", FAST_COSTS["scrypt"])
+        result = manager.add_profiles((UserProfile.from_dict(record) for record in records + records[:20]),
+                                      batch_size=16, hasher=hasher)
+        assert result.accepted == len(records) - 10 and result.duplicates == 30
+        assert stats.counters["hashed"] == len(records) - 10
+        assert manager.verify_password(records[-1]["email"], records[-1]["password"])
+        assert manager.get_profile(records[0]["email"]).password == records[0]["password"]
+
+    def test_cli_hash_passwords(self, input_path, records, tmp_path):
+        output_path = tmp_path / 'output.json'
+        main(["--input", input_path, "--output", str(output_path), "--hash-passwords", "scrypt",
+              "--hash-cost", "16", "--hash-workers", "1", "--limit", "5"])
+        output = json.loads(output_path.read_text())
+        passwords = {record["email"]: record["password"] for record in records}
+        assert len(output) == 5
+        assert all(verify_password(passwords[profile["email"]], profile["password"]) for profile in output)
+
+        main(["--input", str(output_path), "--output", str(tmp_path / 'reloaded.json'), "--hashed-input"])
+        assert json.loads((tmp_path / 'reloaded.json').read_text()) == output
+
+        with pytest.raises(SystemExit):
+            main(["--input", input_path, "--hash-passwords", "scrypt", "--hash-cost", "1000"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,70 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import CompactProfileStore, Location, ProfileView, UserProfile, UserProfileManager
+
+VALID_LIST_PATH = Path(__file__).parent.parent / 'data' / 'valid' / 'input' / 'user_list.json'
+
+
+def _load(storage):
+    manager = UserProfileManager(storage=storage)
+    manager.load_profiles_from_json(str(VALID_LIST_PATH))
+    return manager
+
+
+class TestCompactProfileStore:
+    def test_compact_matches_dict_storage(self):
+        dict_manager = _load("dict")
+        compact_manager = _load("compact")
+        assert isinstance(compact_manager.user_profiles, CompactProfileStore)
+        assert len(compact_manager.user_profiles) == 5
+        for method in ("sort_profiles_by_age", "sort_profiles_by_name",
+                       "sort_profiles_by_email", "sort_profiles_by_location"):
+            expected = [p.to_dict() for p in getattr(dict_manager, method)()]
+            actual = [p.to_dict() for p in getattr(compact_manager, method)()]
+            assert actual == expected, method
+
+    def test_views_are_read_only_profiles(self):
+        manager = _load("compact")
+        view = manager.get_profile("carol.d@example.net")
+        assert isinstance(view, ProfileView)
+        assert view.validate() == True
+        assert view.dob == "12/05/2000"
+        assert (view.location.city, view.location.state, view.location.country) == ("Austin", "TX", "US")
+        with pytest.raises(AttributeError):
+            view.name = "Other Name"
+        assert not hasattr(view, "__dict__")
+        assert not hasattr(_load("dict").get_profile("bob.williams@test.org"), "__dict__")
+        assert manager.get_profile("nobody@example.com") is None
+
+    def test_remove_and_reuse_rows(self):
+        manager = _load("compact")
+        manager.remove_profile("bob.williams@test.org")
+        assert manager.get_profile("bob.williams@test.org") is None
+        with pytest.raises(ValueError):
+            manager.remove_profile("bob.williams@test.org")
+
+        profile = UserProfile(name="Frank Green", email="frank@example.com", password="Password1!",
+                              dob="3/5/1990", location=Location("Seattle", "WA", "US"))
+        manager.add_profile(profile)
+        assert len(manager.user_profiles) == 5
+        assert manager.get_profile("frank@example.com").to_dict() == profile.to_dict()
+        # Rows are reused, but iteration keeps insertion order.
+        assert list(manager.user_profiles)[-1] == "frank@example.com"
+        with pytest.raises(ValueError):
+            manager.add_profile(profile)
+
+    def test_locations_are_shared(self):
+        manager = _load("compact")
+        store = manager.user_profiles
+        store["x@example.com"] = UserProfile(name="Ann Lee", email="x@example.com", password="Password1!",
+                                             dob="1990-01-01", location=Location("Seattle", "WA", "US"))
+        assert store["x@example.com"].location is store["alice.johnson@email.com"].location
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,146 @@
+import pytest
+import io
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import ResultCache
+from src import main as main_module
+from src import result_cache as result_cache_module
+from src.main import main
+from src.result_cache import code_digest, result_key
+from benchmarks.synthetic import write_profiles
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    path = tmp_path / 'input.json'
+    write_profiles(str(path), 60, seed=24)
+    return str(path)
+
+
+def _fail_run(args, criteria):
+    raise AssertionError("the run should have been served from the cache")
+
+
+def _entries(cache_dir):
+    return sorted(path.name for path in cache_dir.glob("*.out")) if cache_dir.exists() else []
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / 'result-cache'
+
+
+class TestResultCache:
+    def test_hit_replays_output(self, input_path, tmp_path, cache_dir, monkeypatch, capsys):
+        first, second = tmp_path / 'first.json', tmp_path / 'second.json'
+        cache = ["--cache-dir", str(cache_dir)]
+        assert main(["-i", input_path, "-o", str(first), "--sort", "name", *cache]) == 0
+        assert len(_entries(cache_dir)) == 1
+        monkeypatch.setattr(main_module, "_run", _fail_run)
+        assert main(["-i", input_path, "-o", str(second), "--sort", "name", *cache]) == 0
+        assert second.read_bytes() == first.read_bytes()
+        assert "cache: reused" in capsys.readouterr().err
+
+    def test_stdout_hit(self, input_path, tmp_path, cache_dir, monkeypatch, capsys):
+        output = tmp_path / 'output.json'
+        cache = ["--cache-dir", str(cache_dir)]
+        main(["-i", input_path, "--sort", "name", "--format", "ndjson", *cache])
+        expected = capsys.readouterr().out
+        main(["-i", input_path, "-o", str(output), "--sort", "name", *cache])
+        monkeypatch.setattr(main_module, "_run", _fail_run)
+        main(["-i", input_path, "--sort", "name", "--format", "ndjson", *cache])
+        assert capsys.readouterr().out == expected
+        # Standard output shares the entry of the file output and adds the final newline.
+        main(["-i", input_path, "--sort", "name", *cache])
+        assert capsys.readouterr().out == output.read_text() + "\n"
+
+    def test_opt_in(self, input_path, tmp_path, monkeypatch):
+        monkeypatch.setenv("USER_PROFILES_CACHE_DIR", str(tmp_path / 'default-cache'))
+        output = str(tmp_path / 'output.json')
+        main(["-i", input_path, "-o", output])
+        assert not (tmp_path / 'default-cache').exists()
+        main(["-i", input_path, "-o", output, "--cache"])
+        assert len(_entries(tmp_path / 'default-cache')) == 1
+
+    def test_misses(self, input_path, tmp_path, cache_dir, monkeypatch):
+        output = str(tmp_path / 'output.json')
+        cache = ["--cache-dir", str(cache_dir)]
+        for options in ([], ["--sort=-age"], ["--limit", "5"], ["--compact"], ["--where", "country=US"]):
+            main(["-i", input_path, "-o", output, *options, *cache])
+        assert len(_entries(cache_dir)) == 5
+
+        write_profiles(input_path, 61, seed=24)
+        main(["-i", input_path, "-o", output, *cache])
+        assert len(_entries(cache_dir)) == 6
+
+        # A change to the code makes every earlier entry stale.
+        monkeypatch.setattr(result_cache_module, "code_digest", lambda: "changed")
+        main(["-i", input_path, "-o", output, *cache])
+        assert len(_entries(cache_dir)) == 7
+        monkeypatch.undo()
+
+        main(["-i", input_path, "-o", output, "--sort", "name"])
+        main(["-i", input_path, "-o", output, "--sort", "name", "--rejects", str(tmp_path / 'rejects.ndjson'), *cache])
+        main(["-i", input_path, "-o", str(tmp_path / 'parts'), "--partition-by", "country", *cache])
+        assert len(_entries(cache_dir)) == 7
+
+    def test_key_modes(self, input_path, tmp_path):
+        copy = tmp_path / 'copy.json'
+        shutil.copyfile(input_path, copy)
+        os.utime(copy, ns=(1, 1))
+        options = {"sort": "age"}
+        assert result_key([input_path], options) != result_key([str(copy)], options)
+        assert result_key([input_path], options, "content") == result_key([str(copy)], options, "content")
+        assert result_key([input_path], options) != result_key([input_path], {"sort": "name"})
+        with pytest.raises(ValueError):
+            result_key([input_path], options, "size")
+        assert code_digest() == code_digest() and len(code_digest()) == 32
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResultCache(str(tmp_path / 'cache'), max_bytes=250)
+        for number, key in enumerate(["a", "b", "c"]):
+            with cache.record(key, io.StringIO()) as handle:
+                handle.write(key * 100)
+            os.utime(tmp_path / 'cache' / f"{key}.out", ns=(number, number))
+        assert _entries(tmp_path / 'cache') == ["b.out", "c.out"]
+
+        with cache.open("b") as entry:
+            handle = io.StringIO()
+            assert cache.replay(entry, handle) == 100
+            assert handle.getvalue() == "b" * 100
+        with cache.record("d", io.StringIO()) as handle:
+            handle.write("d" * 100)
+        assert _entries(tmp_path / 'cache') == ["b.out", "d.out"]
+        assert cache.open("c") is None
+
+    def test_oversized_entry_is_not_cached(self, tmp_path):
+        cache = ResultCache(str(tmp_path / 'cache'), max_bytes=1000)
+        for key in ("a", "b"):
+            with cache.record(key, io.StringIO()) as handle:
+                handle.write(key * 300)
+        output = io.StringIO()
+        with cache.record("large", output) as handle:
+            for _ in range(50):
+                handle.write("x" * 100)
+            assert list((tmp_path / 'cache').glob(".tmp-*")) == []
+        assert output.getvalue() == "x" * 5000
+        assert sorted(path.name for path in (tmp_path / 'cache').iterdir()) == ["a.out", "b.out"]
+
+    def test_failed_write_is_not_cached(self, tmp_path):
+        cache = ResultCache(str(tmp_path / 'cache'))
+        output = io.StringIO()
+        with pytest.raises(RuntimeError):
+            with cache.record("key", output) as handle:
+                handle.write("partial")
+                raise RuntimeError("interrupted")
+        assert output.getvalue() == "partial"
+        assert list((tmp_path / 'cache').iterdir()) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+import pytest
+import asyncio
+import http.client
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from src.main import main
+from src.server import ProfileServer, send_request
+from benchmarks.synthetic import write_profiles
+
+NEW_PROFILE = {
+    "name": "Zoe Quinn", "email": "zoe.quinn@example.com", "password": "ZoePass42!",
+    "dob": "1999-02-03", "location": {"city": "Boston", "state": "MA", "country": "US"},
+}
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    input_path = tmp_path / 'input.json'
+    write_profiles(str(input_path), 200, seed=17)
+    return str(input_path)
+
+
+@pytest.fixture
+def server(input_path, tmp_path):
+    """A server on a Unix socket and an ephemeral HTTP port, running in a thread."""
+    manager = UserProfileManager()
+    manager.load_profiles_from_json(input_path)
+    profile_server = ProfileServer(manager)
+    socket_path = str(tmp_path / 'server.sock')
+    addresses = queue.Queue()
+    thread = threading.Thread(target=asyncio.run, args=(
+        profile_server.serve(socket_path, "127.0.0.1", 0, addresses.put),))
+    thread.start()
+    http_address = addresses.get(timeout=10)[1]
+    yield manager, socket_path, int(http_address.rsplit(":", 1)[1])
+    send_request({"op": "shutdown"}, socket_path)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+
+
+def _http(port, method, path, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.request(method, path, body=None if body is None else json.dumps(body))
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read())
+    connection.close()
+    return result
+
+
+class TestServer:
+    def test_socket_requests(self, server):
+        manager, socket_path, _ = server
+        expected = [profile.to_dict() for profile in manager.sort_profiles("country,-age", limit=5, offset=3)]
+        response = send_request({"op": "sort", "sort": "country,-age", "limit": 5, "offset": 3}, socket_path)
+        assert response == {"ok": True, "profiles": expected}
+        expected = [profile.to_dict() for profile in manager.query(country="US", min_age=30, sort="name")]
+        response = send_request({"op": "sort", "sort": "name", "where": {"country": "US", "min_age": 30}},
+                                socket_path)
+        assert response["profiles"] == expected
+
+        assert send_request({"op": "add", "profile": NEW_PROFILE}, socket_path) == {"ok": True}
+        assert send_request({"op": "get", "email": NEW_PROFILE["email"]}, socket_path)["profile"] == NEW_PROFILE
+        duplicate = send_request({"op": "add", "profile": NEW_PROFILE}, socket_path)
+        assert not duplicate["ok"]
+        invalid = send_request({"op": "add", "profile": dict(NEW_PROFILE, email="bad")}, socket_path)
+        assert not invalid["ok"] and [error["field"] for error in invalid["errors"]] == ["email"]
+        assert send_request({"op": "remove", "email": NEW_PROFILE["email"]}, socket_path) == {"ok": True}
+        assert not send_request({"op": "get", "email": NEW_PROFILE["email"]}, socket_path)["ok"]
+        assert send_request({"op": "count"}, socket_path) == {"ok": True, "count": 200}
+        for bad_request in ({"op": "fly"}, {"op": "sort", "sort": "height"}, {"op": "sort", "limit": "ten"},
+                            {"op": "sort", "where": {"planet": "Mars"}}, {"op": "get"}):
+            assert not send_request(bad_request, socket_path)["ok"]
+
+    @pytest.mark.parametrize("bad_request", [
+        {"op": "sort", "sort": 5},
+        {"op": "sort", "where": {"country": ["US"]}},
+        {"op": "sort", "where": {"name_prefix": 5}},
+        {"op": "sort", "where": {"dob_from": 19900101}},
+        {"op": "sort", "where": {"min_age": True}},
+        {"op": "add", "profile": dict(NEW_PROFILE, location="Boston, MA, US")},
+    ])
+    def test_bad_types_are_rejected(self, server, bad_request):
+        _, socket_path, port = server
+        response = send_request(bad_request, socket_path)
+        assert not response["ok"] and response["error"]
+        assert _http(port, "POST", "/", bad_request)[0] == 400
+        assert send_request({"op": "count"}, socket_path) == {"ok": True, "count": 200}
+
+    def test_null_offset_is_the_default(self, server):
+        manager, socket_path, port = server
+        expected = [profile.to_dict() for profile in manager.sort_profiles("age", limit=3)]
+        request = {"op": "sort", "limit": 3, "offset": None}
+        assert send_request(request, socket_path) == {"ok": True, "profiles": expected}
+        assert _http(port, "POST", "/", request) == (200, {"ok": True, "profiles": expected})
+
+    @pytest.mark.parametrize("length", ["ten", "-5"])
+    def test_bad_content_length(self, server, length):
+        _, _, port = server
+        with socket.create_connection(("127.0.0.1", port), timeout=10) as connection:
+            connection.sendall(f"POST / HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode("latin-1"))
+            response = b""
+            while chunk := connection.recv(4096):
+                response += chunk
+        assert response.startswith(b"HTTP/1.1 400 ")
+        assert json.loads(response.partition(b"\r\n\r\n")[2]) == {"ok": False, "error": "Invalid Content-Length"}
+
+    def test_http_routes(self, server):
+        manager, _, port = server
+        expected = [profile.to_dict() for profile in manager.sort_profiles("name", limit=4)]
+        assert _http(port, "GET", "/profiles?sort=name&limit=4") == (200, {"ok": True, "profiles": expected})
+        status, response = _http(port, "GET", "/profiles?sort=email&country=US&min_age=30&max_age=40")
+        assert status == 200
+        assert response["profiles"] == [profile.to_dict() for profile in manager.query(
+            country="US", min_age=30, max_age=40, sort="email")]
+        assert _http(port, "POST", "/profiles", NEW_PROFILE) == (200, {"ok": True})
+        assert _http(port, "GET", "/profiles/zoe.quinn%40example.com")[1]["profile"] == NEW_PROFILE
+        assert _http(port, "DELETE", "/profiles/zoe.quinn@example.com") == (200, {"ok": True})
+        assert _http(port, "DELETE", "/profiles/zoe.quinn@example.com")[0] == 404
+        assert _http(port, "POST", "/", {"op": "count"}) == (200, {"ok": True, "count": 200})
+        assert _http(port, "GET", "/nowhere")[0] == 404
+        assert _http(port, "POST", "/profiles", {"name": "x"})[0] == 400
+
+    def test_cli_serve_and_client(self, input_path, tmp_path, capsys):
+        socket_path = str(tmp_path / 'cli.sock')
+        thread = threading.Thread(target=main, args=(["serve", "-i", input_path, "--socket", socket_path],))
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_path):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        output_path = tmp_path / 'client.json'
+        expected_path = tmp_path / 'expected.json'
+        assert main(["client", "sort", "--socket", socket_path, "--sort", "location,-age", "--where",
+                     "country=US", "--limit", "7", "-o", str(output_path)]) == 0
+        assert main(["-i", input_path, "--sort", "location,-age", "--where", "country=US", "--limit", "7",
+                     "-o", str(expected_path)]) == 0
+        assert output_path.read_bytes() == expected_path.read_bytes()
+
+        profile_path = tmp_path / 'profile.json'
+        profile_path.write_text(json.dumps(NEW_PROFILE))
+        assert main(["client", "add", "--socket", socket_path, "--profile", str(profile_path)]) == 0
+        assert main(["client", "add", "--socket", socket_path, "--profile", str(profile_path)]) == 1
+        assert main(["client", "count", "--socket", socket_path]) == 0
+        assert json.loads(capsys.readouterr().out.splitlines()[-1]) == {"ok": True, "count": 201}
+        assert main(["client", "shutdown", "--socket", socket_path]) == 0
+        thread.join(timeout=10)
+        assert not thread.is_alive() and not os.path.exists(socket_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
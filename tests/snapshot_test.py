@@ -0,0 +1,88 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.main import main
+from src.snapshot import Snapshot, SnapshotError, is_snapshot
+from benchmarks.synthetic import generate_profiles
+
+VALID_LIST_PATH = Path(__file__).parent.parent / 'data' / 'valid' / 'input' / 'user_list.json'
+
+
+@pytest.fixture
+def manager():
+    manager = UserProfileManager()
+    for profile_data in generate_profiles(300, seed=8):
+        profile_data["location"] = Location(**profile_data["location"])
+        manager.add_profile(UserProfile(**profile_data))
+    # Not a valid name, but the snapshot must round-trip any text.
+    manager._insert_profile(UserProfile(name="Zoë Ünal", email="zoe@example.com", password="Password1!",
+                                        dob="3/5/1990", location=Location("Paris", "IF", "FR")))
+    return manager
+
+
+class TestSnapshot:
+    def test_round_trip(self, manager, tmp_path):
+        snapshot_path = str(tmp_path / 'profiles.snap')
+        assert manager.save_snapshot(snapshot_path) == 301
+        assert is_snapshot(snapshot_path)
+        loaded = UserProfileManager()
+        loaded.load_snapshot(snapshot_path)
+        assert len(loaded.user_profiles) == 301
+        assert [p.to_dict() for p in loaded.user_profiles.values()] == [
+            p.to_dict() for p in manager.user_profiles.values()]
+        assert loaded.get_profile("zoe@example.com").to_dict() == manager.get_profile("zoe@example.com").to_dict()
+        assert loaded.get_profile("missing@example.com") is None
+        assert not hasattr(loaded.get_profile("zoe@example.com"), "__dict__")
+        for spec in ("age", "name", "email", "location", "-age", "country,-name"):
+            expected = [p.to_dict() for p in manager.sort_profiles(spec)]
+            assert [p.to_dict() for p in loaded.sort_profiles(spec)] == expected
+            assert [p.to_dict() for p in loaded.sort_profiles(spec, limit=5, offset=20)] == expected[20:25]
+            assert [p.to_dict() for p in loaded.iter_sorted(spec, offset=290)] == expected[290:]
+        loaded.user_profiles.snapshot.close()
+
+    def test_changes_after_loading(self, manager, tmp_path):
+        snapshot_path = str(tmp_path / 'profiles.snap')
+        manager.save_snapshot(snapshot_path)
+        loaded = UserProfileManager()
+        loaded.load_snapshot(snapshot_path)
+        removed = list(manager.user_profiles)[10]
+        added = UserProfile(name="Aaa New", email="new@example.com", password="Password1!",
+                            dob="1901-01-01", location=Location("Austin", "TX", "US"))
+        for target in (manager, loaded):
+            target.remove_profile(removed)
+            target.add_profile(added)
+            with pytest.raises(ValueError):
+                target.add_profile(added)
+        assert removed not in loaded.user_profiles
+        assert [p.to_dict() for p in loaded.sort_profiles("age")] == [p.to_dict() for p in manager.sort_profiles("age")]
+        assert ([p.to_dict() for p in loaded.query(country="US", min_age=30, sort="email")]
+                == [p.to_dict() for p in manager.query(country="US", min_age=30, sort="email")])
+
+    def test_rejects_other_files(self, tmp_path):
+        with pytest.raises(SnapshotError):
+            Snapshot(str(VALID_LIST_PATH))
+        empty_path = tmp_path / 'empty.snap'
+        empty_path.write_bytes(b"")
+        with pytest.raises(SnapshotError):
+            Snapshot(str(empty_path))
+        assert not is_snapshot(str(VALID_LIST_PATH))
+
+    def test_cli(self, tmp_path):
+        snapshot_path = tmp_path / 'profiles.snap'
+        from_json = tmp_path / 'from_json.json'
+        from_snapshot = tmp_path / 'from_snapshot.json'
+        assert main(["-i", str(VALID_LIST_PATH), "-o", str(from_json), "--snapshot", str(snapshot_path)]) == 0
+        assert main(["-i", str(snapshot_path), "-o", str(from_snapshot)]) == 0
+        assert from_snapshot.read_bytes() == from_json.read_bytes()
+        assert main(["-i", str(snapshot_path), "-o", str(from_snapshot), "--sort", "name", "--limit", "2"]) == 0
+        assert [p["name"] for p in json.loads(from_snapshot.read_text())] == sorted(
+            p["name"] for p in json.loads(from_json.read_text()))[:2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,91 @@
+import pytest
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.sorted_views import SortedKeyList
+from benchmarks.synthetic import generate_profiles
+
+
+def _profiles(count, seed=7):
+    profiles = []
+    for profile_data in generate_profiles(count, seed):
+        profile_data["location"] = Location(**profile_data["location"])
+        profiles.append(UserProfile(**profile_data))
+    return profiles
+
+
+class TestSortedKeyList:
+    def test_add_remove_and_slices(self):
+        rng = random.Random(1)
+        values = [rng.randrange(500) for _ in range(2000)]
+        sorted_list = SortedKeyList(values[:300], chunk_size=8)
+        for value in values[300:]:
+            sorted_list.add(value)
+        for value in values[::3]:
+            sorted_list.remove(value)
+        expected = sorted(values)
+        for value in values[::3]:
+            expected.remove(value)
+        assert list(sorted_list) == expected
+        assert len(sorted_list) == len(expected)
+        for start, stop in ((0, 5), (17, 40), (len(expected) - 3, None), (len(expected) + 5, None)):
+            assert list(sorted_list.islice(start, stop)) == expected[start:stop]
+        with pytest.raises(ValueError):
+            sorted_list.remove(1000)
+
+
+class TestSortedViews:
+    @pytest.mark.parametrize("storage", ["dict", "compact"])
+    def test_views_match_full_sort_after_mutations(self, storage):
+        profiles = _profiles(400)
+        manager = UserProfileManager(storage=storage)
+        reference = UserProfileManager(storage=storage)
+        for profile in profiles[:200]:
+            manager.add_profile(profile)
+            reference.add_profile(profile)
+        specs = ["name", "-age", "location", "country,-name,email"]
+        for spec in specs:
+            manager.enable_sorted_view(spec)
+        rng = random.Random(3)
+        for profile in profiles[200:]:
+            manager.add_profile(profile)
+            reference.add_profile(profile)
+            email = rng.choice(list(reference.user_profiles))
+            manager.remove_profile(email)
+            reference.remove_profile(email)
+        for spec in specs + ["country,state,city"]:
+            expected = [p.to_dict() for p in reference.sort_profiles(spec)]
+            assert [p.to_dict() for p in manager.sort_profiles(spec)] == expected
+            assert [p.to_dict() for p in manager.iter_sorted(spec, offset=10)] == expected[10:]
+            assert [p.to_dict() for p in manager.sort_profiles(spec, limit=7, offset=50)] == expected[50:57]
+
+    def test_ties_keep_insertion_order(self):
+        manager = UserProfileManager()
+        manager.enable_sorted_view("country")
+        for profile in _profiles(50):
+            manager.add_profile(profile)
+        manager.remove_profile(next(iter(manager.user_profiles)))
+        expected = sorted(manager.user_profiles.values(), key=lambda p: p.location.country)
+        assert manager.sort_profiles("country") == expected
+
+    def test_direct_changes_rebuild_and_disable(self):
+        manager = UserProfileManager()
+        profiles = _profiles(30)
+        for profile in profiles[:20]:
+            manager.add_profile(profile)
+        manager.enable_sorted_view("email")
+        manager.user_profiles[profiles[20].email] = profiles[20]
+        assert manager.sort_profiles("email") == sorted(manager.user_profiles.values(), key=lambda p: p.email)
+        manager.disable_sorted_view("email")
+        manager.add_profile(profiles[21])
+        assert manager.sort_profiles("email") == sorted(manager.user_profiles.values(), key=lambda p: p.email)
+        with pytest.raises(ValueError):
+            manager.enable_sorted_view("height")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
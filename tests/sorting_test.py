@@ -0,0 +1,125 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.main import main
+from src.sorting import parse_sort_spec, select_top
+from benchmarks.synthetic import generate_profiles
+
+VALID_LIST_PATH = Path(__file__).parent.parent / 'data' / 'valid' / 'input' / 'user_list.json'
+
+
+def _profile(name, email, dob, city, state, country):
+    return UserProfile(name=name, email=email, password="Password1!", dob=dob,
+                       location=Location(city, state, country))
+
+
+@pytest.fixture
+def manager():
+    manager = UserProfileManager()
+    manager.add_profile(_profile("Ann Lee", "ann@example.com", "1990-05-01", "Seattle", "WA", "US"))
+    manager.add_profile(_profile("Bob King", "bob@example.com", "1980-01-01", "Austin", "TX", "US"))
+    manager.add_profile(_profile("Cam Hall", "cam@example.com", "01/01/1970", "Toronto", "ON", "CA"))
+    manager.add_profile(_profile("Dee Hall", "dee@example.com", "1990-05-01", "Austin", "TX", "US"))
+    manager.add_profile(_profile("Eve Adams", "eve@example.com", "2000-12-31", "Vancouver", "BC", "CA"))
+    return manager
+
+
+class TestSortProfiles:
+    def test_parse_sort_spec(self):
+        assert parse_sort_spec("country,-age, name") == [("country", False), ("age", True), ("name", False)]
+        assert parse_sort_spec(["email"]) == [("email", False)]
+        with pytest.raises(ValueError):
+            parse_sort_spec("country,height")
+        with pytest.raises(ValueError):
+            parse_sort_spec("")
+
+    def test_single_keys_match_legacy_methods(self, manager):
+        assert [p.email for p in manager.sort_profiles_by_age()] == [
+            "cam@example.com", "bob@example.com", "ann@example.com", "dee@example.com", "eve@example.com",
+        ]
+        assert manager.sort_profiles_by_location() == manager.sort_profiles("country,state,city")
+        assert manager.sort_profiles_by_name() == sorted(manager.user_profiles.values(), key=lambda p: p.name)
+        assert [p.email for p in manager.sort_profiles("-age")] == [
+            "eve@example.com", "ann@example.com", "dee@example.com", "bob@example.com", "cam@example.com",
+        ]
+
+    def test_composite_spec(self, manager):
+        result = manager.sort_profiles("country,-age,name")
+        assert [p.email for p in result] == [
+            "eve@example.com", "cam@example.com", "ann@example.com", "dee@example.com", "bob@example.com",
+        ]
+        result = manager.sort_profiles("-country,city,-name")
+        assert [p.email for p in result] == [
+            "dee@example.com", "bob@example.com", "ann@example.com", "cam@example.com", "eve@example.com",
+        ]
+
+    def test_keys_follow_add_and_remove(self, manager):
+        manager.remove_profile("cam@example.com")
+        manager.add_profile(_profile("Zed Old", "zed@example.com", "1900-01-01", "Boston", "MA", "US"))
+        assert [p.email for p in manager.sort_profiles("age")][:2] == ["zed@example.com", "bob@example.com"]
+
+    def test_compact_storage(self):
+        dict_manager = UserProfileManager()
+        compact_manager = UserProfileManager(storage="compact")
+        for target in (dict_manager, compact_manager):
+            target.load_profiles_from_json(str(VALID_LIST_PATH))
+        spec = "-country,-age,email"
+        assert ([p.to_dict() for p in compact_manager.sort_profiles(spec)]
+                == [p.to_dict() for p in dict_manager.sort_profiles(spec)])
+
+
+class TestSelection:
+    @pytest.mark.parametrize("spec", ["age", "name", "-age,email", "country,-name"])
+    def test_pages_match_full_sort(self, spec):
+        manager = UserProfileManager()
+        for profile_data in generate_profiles(120, seed=5):
+            profile_data["location"] = Location(**profile_data["location"])
+            manager.add_profile(UserProfile(**profile_data))
+        full = manager.sort_profiles(spec)
+        for limit, offset in ((10, 0), (7, 30), (50, 100), (None, 115), (0, 3)):
+            end = None if limit is None else offset + limit
+            assert manager.sort_profiles(spec, limit=limit, offset=offset) == full[offset:end], (limit, offset)
+        assert manager.top_profiles(spec, 5) == full[:5]
+        assert manager.query(country="US", sort=spec, limit=4, offset=2) == [
+            p for p in full if p.location.country == "US"][2:6]
+
+    def test_select_top_streams_with_duplicates(self):
+        profiles = []
+        for profile_data in generate_profiles(60, seed=6):
+            profile_data["location"] = Location(**profile_data["location"])
+            profiles.append(UserProfile(**profile_data))
+        profiles.append(UserProfile(name="Aaa Dupe", email=profiles[0].email, password="Password1!",
+                                    dob="1900-01-01", location=Location("Austin", "TX", "US")))
+        manager = UserProfileManager()
+        for profile in profiles[:-1]:
+            manager.add_profile(profile)
+        page, total = select_top(iter(profiles), "age", limit=5, offset=2)
+        assert total == 60
+        assert page == manager.sort_profiles("age")[2:7]
+
+    def test_cli_limit_and_offset(self, tmp_path):
+        output_path = tmp_path / 'page.json'
+        assert main(["-i", str(VALID_LIST_PATH), "-o", str(output_path), "--limit", "2", "--offset", "1"]) == 0
+        assert [p["email"] for p in json.loads(output_path.read_text())] == [
+            "david.brown@company.com", "emma.w@domain.co.uk",
+        ]
+
+    def test_cli_reversed_first_key(self, tmp_path):
+        output_path = tmp_path / 'youngest.json'
+        assert main(["-i", str(VALID_LIST_PATH), "-o", str(output_path), "--sort=-age"]) == 0
+        youngest = UserProfileManager()
+        youngest.load_profiles_from_json(str(VALID_LIST_PATH))
+        assert [p["email"] for p in json.loads(output_path.read_text())] == [
+            profile.email for profile in youngest.sort_profiles("-age")
+        ]
+        with pytest.raises(SystemExit):
+            main(["-i", str(VALID_LIST_PATH), "--sort", "-age"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,94 @@
+import pytest
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import Location, UserProfile, UserProfileManager
+from src.main import main
+from src.sqlite_store import SQLiteProfileStore
+from benchmarks.synthetic import write_profiles
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    input_path = tmp_path / 'input.ndjson'
+    write_profiles(str(input_path), 400, seed=9, ndjson=True)
+    return str(input_path)
+
+
+class TestSQLiteStore:
+    def test_matches_dict_manager(self, input_path, tmp_path):
+        memory = UserProfileManager()
+        memory.load_profiles_from_json(input_path)
+        database = UserProfileManager(storage="sqlite", database=str(tmp_path / 'profiles.db'))
+        database.load_profiles_from_json(input_path, batch_size=64)
+        assert isinstance(database.user_profiles, SQLiteProfileStore)
+        assert list(database.user_profiles) == list(memory.user_profiles)
+        for spec in ("age", "-age", "name", "email", "location", "country,-age,name", "-state,city"):
+            expected = [p.to_dict() for p in memory.sort_profiles(spec)]
+            assert [p.to_dict() for p in database.sort_profiles(spec)] == expected
+            assert [p.to_dict() for p in database.sort_profiles(spec, limit=7, offset=40)] == expected[40:47]
+            assert [p.to_dict() for p in database.iter_sorted(spec, offset=390)] == expected[390:]
+        reference_date = datetime(2024, 6, 15)
+        for criteria in ({"country": "US", "state": "CA"}, {"min_age": 30, "max_age": 40}, {"name_prefix": "al"},
+                         {"dob_from": "1980-01-01", "dob_to": "1989-12-31", "country": "US"}, {"max_age": 25}):
+            expected = [p.to_dict() for p in memory.query(sort="email", reference_date=reference_date, **criteria)]
+            assert [p.to_dict() for p in database.query(
+                sort="email", reference_date=reference_date, **criteria)] == expected
+        with pytest.raises(ValueError):
+            database.enable_sorted_view("name")
+
+    def test_changes_persist(self, tmp_path):
+        database_path = str(tmp_path / 'profiles.db')
+        manager = UserProfileManager(storage="sqlite", database=database_path)
+        ann = UserProfile(name="Ann Lee", email="ann@example.com", password="Password1!",
+                          dob="1990-05-01", location=Location("Seattle", "WA", "US"))
+        bob = UserProfile(name="Bob King", email="bob@example.com", password="Password1!",
+                          dob="01/01/1980", location=Location("Austin", "TX", "US"))
+        manager.add_profile(ann)
+        manager.add_profile(bob)
+        with pytest.raises(ValueError):
+            manager.add_profile(ann)
+        manager.remove_profile("ann@example.com")
+        with pytest.raises(ValueError):
+            manager.remove_profile("ann@example.com")
+        manager.user_profiles.close()
+
+        reopened = UserProfileManager(storage="sqlite", database=database_path)
+        assert list(reopened.user_profiles) == ["bob@example.com"]
+        assert reopened.get_profile("bob@example.com").to_dict() == bob.to_dict()
+        assert reopened.get_profile("ann@example.com") is None
+
+    def test_cli(self, input_path, tmp_path):
+        dict_output = tmp_path / 'dict.json'
+        sqlite_output = tmp_path / 'sqlite.json'
+        assert main(["-i", input_path, "-o", str(dict_output), "--sort", "location,-age"]) == 0
+        assert main(["-i", input_path, "-o", str(sqlite_output), "--sort", "location,-age",
+                     "--storage", "sqlite", "--database", str(tmp_path / 'cli.db')]) == 0
+        assert sqlite_output.read_bytes() == dict_output.read_bytes()
+        assert main(["-i", input_path, "-o", str(sqlite_output), "--storage", "sqlite",
+                     "--where", "country=US", "--limit", "3"]) == 0
+        assert len(json.loads(sqlite_output.read_text())) == 3
+
+    @pytest.mark.parametrize("options", [[], ["--limit", "10"], ["--external-sort"]])
+    def test_cli_includes_database_profiles(self, input_path, tmp_path, options):
+        database_path = str(tmp_path / 'existing.db')
+        existing_path = tmp_path / 'existing.ndjson'
+        write_profiles(str(existing_path), 5, seed=90, ndjson=True)
+        manager = UserProfileManager(storage="sqlite", database=database_path)
+        manager.load_profiles_from_json(str(existing_path))
+        manager.user_profiles.close()
+        new_path = tmp_path / 'new.ndjson'
+        new_path.write_text("".join(Path(input_path).read_text().splitlines(keepends=True)[:3]))
+
+        output = tmp_path / 'output.json'
+        assert main(["-i", str(new_path), "-o", str(output), "--storage", "sqlite", "--database", database_path,
+                     "--sort", "name", *options]) == 0
+        assert len(json.loads(output.read_text())) == 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
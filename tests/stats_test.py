@@ -0,0 +1,66 @@
+import pytest
+import json
+import pstats
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from src.main import main
+from src.stats import PipelineStats
+from benchmarks.synthetic import generate_profiles
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    records = list(generate_profiles(300, seed=16, invalid_fraction=0.2))
+    records.extend(records[:25])
+    input_path = tmp_path / 'input.json'
+    input_path.write_text(json.dumps(records))
+    return str(input_path)
+
+
+class TestStats:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_manager_counters(self, input_path, workers):
+        stats = PipelineStats()
+        manager = UserProfileManager(stats=stats)
+        manager.load_profiles_from_json(input_path, workers=workers, batch_size=64)
+        counters = stats.to_dict()["counters"]
+        assert counters["read"] == 325
+        assert counters["accepted"] + counters["rejected"] == 325
+        assert counters["accepted"] - counters["duplicates"] == len(manager.user_profiles)
+        assert counters["duplicates"] > 0
+        assert sum(value for key, value in counters.items() if key.startswith("rejected.")) >= counters["rejected"]
+        if workers == 1:
+            assert set(stats.timers) == {"parse", "validate"}
+
+    def test_disabled_by_default(self, input_path):
+        manager = UserProfileManager()
+        manager.load_profiles_from_json(input_path)
+        assert manager.stats is None
+
+    def test_cli_stats_and_profile(self, input_path, tmp_path):
+        stats_path = tmp_path / 'stats.json'
+        profile_path = tmp_path / 'run.prof'
+        output_path = tmp_path / 'output.json'
+        plain_path = tmp_path / 'plain.json'
+        assert main(["-i", input_path, "-o", str(plain_path)]) == 0
+        assert main(["-i", input_path, "-o", str(output_path), "--stats", str(stats_path),
+                     "--profile", str(profile_path)]) == 0
+        assert output_path.read_bytes() == plain_path.read_bytes()
+        report = json.loads(stats_path.read_text())
+        assert {"total", "load", "parse", "validate", "sort", "write"} <= set(report["timers"])
+        assert report["counters"]["read"] == 325
+        assert report["profile"] and "cumulative_seconds" in report["profile"][0]
+        assert pstats.Stats(str(profile_path)).total_calls > 0
+
+        assert main(["-i", input_path, "-o", str(output_path), "--limit", "5", "--stats", str(stats_path)]) == 0
+        report = json.loads(stats_path.read_text())
+        assert "select_top" in report["timers"] and "profile" not in report
+        assert report["counters"]["read"] == 325
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,76 @@
+import pytest
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import UserProfileManager
+from src.streaming import InputFormatError, _JSONStreamReader, _iter_json_document, iter_batches, iter_profile_items
+
+VALID_LIST_PATH = Path(__file__).parent.parent / 'data' / 'valid' / 'input' / 'user_list.json'
+
+
+class TestStreaming:
+    def test_array_matches_json_load_across_chunk_boundaries(self):
+        with open(VALID_LIST_PATH, 'r') as f:
+            expected = json.load(f)
+        for read_size in (1, 7, 64, 1 << 16):
+            items = list(iter_profile_items(str(VALID_LIST_PATH), "json", read_size=read_size))
+            assert items == expected
+
+    def test_ndjson_and_auto_detection(self, tmp_path):
+        with open(VALID_LIST_PATH, 'r') as f:
+            expected = json.load(f)
+        ndjson_path = tmp_path / 'users.ndjson'
+        ndjson_path.write_text("\n".join(json.dumps(item) for item in expected) + "\n\n")
+        assert list(iter_profile_items(str(ndjson_path), "ndjson")) == expected
+        assert list(iter_profile_items(str(ndjson_path), "auto")) == expected
+
+        manager = UserProfileManager()
+        manager.load_profiles_from_json(str(ndjson_path), batch_size=2)
+        assert len(manager.user_profiles) == 5
+
+    def test_single_object_is_one_item(self):
+        user_path = Path(__file__).parent.parent / 'data' / 'valid' / 'input' / 'user.json'
+        for input_format in ("json", "auto"):
+            items = list(iter_profile_items(str(user_path), input_format, read_size=5))
+            assert len(items) == 1
+            assert items[0]['email'] == "john.smith@example.com"
+
+    def test_malformed_input(self, tmp_path):
+        scalar_path = tmp_path / 'scalar.json'
+        scalar_path.write_text("42")
+        with pytest.raises(InputFormatError):
+            list(iter_profile_items(str(scalar_path)))
+
+        truncated_path = tmp_path / 'truncated.json'
+        truncated_path.write_text('[{"name": "A B"}, {"name": ')
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_profile_items(str(truncated_path), "json", read_size=4))
+
+        manager = UserProfileManager()
+        manager.load_profiles_from_json(str(scalar_path))
+        assert len(manager.user_profiles) == 0
+
+    def test_malformed_record_stops_reading(self):
+        with open(VALID_LIST_PATH, 'r') as f:
+            record = json.dumps(json.load(f)[0])
+        handle = io.StringIO('[{"email": oops}, ' + ", ".join([record] * 2000) + "]")
+        with pytest.raises(json.JSONDecodeError):
+            list(_iter_json_document(_JSONStreamReader(handle, read_size=64)))
+        assert handle.tell() == 64
+
+        handle = io.StringIO("[" + record + ', {"name": "' + "x" * 5000 + '"}]')
+        with pytest.raises(InputFormatError):
+            list(_iter_json_document(_JSONStreamReader(handle, read_size=64, max_record_size=1000)))
+        assert handle.tell() < 2000
+
+    def test_iter_batches(self):
+        assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+        assert list(iter_batches([], 3)) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import ProfileValidator, RejectWriter, UserProfileManager
+from src.main import main
+
+DATA_PATH = Path(__file__).parent.parent / 'data'
+
+
+class TestProfileValidator:
+    def test_valid_records_have_no_errors(self):
+        with open(DATA_PATH / 'valid' / 'input' / 'user_list.json', 'r') as f:
+            records = json.load(f)
+        assert ProfileValidator().validate_batch(records) == []
+
+    def test_invalid_records_report_every_field(self):
+        with open(DATA_PATH / 'invalid' / 'user_list.json', 'r') as f:
+            records = json.load(f)
+        reports = ProfileValidator().validate_batch(records, start_index=10)
+        assert [report.index for report in reports] == [10, 11, 12, 13, 14]
+        assert reports[0].fields == ["dob", "location", "name", "email"]
+        assert reports[0].email == "missing@domain"
+        assert reports[0].to_dict()["errors"][0] == {
+            "field": "dob", "code": "invalid", "message": "Invalid date of birth format",
+        }
+
+    def test_structural_errors(self):
+        validator = ProfileValidator()
+        assert validator.validate_record([1, 2])[0].code == "type"
+        missing = validator.validate_record({"name": "John Smith"})
+        assert [(error.field, error.code) for error in missing] == [
+            ("email", "missing"), ("password", "missing"), ("dob", "missing"), ("location", "missing"),
+        ]
+        record = {
+            "name": "John Smith", "email": "john@example.com", "password": "Secure123!", "dob": "1990-01-15",
+            "location": {"city": "Austin", "state": "TX", "country": "US", "zip": "78701"},
+        }
+        assert [error.code for error in validator.validate_record(record)] == ["unexpected"]
+        record["location"] = {"city": "Austin", "state": "TX", "country": "US"}
+        record["name"] = 42
+        assert [error.field for error in validator.validate_record(record)] == ["name"]
+
+    def test_repeated_values_are_memoized(self):
+        validator = ProfileValidator()
+        record = {
+            "name": "John Smith", "email": "john@example.com", "password": "Secure123!", "dob": "1990-01-15",
+            "location": {"city": "Austin", "state": "TX", "country": "US"},
+        }
+        validator.validate_batch([record] * 3)
+        cache_info = validator.cache_info()
+        assert cache_info["location"]["misses"] == 1
+        assert cache_info["location"]["hits"] == 2
+        assert cache_info["email_domain"]["hits"] == 2
+
+    def test_rejects_file(self, tmp_path, capsys):
+        rejects_path = tmp_path / 'rejects.ndjson'
+        manager = UserProfileManager()
+        with RejectWriter(str(rejects_path)) as rejects:
+            manager.load_profiles_from_json(str(DATA_PATH / 'invalid' / 'user_list.json'), rejects=rejects)
+        assert rejects.count == 5
+        assert capsys.readouterr().out == ""
+        lines = [json.loads(line) for line in rejects_path.read_text().splitlines()]
+        assert [line["index"] for line in lines] == [0, 1, 2, 3, 4]
+        assert lines[2]["record"]["email"] == "valid@email.com"
+
+    def test_cli_rejects_option(self, tmp_path):
+        rejects_path = tmp_path / 'rejects.ndjson'
+        output_path = tmp_path / 'out.json'
+        assert main(["--input", str(DATA_PATH / 'valid' / 'input' / 'user_list.json'),
+                     "--output", str(output_path), "--rejects", str(rejects_path)]) == 0
+        assert rejects_path.read_text() == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+import pytest
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.main import main
+from src.writer import PartitionedWriter, encode_pretty, write_items
+from benchmarks.synthetic import generate_profiles, write_profiles
+
+
+class TestWriter:
+    @pytest.mark.parametrize("indent", [4, 2, None])
+    def test_json_matches_json_dumps(self, indent):
+        items = list(generate_profiles(50, seed=1))
+        items[0]["extra"] = {"list": [1, 2.5, None, True, {}, [[]]], "empty": [], 1: "x", "ü": "é\t"}
+        handle = io.StringIO()
+        assert write_items(items, handle, indent=indent, write_size=100) == 50
+        assert handle.getvalue() == json.dumps(items, indent=indent)
+        assert encode_pretty(items[0]) == json.dumps(items[0], indent=4)
+
+    def test_empty_and_ndjson(self):
+        for indent in (4, None):
+            handle = io.StringIO()
+            assert write_items([], handle, indent=indent) == 0
+            assert handle.getvalue() == "[]"
+        items = list(generate_profiles(5, seed=2))
+        handle = io.StringIO()
+        assert write_items(items, handle, "ndjson") == 5
+        assert [json.loads(line) for line in handle.getvalue().splitlines()] == items
+        with pytest.raises(ValueError):
+            write_items(items, handle, "xml")
+
+    def test_cli_formats(self, tmp_path):
+        input_path = tmp_path / 'input.json'
+        write_profiles(str(input_path), 40, seed=3)
+        outputs = {}
+        for name, options in (("pretty", []), ("compact", ["--compact"]), ("ndjson", ["--format", "ndjson"])):
+            outputs[name] = tmp_path / f'{name}.json'
+            assert main(["-i", str(input_path), "-o", str(outputs[name]), "--sort", "name", *options]) == 0
+        profiles = json.loads(outputs["pretty"].read_text())
+        assert outputs["compact"].read_text() == json.dumps(profiles)
+        assert outputs["ndjson"].read_text() == "".join(json.dumps(p) + "\n" for p in profiles)
+
+
+class TestPartitionedWriter:
+    @pytest.mark.parametrize("output_format,indent", [("json", 4), ("json", None), ("ndjson", None)])
+    def test_files_match_write_items(self, tmp_path, output_format, indent):
+        items = list(generate_profiles(600, seed=23))
+        # Two open files and small buffers force files to be closed and reopened.
+        with PartitionedWriter(str(tmp_path), ("country", "state"), output_format, indent, writers=3,
+                               max_open_files=2, buffer_size=300) as writer:
+            assert writer.write_all(items) == 600
+        counts = writer.close()
+        assert sum(counts.values()) == 600
+        partitions = {}
+        for item in items:
+            location = item["location"]
+            path = tmp_path / location["country"] / f'{location["state"]}.{output_format}'
+            partitions.setdefault(str(path), []).append(item)
+        assert counts == {path: len(members) for path, members in partitions.items()}
+        for path, members in partitions.items():
+            expected = io.StringIO()
+            write_items(members, expected, output_format, indent)
+            assert Path(path).read_text() == expected.getvalue()
+
+    def test_unsafe_names_and_errors(self, tmp_path):
+        item = next(generate_profiles(1, seed=24))
+        with PartitionedWriter(str(tmp_path)) as writer:
+            writer.write(dict(item, location=dict(item["location"], country="../x")))
+        assert [path.name for path in tmp_path.iterdir()] == ["%2e2e2f78.json"]
+        with pytest.raises(ValueError):
+            PartitionedWriter(str(tmp_path), ("state",))
+
+    def test_cli_partition_by(self, tmp_path, capsys):
+        input_path = tmp_path / 'input.json'
+        write_profiles(str(input_path), 200, seed=25)
+        out_dir = tmp_path / 'out'
+        assert main(["-i", str(input_path), "-o", str(out_dir), "--sort", "name", "--partition-by", "country"]) == 0
+        assert "profiles written to" in capsys.readouterr().err
+        sorted_path = tmp_path / 'sorted.json'
+        main(["-i", str(input_path), "-o", str(sorted_path), "--sort", "name"])
+        profiles = json.loads(sorted_path.read_text())
+        for path in out_dir.iterdir():
+            assert json.loads(path.read_text()) == [
+                profile for profile in profiles if profile["location"]["country"] == path.stem]
+        assert main(["-i", str(input_path), "-o", str(tmp_path / 'top'), "--limit", "10",
+                     "--partition-by", "country,state", "--format", "ndjson"]) == 0
+        assert sum(len(path.read_text().splitlines()) for path in (tmp_path / 'top').rglob('*.ndjson')) == 10
+        with pytest.raises(SystemExit):
+            main(["-i", str(input_path), "--partition-by", "country"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])